@@ -0,0 +1,422 @@
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import storage
+from embedding_cache import CacheEmbeddings, hash_texto
+from event_windows import retornos_evento
+from instrumentation import medido, span
+
+
+ARQUIVO_INDICE = 'data/indice_noticias.pkl'
+
+
+def _normalizar(vetores):
+    vetores = np.asarray(vetores, dtype=np.float32)
+    normas = np.linalg.norm(vetores, axis=-1, keepdims=True)
+    return vetores / np.maximum(normas, 1e-12)
+
+
+class IndiceIVF:
+    """
+    Índice aproximado de vizinhos mais próximos (similaridade de cosseno)
+
+    IVF: os vetores são agrupados em `n_listas` por k-means; a busca compara
+    a consulta com os centróides e só percorre as `n_sondas` listas mais
+    próximas. Inserções novas vão direto para a lista do centróide mais
+    próximo, sem retreinar.
+
+    Os vetores ficam em float16 (metade da memória) e são convertidos para
+    float32 só nas listas sondadas.
+    """
+
+    def __init__(self, n_listas=None, n_sondas=8, seed=42):
+        """
+        Parâmetros:
+        n_listas (int): Número de listas (padrão: 4 * raiz do nº de vetores de treino)
+        n_sondas (int): Listas percorridas por busca (mais sondas = mais recall, mais lento)
+        """
+        self.n_listas = n_listas
+        self.n_sondas = n_sondas
+        self.seed = seed
+        self.centroides = None
+        self.n_treino = 0
+        self._ids = []       # por lista: blocos de ids (int64)
+        self._vetores = []   # por lista: blocos de vetores (float16)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(bloco) for blocos in self._ids for bloco in blocos)
+
+    def _atribuir(self, vetores, lote=65_536):
+        """ Lista (centróide mais próximo) de cada vetor, em lotes para limitar a memória """
+        listas = np.empty(len(vetores), dtype=np.int64)
+        for inicio in range(0, len(vetores), lote):
+            listas[inicio:inicio + lote] = np.argmax(vetores[inicio:inicio + lote] @ self.centroides.T, axis=1)
+        return listas
+
+    @medido('ann.treinar')
+    def treinar(self, vetores, iteracoes=10, max_amostras=100_000):
+        """
+        Calcula os centróides (k-means esférico sobre uma amostra)
+
+        Parâmetros:
+        vetores (ndarray): Vetores representativos (n x dimensão)
+        iteracoes (int): Iterações do k-means
+        max_amostras (int): Tamanho máximo da amostra usada no k-means
+        """
+        vetores = _normalizar(vetores)
+        rng = np.random.default_rng(self.seed)
+        if len(vetores) > max_amostras:
+            vetores = vetores[rng.choice(len(vetores), max_amostras, replace=False)]
+        n_listas = self.n_listas or int(np.clip(4 * np.sqrt(len(vetores)), 1, 4096))
+        n_listas = min(n_listas, len(vetores))
+
+        self.centroides = vetores[rng.choice(len(vetores), n_listas, replace=False)].copy()
+        for _ in range(iteracoes):
+            listas = self._atribuir(vetores)
+            somas = np.zeros_like(self.centroides)
+            np.add.at(somas, listas, vetores)
+            vazias = np.bincount(listas, minlength=n_listas) == 0
+            # Lista vazia recebe um vetor qualquer para não desperdiçar o centróide
+            somas[vazias] = vetores[rng.choice(len(vetores), int(vazias.sum()))]
+            self.centroides = _normalizar(somas)
+
+        self.n_listas = n_listas
+        self.n_treino = len(vetores)
+        self._ids = [[] for _ in range(n_listas)]
+        self._vetores = [[] for _ in range(n_listas)]
+        return self
+
+    def adicionar(self, vetores, ids):
+        """
+        Insere vetores no índice (sem retreinar os centróides)
+
+        Parâmetros:
+        vetores (ndarray): n x dimensão
+        ids (array): Identificador de cada vetor (ex: posição na tabela de notícias)
+        """
+        if len(vetores) == 0:
+            return
+        vetores = _normalizar(vetores)
+        ids = np.asarray(ids, dtype=np.int64)
+        listas = self._atribuir(vetores)
+        ordem = np.argsort(listas, kind='stable')
+        limites = np.searchsorted(listas[ordem], np.arange(self.n_listas + 1))
+        with self._lock:
+            for lista in np.flatnonzero(np.diff(limites)):
+                posicoes = ordem[limites[lista]:limites[lista + 1]]
+                self._ids[lista].append(ids[posicoes])
+                self._vetores[lista].append(vetores[posicoes].astype(np.float16))
+
+    def _lista(self, lista):
+        """ Junta os blocos de uma lista num só (depois de inserções incrementais) """
+        if len(self._ids[lista]) > 1:
+            with self._lock:
+                self._ids[lista] = [np.concatenate(self._ids[lista])]
+                self._vetores[lista] = [np.concatenate(self._vetores[lista])]
+        if not self._ids[lista]:
+            return None, None
+        return self._ids[lista][0], self._vetores[lista][0]
+
+    def buscar(self, consulta, k=10, n_sondas=None):
+        """
+        Os k vetores mais parecidos com a consulta
+
+        Retorna:
+        tuple: (ids, similaridades), do mais parecido para o menos
+        """
+        consulta = _normalizar(consulta).ravel()
+        n_sondas = min(n_sondas or self.n_sondas, self.n_listas)
+        listas = np.argpartition(-(self.centroides @ consulta), n_sondas - 1)[:n_sondas]
+
+        ids, similaridades = [], []
+        for lista in listas:
+            ids_lista, vetores_lista = self._lista(lista)
+            if ids_lista is not None:
+                ids.append(ids_lista)
+                similaridades.append(vetores_lista.astype(np.float32) @ consulta)
+        if not ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        ids = np.concatenate(ids)
+        similaridades = np.minimum(np.concatenate(similaridades), 1.0)  # arredondamento do float16
+        k = min(k, len(ids))
+        melhores = np.argpartition(-similaridades, k - 1)[:k]
+        melhores = melhores[np.argsort(-similaridades[melhores])]
+        return ids[melhores], similaridades[melhores]
+
+
+class BuscaNoticias:
+    """
+    Busca de notícias passadas parecidas com uma manchete, com o que o
+    preço do ativo fez depois de cada uma
+
+    Fontes dos vetores:
+    - 'tfidf': TF-IDF de palavras e bigramas reduzido por SVD (LSA)
+    - 'embeddings': embeddings do FinBERT do cache (embedding_cache), reduzidos por PCA
+    - 'auto': embeddings se o cache cobre 90% das manchetes, senão TF-IDF
+    """
+
+    def __init__(self, fonte='auto', dimensao=128, n_sondas=8):
+        self.fonte = fonte
+        self.dimensao = dimensao
+        self.indice = IndiceIVF(n_sondas=n_sondas)
+        self.redutor = None
+        self.vetorizador = None
+        self.noticias = pd.DataFrame(columns=['titulo', 'ticker', 'data_utc', 'sentimento'])
+        self._chaves = set()
+        self._n_construcao = 0  # manchetes no índice quando foi construído
+        self._versao = None
+        self._versao_precos = None
+
+    # ==================
+    # VETORES
+    # ==================
+
+    @staticmethod
+    def _chave(ticker, titulo):
+        return hash_texto(f"{ticker}|{titulo}")
+
+    def _ajustar(self, textos, embeddings):
+        """ Ajusta o vetorizador e a redução de dimensão sobre as manchetes atuais """
+        from sklearn.decomposition import PCA, TruncatedSVD
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        rng = np.random.default_rng(42)
+        amostra = rng.choice(len(textos), min(len(textos), 100_000), replace=False)
+        if self.fonte == 'embeddings':
+            validas = amostra[~np.isnan(embeddings[amostra]).any(axis=1)]
+            self.redutor = PCA(n_components=min(self.dimensao, len(validas), embeddings.shape[1]),
+                               random_state=42).fit(embeddings[validas])
+        else:
+            self.vetorizador = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True,
+                                               min_df=2 if len(textos) > 1000 else 1,
+                                               max_features=200_000, strip_accents='unicode')
+            tfidf = self.vetorizador.fit_transform([textos[i] for i in amostra])
+            componentes = min(self.dimensao, tfidf.shape[1] - 1, len(amostra) - 1)
+            self.redutor = TruncatedSVD(n_components=max(componentes, 1), random_state=42).fit(tfidf)
+
+    def vetorizar(self, textos, embeddings=None):
+        """
+        Vetores reduzidos das manchetes
+
+        Parâmetros:
+        textos (list): Manchetes (usadas pela fonte 'tfidf')
+        embeddings (ndarray): Embeddings das manchetes (fonte 'embeddings')
+
+        Retorna:
+        ndarray: n x dimensão (linhas com NaN onde não houver embedding)
+        """
+        if self.fonte == 'embeddings':
+            embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(textos), -1)
+            vetores = np.full((len(textos), self.redutor.n_components_), np.nan, dtype=np.float32)
+            validas = ~np.isnan(embeddings).any(axis=1)
+            if validas.any():
+                vetores[validas] = self.redutor.transform(embeddings[validas])
+            return vetores
+        return self.redutor.transform(self.vetorizador.transform(list(textos))).astype(np.float32)
+
+    # ==================
+    # CONSTRUÇÃO
+    # ==================
+
+    @medido('ann.construir')
+    def construir(self, df_noticias):
+        """
+        Cria o índice do zero
+
+        Parâmetros:
+        df_noticias (DataFrame): Notícias com titulo, ticker, data_utc e sentimento
+        """
+        textos = df_noticias['titulo'].astype(str).tolist()
+        embeddings = None
+        if self.fonte in ('auto', 'embeddings'):
+            embeddings, encontradas = CacheEmbeddings().obter(textos)
+            if self.fonte == 'auto':
+                self.fonte = 'embeddings' if len(textos) and encontradas.mean() >= 0.9 else 'tfidf'
+
+        self._ajustar(textos, embeddings)
+        vetores = self.vetorizar(textos, embeddings)
+        validas = ~np.isnan(vetores).any(axis=1)
+        self.indice.treinar(vetores[validas])
+        self.noticias = self.noticias.iloc[0:0]
+        self._chaves = set()
+        self._inserir(df_noticias[validas], vetores[validas])
+        self._n_construcao = len(self.indice)
+        print(f"🔎 Índice de notícias: {len(self.indice)} manchetes ({self.fonte}, "
+              f"{self.indice.n_listas} listas)")
+        return self
+
+    def _inserir(self, df, vetores):
+        colunas = [c for c in ['titulo', 'ticker', 'data_utc', 'sentimento'] if c in df.columns]
+        novas = df[colunas].astype({'ticker': str}).reset_index(drop=True)
+        if 'sentimento' in novas.columns:
+            novas['sentimento'] = novas['sentimento'].astype(object)
+        ids = np.arange(len(self.noticias), len(self.noticias) + len(novas))
+        self.indice.adicionar(vetores, ids)
+        self.noticias = pd.concat([self.noticias, novas], ignore_index=True) if len(self.noticias) else novas
+        self._chaves.update(self._chave(t, m) for t, m in zip(novas['ticker'], novas['titulo']))
+
+    @medido('ann.atualizar')
+    def atualizar(self, df_noticias):
+        """
+        Insere as manchetes que ainda não estão no índice
+
+        Quando o índice passa de 4x o tamanho que tinha ao ser construído,
+        ele é reconstruído (as listas ficariam grandes e desequilibradas).
+
+        Retorna:
+        int: Manchetes inseridas
+        """
+        if self.indice.centroides is None or len(self.indice) > 4 * max(self._n_construcao, 1):
+            self.construir(df_noticias)
+            return len(self.indice)
+
+        chaves = [self._chave(t, m) for t, m in zip(df_noticias['ticker'].astype(str),
+                                                    df_noticias['titulo'].astype(str))]
+        novas = np.array([c not in self._chaves for c in chaves], dtype=bool)
+        if not novas.any():
+            return 0
+        df = df_noticias[novas]
+        textos = df['titulo'].astype(str).tolist()
+        embeddings = CacheEmbeddings().obter(textos)[0] if self.fonte == 'embeddings' else None
+        vetores = self.vetorizar(textos, embeddings)
+        validas = ~np.isnan(vetores).any(axis=1)
+        self._inserir(df[validas], vetores[validas])
+        return int(validas.sum())
+
+    def anotar_resultados(self, df_precos):
+        """ Retorno do ativo no dia seguinte a cada notícia (coluna variacao_1d, em %) """
+        if 'data_utc' not in self.noticias.columns:
+            return
+        noticias = self.noticias.assign(data_noticia=pd.to_datetime(self.noticias['data_utc'], utc=True))
+        self.noticias['variacao_1d'] = retornos_evento(
+            noticias, df_precos, janelas={'variacao_1d': '1D'})['variacao_1d']
+
+    # ==================
+    # BUSCA
+    # ==================
+
+    def buscar(self, texto, embedding=None, k=5, ticker=None):
+        """
+        Notícias passadas mais parecidas com uma manchete
+
+        Parâmetros:
+        texto (str): Manchete
+        embedding (ndarray): Embedding da manchete (necessário na fonte 'embeddings')
+        k (int): Quantidade de notícias
+        ticker (str): Só notícias deste ativo
+
+        Retorna:
+        DataFrame: titulo, ticker, data_utc, sentimento, variacao_1d e similaridade
+        """
+        if len(self.indice) == 0:
+            return self.noticias.assign(similaridade=pd.Series(dtype='float32'))
+        vetor = self.vetorizar([texto], None if embedding is None else [embedding])[0]
+        if np.isnan(vetor).any():
+            return self.noticias.iloc[0:0].assign(similaridade=pd.Series(dtype='float32'))
+
+        with span('ann.buscar'):
+            # Com filtro de ativo, busca mais vizinhos e filtra depois
+            ids, similaridades = self.indice.buscar(vetor, k=k * 20 if ticker else k)
+        resultado = self.noticias.iloc[ids].assign(similaridade=similaridades)
+        if ticker:
+            resultado = resultado[resultado['ticker'] == str(ticker).upper()]
+        return resultado.head(k)
+
+    # ==================
+    # DISCO
+    # ==================
+
+    def salvar(self, caminho=ARQUIVO_INDICE):
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        temporario = caminho + '.tmp'
+        with open(temporario, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho)
+
+    def __getstate__(self):
+        estado = self.__dict__.copy()
+        estado['indice'] = self.indice.__dict__.copy()
+        estado['indice'].pop('_lock')
+        return estado
+
+    def __setstate__(self, estado):
+        indice = IndiceIVF()
+        indice.__dict__.update(estado.pop('indice'))
+        estado['indice'] = indice
+        estado.setdefault('_n_construcao', len(indice))  # índices salvos antes do campo
+        self.__dict__.update(estado)
+
+    @staticmethod
+    def carregar(caminho=ARQUIVO_INDICE):
+        if not os.path.exists(caminho):
+            return None
+        with open(caminho, 'rb') as f:
+            return pickle.load(f)
+
+
+_busca = None
+_lock = threading.Lock()
+
+
+def busca_noticias(caminho=ARQUIVO_INDICE):
+    """
+    Índice de notícias compartilhado pelo processo, em dia com os arquivos
+
+    Relê data/noticias_com_sentimento.csv quando ele muda e insere só as
+    manchetes novas; o índice é salvo em disco para o próximo processo.
+
+    Retorna:
+    BuscaNoticias: ou None se ainda não há notícias com sentimento
+    """
+    global _busca
+    if not storage.existe(storage.ARQUIVO_SENTIMENTOS):
+        return None
+
+    with _lock:
+        if _busca is None:
+            _busca = BuscaNoticias.carregar(caminho) or BuscaNoticias()
+
+        versao = storage.modificado_em(storage.ARQUIVO_SENTIMENTOS)
+        mudou = versao != _busca._versao
+        if mudou:
+            _busca.atualizar(storage.sentimentos())
+            _busca._versao = versao
+
+        versao_precos = storage.modificado_em(storage.ARQUIVO_PRECOS)
+        if versao_precos is not None and (mudou or versao_precos != _busca._versao_precos):
+            _busca.anotar_resultados(storage.precos())
+            _busca._versao_precos = versao_precos
+            mudou = True
+
+        if mudou:
+            _busca.salvar(caminho)
+    return _busca
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Busca de notícias parecidas")
+    parser.add_argument('manchete', nargs='?', default="Petrobras anuncia dividendos de R$ 10 bilhões")
+    parser.add_argument('-k', type=int, default=5)
+    args = parser.parse_args()
+
+    busca = busca_noticias()
+    if busca is None:
+        print("❌ data/noticias_com_sentimento.csv não encontrado. Execute primeiro: python main.py sentimento")
+    else:
+        embedding = None
+        if busca.fonte == 'embeddings':
+            from sentiment_analyzer import SentimentAnalyzer
+            embedding = SentimentAnalyzer().embeddings([args.manchete])[0]
+        inicio = time.perf_counter()
+        similares = busca.buscar(args.manchete, embedding, k=args.k)
+        print(f"🔎 {len(busca.indice)} manchetes, busca em {(time.perf_counter() - inicio) * 1000:.1f} ms")
+        print(similares.to_string(index=False))
@@ -0,0 +1,290 @@
+"""
+Benchmarks do pipeline com dados sintéticos (sem acesso à rede)
+
+Uso:
+    python benchmark.py                          # escala 1, salva em data/benchmarks/<commit>.json
+    python benchmark.py --escala 10 --etapas preparar_dados treinar_modelo
+    python benchmark.py --comparar antes.json depois.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+
+# Registro de etapas: nome -> função(contexto) que prepara e devolve o callable medido
+ETAPAS = {}
+
+
+def etapa(nome):
+    """ Decorador que registra uma etapa de benchmark """
+    def registrar(funcao):
+        ETAPAS[nome] = funcao
+        return funcao
+    return registrar
+
+
+class Contexto:
+    """
+    Dados sintéticos compartilhados entre as etapas (gerados sob demanda)
+    """
+
+    def __init__(self, escala=1):
+        self.escala = escala
+        self._cache = {}
+
+    def obter(self, nome, criar):
+        if nome not in self._cache:
+            with contextlib.redirect_stdout(io.StringIO()):
+                self._cache[nome] = criar()
+        return self._cache[nome]
+
+    @property
+    def tickers(self):
+        from synthetic_data import gerar_tickers
+        return self.obter('tickers', lambda: gerar_tickers(20))
+
+    @property
+    def precos(self):
+        from synthetic_data import gerar_precos
+        return self.obter('precos', lambda: gerar_precos(n_tickers=20, n_dias=500))
+
+    @property
+    def noticias(self):
+        from synthetic_data import gerar_noticias
+        return self.obter('noticias', lambda: gerar_noticias(
+            n_noticias=10_000 * self.escala, tickers=self.tickers, dias=700))
+
+    @property
+    def df_treino(self):
+        from price_predictor import PriceImpactPredictor
+        return self.obter('df_treino', lambda: PriceImpactPredictor().preparar_dados(
+            self.noticias, self.precos))
+
+    @property
+    def predictor(self):
+        from price_predictor import PriceImpactPredictor
+
+        def criar():
+            predictor = PriceImpactPredictor()
+            predictor.treinar_modelo(self.df_treino)
+            return predictor
+        return self.obter('predictor', criar)
+
+
+def medir(funcao, repeticoes=5, aquecimento=1):
+    """
+    Mede o tempo de execução de `funcao()`
+
+    Retorna:
+    dict: Estatísticas em segundos (min, mediana, média, desvio)
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(aquecimento):
+            funcao()
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append(time.perf_counter() - inicio)
+
+    return {
+        'min_s': min(tempos),
+        'mediana_s': statistics.median(tempos),
+        'media_s': statistics.fmean(tempos),
+        'desvio_s': statistics.stdev(tempos) if len(tempos) > 1 else 0.0,
+        'repeticoes': repeticoes
+    }
+
+
+# ==================
+# ETAPAS
+# ==================
+
+@etapa('normalizar_datas')
+def _normalizar_datas(ctx):
+    from date_parser import normalizar_datas
+    datas = ctx.noticias['data']
+    return lambda: normalizar_datas(datas), len(datas)
+
+
+@etapa('preparar_dados')
+def _preparar_dados(ctx):
+    from price_predictor import PriceImpactPredictor
+    predictor = PriceImpactPredictor()
+    noticias, precos = ctx.noticias, ctx.precos
+    return lambda: predictor.preparar_dados(noticias, precos), len(noticias)
+
+
+@etapa('retornos_evento')
+def _retornos_evento(ctx):
+    from event_windows import retornos_evento
+    df_treino, precos = ctx.df_treino, ctx.precos
+    return lambda: retornos_evento(df_treino, precos), len(df_treino)
+
+
+@etapa('treinar_modelo')
+def _treinar_modelo(ctx):
+    from price_predictor import PriceImpactPredictor
+    df_treino = ctx.df_treino
+    return lambda: PriceImpactPredictor().treinar_modelo(df_treino), len(df_treino)
+
+
+@etapa('prever_lote')
+def _prever_lote(ctx):
+    predictor, noticias = ctx.predictor, ctx.noticias
+    return lambda: predictor.prever_lote(noticias), len(noticias)
+
+
+@etapa('parsear_html')
+def _parsear_html(ctx):
+    from news_sources import FonteInfoMoney, FonteG1
+    from synthetic_data import gerar_html_infomoney, gerar_html_g1
+
+    n_paginas = 20 * ctx.escala
+    paginas = [(FonteInfoMoney(), gerar_html_infomoney(20, seed=i)) for i in range(n_paginas)]
+    paginas += [(FonteG1(), gerar_html_g1(5, seed=i)) for i in range(n_paginas)]
+
+    def parsear():
+        for fonte, html in paginas:
+            fonte.parsear(html, 'PETR4')
+    return parsear, len(paginas)
+
+
+@etapa('sentimento')
+def _sentimento(ctx):
+    from sentiment_analyzer import SentimentAnalyzer
+    from synthetic_data import criar_modelo_minimo
+
+    titulos = ctx.noticias['titulo'].head(1000 * ctx.escala).tolist()
+    tokenizer, model = criar_modelo_minimo(titulos)
+    analyzer = SentimentAnalyzer(tokenizer=tokenizer, model=model)
+    return lambda: analyzer.analisar_lote(titulos), len(titulos)
+
+
+@etapa('app_rerun')
+def _app_rerun(ctx):
+    import tempfile
+    from streamlit.testing.v1 import AppTest
+
+    # App rodando sobre CSVs sintéticos num diretório temporário
+    pasta = ctx.obter('pasta_app', tempfile.mkdtemp)
+    os.makedirs(os.path.join(pasta, 'data'), exist_ok=True)
+    ctx.noticias.to_csv(os.path.join(pasta, 'data', 'noticias.csv'), index=False)
+    ctx.noticias.to_csv(os.path.join(pasta, 'data', 'noticias_com_sentimento.csv'), index=False)
+    ctx.precos.to_csv(os.path.join(pasta, 'data', 'precos.csv'), index=False)
+
+    app = AppTest.from_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py'),
+                            default_timeout=120)
+    original = os.getcwd()
+
+    def rerun():
+        os.chdir(pasta)
+        try:
+            app.run()
+        finally:
+            os.chdir(original)
+    return rerun, 1
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def executar(etapas=None, escala=1, repeticoes=5):
+    """
+    Executa as etapas de benchmark
+
+    Parâmetros:
+    etapas (list): Nomes das etapas (padrão: todas)
+    escala (int): Multiplicador do volume de dados sintéticos
+    repeticoes (int): Execuções medidas por etapa
+
+    Retorna:
+    dict: Resultado pronto para salvar em JSON
+    """
+    ctx = Contexto(escala)
+    resultados = {}
+
+    for nome in etapas or ETAPAS:
+        print(f"⏱️  {nome}...", end=' ', flush=True)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                funcao, n_itens = ETAPAS[nome](ctx)
+            estatisticas = medir(funcao, repeticoes)
+            estatisticas['itens'] = n_itens
+            estatisticas['itens_por_s'] = n_itens / estatisticas['mediana_s']
+            resultados[nome] = estatisticas
+            print(f"{estatisticas['mediana_s'] * 1000:.1f} ms ({estatisticas['itens_por_s']:,.0f} itens/s)")
+        except ImportError as e:
+            resultados[nome] = {'erro': f"dependência ausente: {e}"}
+            print(f"pulado ({e})")
+
+    return {
+        'commit': _commit_atual(),
+        'data': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'escala': escala,
+        'etapas': resultados
+    }
+
+
+def comparar(arquivo_antes, arquivo_depois, limiar=0.10):
+    """
+    Compara dois resultados salvos e aponta regressões
+
+    Parâmetros:
+    limiar (float): Aumento relativo da mediana considerado regressão (padrão 10%)
+
+    Retorna:
+    list: Nomes das etapas que regrediram
+    """
+    with open(arquivo_antes, encoding='utf-8') as f:
+        antes = json.load(f)['etapas']
+    with open(arquivo_depois, encoding='utf-8') as f:
+        depois = json.load(f)['etapas']
+
+    regressoes = []
+    print(f"{'etapa':<20}{'antes (ms)':>12}{'depois (ms)':>13}{'variação':>10}")
+    for nome in sorted(set(antes) & set(depois)):
+        if 'mediana_s' not in antes[nome] or 'mediana_s' not in depois[nome]:
+            continue
+        a, d = antes[nome]['mediana_s'], depois[nome]['mediana_s']
+        variacao = d / a - 1
+        marca = ' ⚠️' if variacao > limiar else ''
+        if variacao > limiar:
+            regressoes.append(nome)
+        print(f"{nome:<20}{a * 1000:>12.1f}{d * 1000:>13.1f}{variacao * 100:>+9.1f}%{marca}")
+    return regressoes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline com dados sintéticos")
+    parser.add_argument('--escala', type=int, default=1, help="multiplicador do volume de dados")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--etapas', nargs='+', choices=list(ETAPAS), help="etapas a executar (padrão: todas)")
+    parser.add_argument('--saida', help="arquivo JSON de saída (padrão: data/benchmarks/<commit>.json)")
+    parser.add_argument('--comparar', nargs=2, metavar=('ANTES', 'DEPOIS'), help="compara dois resultados")
+    args = parser.parse_args()
+
+    if args.comparar:
+        regressoes = comparar(*args.comparar)
+        raise SystemExit(1 if regressoes else 0)
+
+    resultado = executar(args.etapas, args.escala, args.repeticoes)
+    saida = args.saida or os.path.join('data', 'benchmarks', f"{(resultado['commit'] or 'local')[:7]}.json")
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultado salvo em {saida}")
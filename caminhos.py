@@ -0,0 +1,24 @@
+"""
+Caminhos dos dados e checagem de existência
+
+Só depende de os: o app monta a barra lateral (quais etapas já têm dados)
+sem importar pandas. Leitura e escrita ficam em storage e dataset_writer.
+"""
+import os
+
+
+ARQUIVO_NOTICIAS = 'data/noticias.csv'
+ARQUIVO_SENTIMENTOS = 'data/noticias_com_sentimento.csv'
+ARQUIVO_PRECOS = 'data/precos.csv'
+
+MANIFESTO = 'manifest.json'
+
+
+def pasta_dataset(caminho):
+    """ Pasta do dataset append-only de um CSV lógico (data/precos.csv -> data/precos) """
+    return os.path.splitext(caminho)[0]
+
+
+def existe(caminho):
+    """ True se há dados salvos (manifesto do dataset append-only ou CSV) """
+    return os.path.exists(os.path.join(pasta_dataset(caminho), MANIFESTO)) or os.path.exists(caminho)
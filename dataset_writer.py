@@ -0,0 +1,489 @@
+"""
+Datasets append-only: segmentos parquet + manifesto trocado atomicamente
+
+Cada dataset lógico (data/noticias.csv, data/precos.csv, ...) vira uma pasta
+(data/noticias/) com um segmento parquet por gravação e um manifest.json que
+lista os segmentos válidos. Gravar custa só o tamanho dos dados novos: o
+segmento é escrito ao lado e o manifesto é trocado com os.replace. Leitores
+não usam trava: leem o manifesto e os segmentos que ele lista, então nunca
+veem um arquivo pela metade.
+
+Segmentos pequenos são juntados em segundo plano (compactação). Os arquivos
+substituídos ficam no disco por CARENCIA segundos, para leitores que ainda
+estejam com o manifesto antigo.
+
+    python dataset_writer.py status data/noticias.csv
+    python dataset_writer.py compactar data/precos.csv
+    python dataset_writer.py exportar data/precos.csv    # CSV único (Excel, ferramentas externas)
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+from filelock import FileLock
+
+from caminhos import MANIFESTO, pasta_dataset
+from instrumentation import contar, medido, span
+
+
+# Nome do CSV lógico -> (colunas da chave, qual versão de um registro vale)
+# - 'primeira': linhas com chave já gravada são descartadas na escrita (notícias)
+# - 'ultima': a gravação mais nova vale, coluna a coluna (preços, sentimentos)
+POLITICAS = {
+    'noticias.csv': (['titulo'], 'primeira'),
+    'noticias_com_sentimento.csv': (['titulo'], 'ultima'),
+    'precos.csv': (['ticker', 'data'], 'ultima')
+}
+
+LINHAS_PEQUENO = 50_000  # segmentos menores que isso entram na compactação
+MINIMO_COMPACTAR = 8     # segmentos pequenos seguidos antes de compactar
+CARENCIA = 600           # segundos que um segmento substituído continua no disco
+
+
+def existe(caminho):
+    """ True se o dataset append-only já foi criado (senão vale o CSV) """
+    return os.path.exists(os.path.join(pasta_dataset(caminho), MANIFESTO))
+
+
+def normalizar_chave(df, colunas):
+    """
+    Chave de cada linha para comparar registros
+
+    Textos são comparados sem diferença de caixa e espaços (mesma regra do
+    scraper para títulos repetidos).
+    """
+    partes = []
+    for coluna in colunas:
+        valores = df[coluna]
+        if isinstance(valores.dtype, pd.DatetimeTZDtype):
+            valores = valores.dt.tz_convert('UTC').dt.tz_localize(None)
+        elif valores.dtype == object or isinstance(valores.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            valores = valores.astype(str).str.split().str.join(' ').str.casefold()
+        partes.append(valores.to_numpy())
+    if len(partes) == 1:
+        return pd.Index(partes[0])
+    return pd.MultiIndex.from_arrays(partes)
+
+
+def _mesclar_ultima(df, chave):
+    """
+    Uma linha por chave: a mais nova, com as colunas vazias preenchidas pelas anteriores
+
+    (ex: o primeiro candle de uma busca vem sem variacao_pct e não apaga a já gravada)
+    Cada chave fica na posição da sua última ocorrência, então a ordem das
+    linhas (ex: ticker, data) se mantém.
+    """
+    chaves = normalizar_chave(df, chave)
+    repetidas = chaves.duplicated(keep=False)
+    if not repetidas.any():
+        return df
+    posicoes = np.arange(len(df))
+    codigos = pd.factorize(chaves[repetidas])[0]
+    mescladas = df[repetidas].groupby(codigos, sort=False).last()
+    ultima = pd.Series(posicoes[repetidas]).groupby(codigos).max()
+    mescladas.index = ultima.loc[mescladas.index].to_numpy()
+    unicas = df[~repetidas].set_axis(posicoes[~repetidas])
+    return pd.concat([unicas, mescladas]).sort_index().reset_index(drop=True)
+
+
+class Dataset:
+    """
+    Pasta de segmentos parquet + manifesto
+
+    Manifesto:
+    - segmentos: [{arquivo, linhas, lotes: [primeiro, último]}] na ordem de gravação
+    - lote: contador de gravações (cada acrescentar é um lote)
+    - epoca: muda quando o conteúdo é substituído inteiro (leitores incrementais recomeçam)
+    - chave / manter: política de registros repetidos (ver POLITICAS)
+    - removidos: segmentos substituídos, apagados depois da CARENCIA
+    """
+
+    def __init__(self, caminho, chave=None, manter='ultima'):
+        """
+        Parâmetros:
+        caminho (str): CSV lógico (ex: storage.ARQUIVO_PRECOS); os dados ficam em pasta_dataset(caminho)
+        chave (list): Colunas que identificam um registro (padrão: POLITICAS pelo nome do arquivo)
+        manter (str): 'primeira' ou 'ultima'
+
+        Para datasets já criados, chave e manter vêm do manifesto.
+        """
+        self.caminho = caminho
+        self.pasta = pasta_dataset(caminho)
+        self.arquivo_manifesto = os.path.join(self.pasta, MANIFESTO)
+        padrao = POLITICAS.get(os.path.basename(caminho), (None, 'ultima'))
+        self.chave = chave if chave is not None else padrao[0]
+        self.manter = manter if chave is not None else padrao[1]
+        # Chaves já gravadas (política 'primeira'), lidas só dos lotes novos
+        self._chaves = set()
+        self._chaves_ate = (None, 0)  # (época, último lote lido)
+
+    # ==================
+    # MANIFESTO
+    # ==================
+
+    def _trava(self):
+        os.makedirs(self.pasta, exist_ok=True)
+        return FileLock(os.path.join(self.pasta, '.trava'))
+
+    def manifesto(self):
+        """ Manifesto atual (dict); vazio se o dataset ainda não existe """
+        try:
+            with open(self.arquivo_manifesto, encoding='utf-8') as f:
+                manifesto = json.load(f)
+        except FileNotFoundError:
+            return {'versao': 0, 'epoca': 0, 'lote': 0, 'chave': self.chave, 'manter': self.manter,
+                    'segmentos': [], 'removidos': []}
+        self.chave, self.manter = manifesto['chave'], manifesto['manter']
+        return manifesto
+
+    def _gravar_manifesto(self, manifesto):
+        manifesto['versao'] += 1
+        manifesto['atualizado_em'] = time.time()
+        temporario = f"{self.arquivo_manifesto}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, ensure_ascii=False)
+        os.replace(temporario, self.arquivo_manifesto)
+
+    def _gravar_segmento(self, df):
+        nome = f"seg-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+        temporario = os.path.join(self.pasta, nome + '.tmp')
+        df.to_parquet(temporario, index=False)
+        os.replace(temporario, os.path.join(self.pasta, nome))
+        return nome
+
+    def _precos(self):
+        return os.path.basename(self.caminho).startswith('precos')
+
+    def _tipar(self, df):
+        """ Mesmos tipos do schema em todo segmento (fuso da data, categorias, float32) """
+        from schema import otimizar_noticias, otimizar_precos
+
+        return (otimizar_precos if self._precos() else otimizar_noticias)(df.reset_index(drop=True))
+
+    def _migrar_csv(self, manifesto):
+        """
+        Primeira gravação: o CSV antigo vira o segmento inicial
+
+        Retorna:
+        bool: True se migrou (o CSV é renomeado para .migrado depois que o manifesto for gravado)
+        """
+        if manifesto['segmentos'] or existe(self.caminho) or not os.path.exists(self.caminho):
+            return False
+        from schema import carregar_noticias, carregar_precos
+
+        leitor = carregar_precos if self._precos() else carregar_noticias
+        with span('dataset.migrar', dataset=os.path.basename(self.pasta)):
+            df = leitor(self.caminho)
+            if len(df):
+                manifesto['segmentos'].append({'arquivo': self._gravar_segmento(df), 'linhas': len(df),
+                                               'lotes': [0, 0]})
+        print(f"📦 {self.caminho}: {len(df)} linhas migradas para {self.pasta}/")
+        return True
+
+    def _aposentar_csv(self):
+        os.replace(self.caminho, self.caminho + '.migrado')
+
+    # ==================
+    # ESCRITA
+    # ==================
+
+    def _chaves_gravadas(self, manifesto):
+        """ Chaves já no dataset, lendo só a coluna da chave dos lotes ainda não vistos """
+        epoca, ate = self._chaves_ate
+        if epoca != manifesto['epoca']:
+            self._chaves, ate = set(), -1
+        for segmento in manifesto['segmentos']:
+            if segmento['lotes'][1] > ate:
+                colunas = pd.read_parquet(os.path.join(self.pasta, segmento['arquivo']), columns=self.chave)
+                self._chaves.update(normalizar_chave(colunas, self.chave))
+        self._chaves_ate = (manifesto['epoca'], manifesto['lote'])
+        return self._chaves
+
+    @medido('dataset.acrescentar')
+    def acrescentar(self, df):
+        """
+        Grava as linhas como um segmento novo
+
+        Com a política 'primeira', linhas cuja chave já existe são descartadas.
+
+        Retorna:
+        int: Linhas gravadas
+        """
+        if df is None or len(df) == 0:
+            return 0
+        df = self._tipar(df)
+        with self._trava():
+            manifesto = self.manifesto()
+            migrou = self._migrar_csv(manifesto)
+            if self.chave:
+                chaves = normalizar_chave(df, self.chave)
+                if self.manter == 'primeira':
+                    novas = ~chaves.duplicated() & ~chaves.isin(self._chaves_gravadas(manifesto))
+                    df, chaves = df[novas], chaves[novas]
+                else:
+                    df = _mesclar_ultima(df, self.chave)
+            if len(df) == 0:
+                if migrou:
+                    self._gravar_manifesto(manifesto)
+                    self._aposentar_csv()
+                return 0
+
+            manifesto['lote'] += 1
+            manifesto['segmentos'].append({'arquivo': self._gravar_segmento(df), 'linhas': len(df),
+                                           'lotes': [manifesto['lote'], manifesto['lote']]})
+            self._gravar_manifesto(manifesto)
+            if migrou:
+                self._aposentar_csv()
+            if self.chave and self.manter == 'primeira' and self._chaves_ate[1] == manifesto['lote'] - 1:
+                self._chaves.update(chaves)
+                self._chaves_ate = (manifesto['epoca'], manifesto['lote'])
+
+        contar('dataset.linhas', len(df), dataset=os.path.basename(self.pasta))
+        if self.precisa_compactar(manifesto):
+            compactar_em_segundo_plano(self)
+        return len(df)
+
+    @medido('dataset.substituir')
+    def substituir(self, df):
+        """ Troca todo o conteúdo (ex: reprocessar tudo com outro modelo) """
+        df = self._tipar(df)
+        with self._trava():
+            manifesto = self.manifesto()
+            antigos = manifesto['segmentos']
+            manifesto['lote'] += 1
+            manifesto['epoca'] += 1
+            manifesto['segmentos'] = [{'arquivo': self._gravar_segmento(df),
+                                       'linhas': len(df), 'lotes': [manifesto['lote'], manifesto['lote']]}]
+            manifesto['removidos'] += [{'arquivo': s['arquivo'], 'em': time.time()} for s in antigos]
+            self._gravar_manifesto(manifesto)
+            if os.path.exists(self.caminho):
+                self._aposentar_csv()
+        return len(df)
+
+    # ==================
+    # LEITURA
+    # ==================
+
+    def ler(self, colunas=None):
+        """
+        Conteúdo atual (sem trava: usa o manifesto do momento)
+
+        Registros repetidos da política 'ultima' são resolvidos aqui; a
+        compactação faz o mesmo no disco.
+        """
+        for tentativa in range(3):
+            manifesto = self.manifesto()
+            try:
+                partes = [pd.read_parquet(os.path.join(self.pasta, s['arquivo']), columns=colunas)
+                          for s in manifesto['segmentos']]
+                break
+            except FileNotFoundError:
+                # Segmento apagado depois de uma compactação: relê o manifesto novo
+                if tentativa == 2:
+                    raise
+        if not partes:
+            return pd.DataFrame(columns=colunas)
+        df = pd.concat(partes, ignore_index=True) if len(partes) > 1 else partes[0]
+        if len(partes) > 1 and self.chave and self.manter == 'ultima' and (
+                colunas is None or set(self.chave) <= set(colunas)):
+            df = _mesclar_ultima(df, self.chave)
+        return df
+
+    def segmentos_novos(self, epoca, ate_lote):
+        """
+        Segmentos gravados depois do lote `ate_lote` (para leitura incremental)
+
+        Retorna:
+        tuple: (manifesto, caminhos) - caminhos é None se a época mudou ou se uma
+            compactação juntou lotes já lidos com lotes novos (reler tudo)
+        """
+        manifesto = self.manifesto()
+        if manifesto['epoca'] != epoca or any(s['lotes'][0] <= ate_lote < s['lotes'][1]
+                                              for s in manifesto['segmentos']):
+            return manifesto, None
+        return manifesto, [os.path.join(self.pasta, s['arquivo']) for s in manifesto['segmentos']
+                           if s['lotes'][0] > ate_lote]
+
+    # ==================
+    # COMPACTAÇÃO
+    # ==================
+
+    @staticmethod
+    def _sequencia_pequena(segmentos):
+        """ Maior sequência de segmentos pequenos consecutivos: (início, fim) """
+        melhor, inicio = (0, 0), None
+        for i, segmento in enumerate(segmentos + [None]):
+            if segmento is not None and segmento['linhas'] < LINHAS_PEQUENO:
+                inicio = i if inicio is None else inicio
+            elif inicio is not None:
+                if i - inicio > melhor[1] - melhor[0]:
+                    melhor = (inicio, i)
+                inicio = None
+        return melhor
+
+    def precisa_compactar(self, manifesto=None):
+        inicio, fim = self._sequencia_pequena((manifesto or self.manifesto())['segmentos'])
+        return fim - inicio >= MINIMO_COMPACTAR
+
+    @medido('dataset.compactar')
+    def compactar(self, tudo=False):
+        """
+        Junta segmentos consecutivos num só (sem bloquear leitores nem escritores)
+
+        Parâmetros:
+        tudo (bool): Junta todos os segmentos, não só a maior sequência de pequenos
+
+        Retorna:
+        int: Segmentos juntados (0 se não havia o que fazer)
+        """
+        manifesto = self.manifesto()
+        segmentos = manifesto['segmentos']
+        inicio, fim = (0, len(segmentos)) if tudo else self._sequencia_pequena(segmentos)
+        if fim - inicio < 2:
+            self.limpar()
+            return 0
+        escolhidos = segmentos[inicio:fim]
+
+        # Trabalho pesado fora da trava: escritores continuam acrescentando
+        partes = [pd.read_parquet(os.path.join(self.pasta, s['arquivo'])) for s in escolhidos]
+        df = pd.concat(partes, ignore_index=True)
+        if self.chave and self.manter == 'ultima':
+            df = _mesclar_ultima(df, self.chave)
+        nome = self._gravar_segmento(df)
+
+        with self._trava():
+            atual = self.manifesto()
+            nomes = [s['arquivo'] for s in atual['segmentos']]
+            escolhidos_nomes = [s['arquivo'] for s in escolhidos]
+            if atual['epoca'] != manifesto['epoca'] or escolhidos_nomes[0] not in nomes:
+                os.remove(os.path.join(self.pasta, nome))  # outro processo compactou/substituiu antes
+                return 0
+            posicao = nomes.index(escolhidos_nomes[0])
+            if nomes[posicao:posicao + len(escolhidos)] != escolhidos_nomes:
+                os.remove(os.path.join(self.pasta, nome))
+                return 0
+            novo = {'arquivo': nome, 'linhas': len(df),
+                    'lotes': [escolhidos[0]['lotes'][0], escolhidos[-1]['lotes'][1]]}
+            atual['segmentos'][posicao:posicao + len(escolhidos)] = [novo]
+            atual['removidos'] += [{'arquivo': s, 'em': time.time()} for s in escolhidos_nomes]
+            self._gravar_manifesto(atual)
+
+        contar('dataset.compactacoes', dataset=os.path.basename(self.pasta))
+        self.limpar()
+        return len(escolhidos)
+
+    def limpar(self, carencia=CARENCIA):
+        """ Apaga segmentos substituídos há mais de `carencia` segundos e temporários órfãos """
+        agora = time.time()
+        with self._trava():
+            manifesto = self.manifesto()
+            vencidos = [r for r in manifesto['removidos'] if agora - r['em'] >= carencia]
+            if vencidos:
+                for removido in vencidos:
+                    try:
+                        os.remove(os.path.join(self.pasta, removido['arquivo']))
+                    except FileNotFoundError:
+                        pass
+                manifesto['removidos'] = [r for r in manifesto['removidos'] if agora - r['em'] < carencia]
+                self._gravar_manifesto(manifesto)
+            for nome in os.listdir(self.pasta):
+                caminho = os.path.join(self.pasta, nome)
+                if nome.endswith('.tmp') and agora - os.path.getmtime(caminho) >= carencia:
+                    os.remove(caminho)
+
+    def exportar_csv(self, destino=None):
+        """ Grava o conteúdo atual num CSV único (atomicamente) """
+        destino = destino or self.caminho
+        temporario = destino + '.tmp'
+        self.ler().to_csv(temporario, index=False, encoding='utf-8-sig')
+        os.replace(temporario, destino)
+        return destino
+
+
+def dataset(caminho):
+    """ Dataset append-only do CSV lógico, com a política padrão do arquivo """
+    return Dataset(caminho)
+
+
+def versao(caminho):
+    """
+    Identificador da versão atual dos dados (muda a cada gravação)
+
+    Usa o manifesto quando o dataset existe e o próprio CSV caso contrário;
+    levanta FileNotFoundError se nenhum dos dois existir.
+    """
+    alvo = os.path.join(pasta_dataset(caminho), MANIFESTO) if existe(caminho) else caminho
+    info = os.stat(alvo)
+    return (info.st_mtime_ns, info.st_size)
+
+
+def ler(caminho, dtype=None):
+    """ DataFrame do dataset, ou do CSV quando o dataset ainda não existe """
+    if existe(caminho):
+        return Dataset(caminho).ler()
+    return pd.read_csv(caminho, dtype=dtype)
+
+
+# ==================
+# COMPACTAÇÃO EM SEGUNDO PLANO
+# ==================
+
+_pendentes = {}
+_lock = threading.Lock()
+_evento = threading.Event()
+_thread = None
+
+
+def _compactador():
+    while True:
+        _evento.wait()
+        with _lock:
+            _evento.clear()
+            pendentes = list(_pendentes.values())
+            _pendentes.clear()
+        for atual in pendentes:
+            try:
+                while atual.compactar():
+                    pass
+            except Exception as e:
+                print(f"⚠️ Compactação de {atual.pasta} falhou: {e}")
+
+
+def compactar_em_segundo_plano(alvo):
+    """ Agenda a compactação do dataset numa thread própria (uma por processo) """
+    global _thread
+    with _lock:
+        _pendentes[alvo.pasta] = Dataset(alvo.caminho)
+        if _thread is None:
+            _thread = threading.Thread(target=_compactador, name='compactador', daemon=True)
+            _thread.start()
+    _evento.set()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Datasets append-only (segmentos + manifesto)")
+    parser.add_argument('comando', choices=['status', 'compactar', 'exportar'])
+    parser.add_argument('caminhos', nargs='*', default=['data/noticias.csv', 'data/noticias_com_sentimento.csv',
+                                                         'data/precos.csv'])
+    args = parser.parse_args()
+
+    for caminho in args.caminhos:
+        if not existe(caminho):
+            print(f"📄 {caminho}: ainda em CSV (vira dataset na próxima gravação)")
+            continue
+        atual = Dataset(caminho)
+        if args.comando == 'compactar':
+            print(f"🗜️ {caminho}: {atual.compactar(tudo=True)} segmentos juntados")
+            atual.limpar(carencia=0)
+        elif args.comando == 'exportar':
+            print(f"💾 {caminho}: exportado para {atual.exportar_csv(caminho + '.exportado.csv')}")
+        manifesto = atual.manifesto()
+        linhas = sum(s['linhas'] for s in manifesto['segmentos'])
+        print(f"📦 {caminho}: {len(manifesto['segmentos'])} segmentos, {linhas} linhas gravadas, "
+              f"{manifesto['lote']} lotes, chave {manifesto['chave']} ({manifesto['manter']})")
@@ -0,0 +1,190 @@
+import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+from instrumentation import medido
+
+
+# Fuso da B3 / dos portais: datas sem fuso são interpretadas nele
+FUSO_PADRAO = 'America/Sao_Paulo'
+
+MESES = {
+    'jan': 1, 'fev': 2, 'mar': 3, 'abr': 4, 'mai': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'set': 9, 'out': 10, 'nov': 11, 'dez': 12
+}
+
+# Duração de cada unidade das datas relativas, pela inicial
+# (mês e ano são aproximados; os portais só usam essas unidades para notícias antigas)
+DURACOES = {
+    'mi': pd.Timedelta(minutes=1),
+    'h': pd.Timedelta(hours=1),
+    'd': pd.Timedelta(days=1),
+    's': pd.Timedelta(weeks=1),
+    'm': pd.Timedelta(days=30),
+    'a': pd.Timedelta(days=365)
+}
+
+# Horário opcional no fim: "14:35", "14h35", "às 14h", "- 14h35"
+_HORA = r'(?:(?:\s+|\s*[-,]\s*)(?:[àa]s\s+)?(?P<hora>\d{1,2})(?:[:h](?P<minuto>\d{2})?)?)?'
+
+PADROES = {
+    # "há 2 horas", "há 1 mês", "2 dias atrás", "há 5 min"
+    'relativo': (r'^(?:h[áa]\s+)?(?P<n>\d+)\s*(?P<unidade>min|minutos?|h|horas?|dias?|semanas?|m[êe]s|meses|anos?)'
+                 r'(?:\s+atr[áa]s)?$'),
+    # "hoje", "ontem às 10h30", "anteontem"
+    'dia': r'^(?P<dia>hoje|ontem|anteontem)' + _HORA + r'$',
+    # "07/01/2026", "7/1/26 14:35", "07.01.2026 às 14h35"
+    'numerica': r'^(?P<d>\d{1,2})[/.-](?P<m>\d{1,2})[/.-](?P<a>\d{4}|\d{2})' + _HORA + r'$',
+    # "7 jan 2026", "7 de janeiro de 2026 às 10h"
+    'extenso': (r'^(?P<d>\d{1,2})\s+(?:de\s+)?(?P<mes>jan|fev|mar|abr|mai|jun|jul|ago|set|out|nov|dez)[a-zç]*\.?'
+                r'\s+(?:de\s+)?(?P<a>\d{4})' + _HORA + r'$'),
+}
+
+DIAS_ATRAS = {'hoje': 0, 'ontem': 1, 'anteontem': 2}
+
+
+@lru_cache(maxsize=None)
+def padrao(nome):
+    """ Versão compilada (e cacheada) de um dos PADROES """
+    return re.compile(PADROES[nome], re.IGNORECASE)
+
+
+def _para_int(serie, padrao_valor=0):
+    return pd.to_numeric(serie, errors='coerce').fillna(padrao_valor).astype('int64')
+
+
+def _hora_do_dia(partes):
+    return (pd.to_timedelta(_para_int(partes['hora']), unit='h')
+            + pd.to_timedelta(_para_int(partes['minuto']), unit='m'))
+
+
+def _parsear_unicos(textos, fuso):
+    """
+    Interpreta cada texto distinto uma única vez
+
+    Retorna três séries alinhadas com `textos`:
+    - absoluto: instante em UTC (datas completas e ISO)
+    - atraso: Timedelta a subtrair da referência (datas relativas)
+    - dias_atras / hora: dia relativo à referência + horário local (hoje/ontem)
+    """
+    absoluto = pd.Series(pd.NaT, index=textos.index, dtype='datetime64[ns, UTC]')
+    atraso = pd.Series(pd.NaT, index=textos.index, dtype='timedelta64[ns]')
+    dias_atras = pd.Series(np.nan, index=textos.index)
+    hora = pd.Series(pd.NaT, index=textos.index, dtype='timedelta64[ns]')
+    pendentes = pd.Series(True, index=textos.index)
+
+    # Relativo: "há 2 horas"
+    partes = textos.str.extract(padrao('relativo')).dropna(subset=['n'])
+    if len(partes):
+        inicial = (partes['unidade'].str.lower().str.replace('ê', 'e')
+                   .str.extract(r'^(mi|h|d|s|m|a)', expand=False))
+        atraso.loc[partes.index] = _para_int(partes['n']) * inicial.map(DURACOES)
+        pendentes.loc[partes.index] = False
+
+    # Dia relativo: "ontem às 10h"
+    partes = textos[pendentes].str.extract(padrao('dia')).dropna(subset=['dia'])
+    if len(partes):
+        dias_atras.loc[partes.index] = partes['dia'].str.lower().map(DIAS_ATRAS)
+        hora.loc[partes.index] = _hora_do_dia(partes)
+        pendentes.loc[partes.index] = False
+
+    # Absolutos: "07/01/2026" e "7 de janeiro de 2026"
+    for nome in ('numerica', 'extenso'):
+        partes = textos[pendentes].str.extract(padrao(nome)).dropna(subset=['d'])
+        if not len(partes):
+            continue
+        mes = (_para_int(partes['m']) if nome == 'numerica'
+               else partes['mes'].str.lower().map(MESES))
+        ano = _para_int(partes['a'])
+        ano = ano.where(ano >= 100, ano + 2000)
+        locais = pd.to_datetime(
+            pd.DataFrame({'year': ano, 'month': mes, 'day': _para_int(partes['d'])}),
+            errors='coerce'
+        ) + _hora_do_dia(partes)
+        absoluto.loc[partes.index] = (locais.dt.tz_localize(fuso, ambiguous='NaT', nonexistent='shift_forward')
+                                      .dt.tz_convert('UTC'))
+        pendentes.loc[partes.index] = False
+
+    # ISO 8601 (ex: RSS normalizado, timestamps do yfinance)
+    if pendentes.any():
+        resto = textos[pendentes]
+        iso = pd.to_datetime(resto, format='ISO8601', errors='coerce', utc=True)
+        # Datas ISO sem fuso foram lidas como UTC; reinterpreta no fuso local
+        sem_fuso = ~resto.str.contains(r'(?:[zZ]|[+-]\d{2}:?\d{2})$', regex=True) & iso.notna()
+        if sem_fuso.any():
+            iso.loc[sem_fuso] = (iso[sem_fuso].dt.tz_localize(None)
+                                 .dt.tz_localize(fuso, ambiguous='NaT', nonexistent='shift_forward')
+                                 .dt.tz_convert('UTC'))
+        absoluto.loc[resto.index] = iso
+
+    return absoluto, atraso, dias_atras, hora
+
+
+@medido('datas.normalizar')
+def normalizar_datas(datas, referencia=None, fuso=FUSO_PADRAO):
+    """
+    Converte datas livres das notícias em timestamps UTC
+
+    Entende os formatos em português dos portais ("há 2 horas", "ontem às 10h",
+    "07/01/2026", "7 de janeiro de 2026") e ISO 8601. Textos que não são datas
+    (ex: "Data antiga") viram NaT. O trabalho é feito uma vez por texto
+    distinto, com regex compiladas e operações vetorizadas do pandas.
+
+    Parâmetros:
+    datas (Series): Datas como texto (ou já datetime)
+    referencia (Timestamp ou Series): Momento da coleta, base das datas
+        relativas (padrão: agora). Pode ser uma série alinhada com `datas`.
+    fuso (str): Fuso das datas sem fuso explícito
+
+    Retorna:
+    Series: datetime64[ns, UTC], alinhada com `datas`
+    """
+    datas = pd.Series(datas)
+    if pd.api.types.is_datetime64_any_dtype(datas):
+        if datas.dt.tz is None:
+            datas = datas.dt.tz_localize(fuso, ambiguous='NaT', nonexistent='shift_forward')
+        return datas.dt.tz_convert('UTC')
+
+    if referencia is None:
+        referencia = pd.Timestamp.now(tz='UTC')
+    if isinstance(referencia, pd.Series):
+        referencia = pd.to_datetime(referencia, utc=True, errors='coerce')
+        referencia.index = datas.index
+    else:
+        referencia = pd.Timestamp(referencia)
+        referencia = referencia.tz_localize(fuso) if referencia.tz is None else referencia
+        referencia = pd.Series(referencia.tz_convert('UTC'), index=datas.index)
+
+    # Trabalha só com os textos distintos e depois expande de volta
+    codigos, unicos = pd.factorize(datas.astype('string').str.strip())
+    if not len(unicos):
+        return pd.Series(pd.NaT, index=datas.index, dtype='datetime64[ns, UTC]')
+    textos = pd.Series(unicos, dtype='string')
+    absoluto, atraso, dias_atras, hora = _parsear_unicos(textos, fuso)
+
+    def expandir(serie):
+        valores = serie.to_numpy()
+        resultado = valores[np.where(codigos >= 0, codigos, 0)]
+        return pd.Series(resultado, index=datas.index).where(codigos >= 0)
+
+    absoluto = pd.to_datetime(expandir(absoluto), utc=True)
+    atraso = pd.to_timedelta(expandir(atraso))
+    dias_atras = expandir(dias_atras)
+    hora = pd.to_timedelta(expandir(hora))
+
+    resultado = absoluto.copy()
+
+    relativos = atraso.notna()
+    resultado.loc[relativos] = referencia[relativos] - atraso[relativos]
+
+    do_dia = dias_atras.notna()
+    if do_dia.any():
+        meia_noite = referencia[do_dia].dt.tz_convert(fuso).dt.normalize()
+        locais = (meia_noite.dt.tz_localize(None)
+                  - pd.to_timedelta(dias_atras[do_dia], unit='D')
+                  + hora[do_dia])
+        resultado.loc[do_dia] = (locais.dt.tz_localize(fuso, ambiguous='NaT', nonexistent='shift_forward')
+                                 .dt.tz_convert('UTC'))
+
+    return resultado
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+
+def lttb(x, y, n_pontos):
+    """
+    Largest-Triangle-Three-Buckets: escolhe os pontos que preservam a forma da série
+
+    Divide a série em n_pontos - 2 faixas e, em cada uma, mantém o ponto que
+    forma o maior triângulo com o ponto escolhido na faixa anterior e a média
+    da faixa seguinte. Primeiro e último pontos são sempre mantidos.
+
+    Parâmetros:
+    x (array): Eixo x numérico e crescente (datas como int64)
+    y (array): Valores
+    n_pontos (int): Quantidade de pontos na saída
+
+    Retorna:
+    ndarray: Índices (posições) dos pontos escolhidos, em ordem crescente
+    """
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    n = len(x)
+    if n_pontos >= n or n_pontos < 3:
+        return np.arange(n)
+
+    # Limites das faixas (a primeira e a última contêm só as pontas)
+    limites = np.linspace(1, n - 1, n_pontos - 1).astype(np.int64)
+    escolhidos = np.empty(n_pontos, dtype=np.int64)
+    escolhidos[0], escolhidos[-1] = 0, n - 1
+
+    # Médias de cada faixa de uma vez (usadas como terceiro vértice)
+    medias_x = np.add.reduceat(x[1:n - 1], limites[:-1] - 1) / np.diff(limites)
+    medias_y = np.add.reduceat(y[1:n - 1], limites[:-1] - 1) / np.diff(limites)
+    medias_x = np.append(medias_x[1:], x[-1])
+    medias_y = np.append(medias_y[1:], y[-1])
+
+    anterior = 0
+    for i in range(n_pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        ax, ay = x[anterior], y[anterior]
+        # Dobro da área do triângulo (anterior, candidato, média da próxima faixa)
+        areas = np.abs((ax - medias_x[i]) * (y[inicio:fim] - ay)
+                       - (ax - x[inicio:fim]) * (medias_y[i] - ay))
+        anterior = inicio + int(np.argmax(areas))
+        escolhidos[i + 1] = anterior
+    return escolhidos
+
+
+def reduzir_serie(df, x='data', y='fechamento', n_pontos=1000, grupo='ticker'):
+    """
+    Reduz um DataFrame de séries temporais para no máximo n_pontos por grupo (LTTB)
+
+    Parâmetros:
+    df (DataFrame): Séries, ordenáveis por x
+    x, y (str): Colunas do eixo x (data) e do valor
+    n_pontos (int): Máximo de pontos por série
+    grupo (str): Coluna que separa as séries (None = série única)
+
+    Retorna:
+    DataFrame: Linhas escolhidas, ordenadas por grupo e x
+    """
+    df = df.dropna(subset=[y]).sort_values([grupo, x] if grupo else [x])
+    if len(df) <= n_pontos:
+        return df
+
+    eixo = df[x]
+    if pd.api.types.is_datetime64_any_dtype(eixo):
+        eixo = eixo.astype('int64')
+    eixo, valores = eixo.to_numpy(), df[y].to_numpy()
+
+    if grupo:
+        grupos = df.groupby(grupo, observed=True, sort=False).indices.values()
+    else:
+        grupos = [np.arange(len(df))]
+
+    posicoes = [idx[lttb(eixo[idx], valores[idx], n_pontos)] for idx in grupos]
+    return df.iloc[np.sort(np.concatenate(posicoes))] if posicoes else df
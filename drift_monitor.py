@@ -0,0 +1,463 @@
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+from filelock import FileLock
+
+from instrumentation import contar
+
+
+ARQUIVO_ESTADO = 'data/drift/monitor.pkl'
+
+# Variável numérica -> (mínimo, máximo) dos bins do histograma
+# (valores fora do intervalo caem nos bins das pontas)
+VARIAVEIS = {
+    'score_positivo': (0.0, 1.0),
+    'score_negativo': (0.0, 1.0),
+    'score_neutro': (0.0, 1.0),
+    'confianca': (0.0, 100.0),
+    'variacao_prevista': (-10.0, 10.0),
+    'entrada.confianca': (0.0, 100.0),
+    'entrada.score_positivo': (0.0, 1.0),
+    'entrada.score_negativo': (0.0, 1.0),
+    'entrada.score_neutro': (0.0, 1.0)
+}
+
+# Variável categórica -> categorias esperadas
+CATEGORICAS = {
+    'sentimento': ('positivo', 'neutro', 'negativo')
+}
+
+# Rótulos em inglês (arquivos gerados por versões antigas do analisador)
+SINONIMOS = {'positive': 'positivo', 'neutral': 'neutro', 'negative': 'negativo'}
+
+# Limites dos alertas
+PSI_AVISO = 0.1
+PSI_ERRO = 0.25
+KS_ALFA = 1.628          # c(α) do teste KS para α = 1%
+DOMINANCIA_MAXIMA = 0.98  # fração máxima de uma única categoria
+DESVIO_MINIMO = 1e-4      # abaixo disso a saída é considerada constante
+NULOS_MAXIMO = 0.05
+MINIMO_DEGENERADO = 5     # observações recentes para checar saídas degeneradas
+MINIMO_AMOSTRAS = 50      # observações recentes para PSI/KS/nulos
+
+
+def _anexar(esboco, valores):
+    """ Escreve valores no buffer circular das últimas observações do esboço """
+    valores = valores[-esboco.janela:]
+    esboco.ultimos[(esboco.posicao + np.arange(len(valores))) % esboco.janela] = valores
+    esboco.posicao = (esboco.posicao + len(valores)) % esboco.janela
+
+
+def _em_ordem(esboco):
+    """ Últimas observações do buffer circular, da mais antiga para a mais nova """
+    if esboco.total < esboco.janela:
+        return esboco.ultimos[:esboco.total]
+    return np.roll(esboco.ultimos, -esboco.posicao)
+
+
+class Reservatorio:
+    """
+    Amostra uniforme de tamanho fixo de tudo o que já foi observado (algoritmo R)
+    """
+
+    def __init__(self, tamanho=2000, seed=42):
+        self.tamanho = tamanho
+        self.valores = np.empty(tamanho, dtype=np.float32)
+        self.vistos = 0
+        self._rng = np.random.default_rng(seed)
+
+    def observar(self, valores):
+        valores = np.asarray(valores, dtype=np.float32)
+        # Primeiros valores preenchem o reservatório
+        livres = max(min(self.tamanho - self.vistos, len(valores)), 0)
+        self.valores[self.vistos:self.vistos + livres] = valores[:livres]
+        resto = valores[livres:]
+        if len(resto):
+            # O i-ésimo valor visto entra com probabilidade tamanho / i
+            posicoes = self._rng.integers(0, self.vistos + livres + np.arange(1, len(resto) + 1))
+            entra = posicoes < self.tamanho
+            self.valores[posicoes[entra]] = resto[entra]
+        self.vistos += len(valores)
+
+    def amostra(self):
+        return self.valores[:min(self.vistos, self.tamanho)]
+
+    def mesclar(self, outro):
+        """ Junta a amostra de outro reservatório (de observações disjuntas) """
+        total = self.vistos + outro.vistos
+        if outro.vistos == 0:
+            return
+        m = min(self.tamanho, total)
+        # Quantos dos m sorteados vêm de `outro`, como se fosse uma amostra só
+        k = self._rng.hypergeometric(outro.vistos, self.vistos, m)
+        valores = np.concatenate([self._rng.choice(self.amostra(), m - k, replace=False),
+                                  self._rng.choice(outro.amostra(), k, replace=False)])
+        self.valores[:m] = valores
+        self.vistos = total
+
+
+class EsbocoNumerico:
+    """
+    Distribuição de uma variável numérica em memória constante
+
+    - Referência (todo o histórico): histograma cumulativo + reservatório
+    - Recente: histograma com decaimento exponencial (meia-vida de `janela`
+      observações) + as últimas `janela` observações num buffer circular
+    """
+
+    def __init__(self, minimo, maximo, n_bins=20, janela=2000):
+        self.limites = np.linspace(minimo, maximo, n_bins + 1)[1:-1]
+        self.janela = janela
+        self.referencia = np.zeros(n_bins)
+        self.recente = np.zeros(n_bins)
+        self.reservatorio = Reservatorio(janela)
+        self.ultimos = np.empty(janela, dtype=np.float32)
+        self.posicao = 0
+        self.total = 0
+        self.vistos = 0  # inclusive nulos
+        self.nulos_recentes = 0.0
+        self._decaimento = 0.5 ** (1 / janela)
+
+    def observar(self, valores):
+        valores = np.asarray(valores, dtype=np.float64).ravel()
+        nulos = np.isnan(valores)
+        fator = self._decaimento ** len(valores)
+        self.vistos = getattr(self, 'vistos', self.total) + len(valores)
+        self.nulos_recentes = self.nulos_recentes * fator + nulos.sum()
+        valores = valores[~nulos]
+
+        contagens = np.bincount(np.searchsorted(self.limites, valores, side='right'),
+                                minlength=len(self.referencia))
+        self.referencia += contagens
+        self.recente = self.recente * fator + contagens
+        self.reservatorio.observar(valores)
+        self.total += len(valores)
+        _anexar(self, valores)
+
+    def mesclar(self, outro):
+        """ Acrescenta as observações de outro esboço, como se viessem depois destas """
+        fator = self._decaimento ** outro.vistos
+        self.nulos_recentes = self.nulos_recentes * fator + outro.nulos_recentes
+        self.referencia += outro.referencia
+        self.recente = self.recente * fator + outro.recente
+        self.reservatorio.mesclar(outro.reservatorio)
+        _anexar(self, _em_ordem(outro))
+        self.total += outro.total
+        self.vistos = getattr(self, 'vistos', self.total) + outro.vistos
+
+    def recentes(self):
+        return self.ultimos[:min(self.total, self.janela)]
+
+    def psi(self):
+        """ Population Stability Index entre o histórico e a janela recente """
+        if self.referencia.sum() == 0 or self.recente.sum() == 0:
+            return 0.0
+        esperado = (self.referencia + 0.5) / (self.referencia.sum() + 0.5 * len(self.referencia))
+        atual = (self.recente + 0.5) / (self.recente.sum() + 0.5 * len(self.recente))
+        return float(np.sum((atual - esperado) * np.log(atual / esperado)))
+
+    def ks(self):
+        """
+        Estatística KS entre a amostra do histórico e as observações recentes
+
+        Retorna:
+        tuple: (estatística D, valor crítico para α = 1%)
+        """
+        a, b = np.sort(self.reservatorio.amostra()), np.sort(self.recentes())
+        if len(a) == 0 or len(b) == 0:
+            return 0.0, 1.0
+        pontos = np.concatenate([a, b])
+        d = np.max(np.abs(np.searchsorted(a, pontos, side='right') / len(a)
+                          - np.searchsorted(b, pontos, side='right') / len(b)))
+        return float(d), KS_ALFA * np.sqrt((len(a) + len(b)) / (len(a) * len(b)))
+
+
+class EsbocoCategorico:
+    """
+    Frequência de cada categoria: total, com decaimento exponencial e nas
+    últimas `janela` observações (buffer circular de códigos)
+    """
+
+    def __init__(self, categorias, janela=2000):
+        self.categorias = list(categorias)
+        self.janela = janela
+        self.referencia = np.zeros(len(self.categorias) + 1)  # último = outras
+        self.recente = np.zeros(len(self.categorias) + 1)
+        self.ultimos = np.empty(janela, dtype=np.int8)
+        self.posicao = 0
+        self.total = 0
+        self._decaimento = 0.5 ** (1 / janela)
+
+    def observar(self, valores):
+        valores = list(valores)
+        codigos = [self.categorias.index(v) if v in self.categorias else len(self.categorias)
+                   for v in valores]
+        codigos = np.asarray(codigos, dtype=np.int64)
+        contagens = np.bincount(codigos, minlength=len(self.referencia))
+        self.referencia += contagens
+        self.recente = self.recente * self._decaimento ** len(valores) + contagens
+        _anexar(self, codigos)
+        self.total += len(valores)
+
+    def mesclar(self, outro):
+        """ Acrescenta as observações de outro esboço, como se viessem depois destas """
+        self.referencia += outro.referencia
+        self.recente = self.recente * self._decaimento ** outro.total + outro.recente
+        _anexar(self, _em_ordem(outro))
+        self.total += outro.total
+
+    def psi(self):
+        esperado = (self.referencia + 0.5) / (self.referencia.sum() + 0.5 * len(self.referencia))
+        atual = (self.recente + 0.5) / (self.recente.sum() + 0.5 * len(self.recente))
+        return float(np.sum((atual - esperado) * np.log(atual / esperado)))
+
+    def proporcoes(self):
+        """ Fração de cada categoria nas últimas `janela` observações """
+        ultimos = self.ultimos[:min(self.total, self.janela)]
+        contagens = np.bincount(ultimos.astype(np.int64), minlength=len(self.referencia))
+        nomes = self.categorias + ['outras']
+        return {nome: float(c / len(ultimos)) if len(ultimos) else 0.0 for nome, c in zip(nomes, contagens)}
+
+
+class MonitorDrift:
+    """
+    Monitor contínuo das saídas de sentimento, das features e das previsões
+
+    Cada lote observado atualiza esboços de tamanho fixo; os alertas comparam
+    a janela recente com o histórico (PSI e KS) e procuram saídas degeneradas
+    (uma única classe, valores constantes, muitos nulos).
+
+    Vários processos podem observar ao mesmo tempo: cada um guarda à parte o
+    que observou desde o último salvamento e, ao salvar, soma isso ao estado
+    em disco sob uma trava entre processos.
+
+    Uso:
+        monitor().observar_sentimentos(df_resultado)
+        for alerta in monitor().alertas():
+            print(alerta['mensagem'])
+    """
+
+    def __init__(self, janela=2000, arquivo=ARQUIVO_ESTADO):
+        self.janela = janela
+        self.arquivo = arquivo
+        self.esbocos = {}
+        self._novos = {}  # Observações deste processo ainda não gravadas
+        self.atualizado_em = None
+        self._versao = None
+        self._ultimo_salvo = 0.0
+        self._lock = threading.Lock()
+
+    def _esboco(self, nome, esbocos=None):
+        esbocos = self.esbocos if esbocos is None else esbocos
+        if nome not in esbocos:
+            if nome in CATEGORICAS:
+                esbocos[nome] = EsbocoCategorico(CATEGORICAS[nome], self.janela)
+            else:
+                esbocos[nome] = EsbocoNumerico(*VARIAVEIS.get(nome, (0.0, 1.0)), janela=self.janela)
+        return esbocos[nome]
+
+    # ==================
+    # OBSERVAÇÃO
+    # ==================
+
+    def observar(self, nome, valores):
+        """ Registra um lote de valores de uma variável """
+        valores = list(valores) if not isinstance(valores, np.ndarray) else valores
+        with self._lock:
+            self._esboco(nome).observar(valores)
+            self._esboco(nome, self._novos).observar(valores)
+            self.atualizado_em = time.time()
+        contar('drift.observacoes', len(valores), variavel=nome)
+
+    def observar_sentimentos(self, df):
+        """ Saídas do analisador (sentimento, confianca e scores) """
+        if 'sentimento' in df.columns:
+            self.observar('sentimento', [SINONIMOS.get(s, s) for s in df['sentimento'].astype(object)])
+        for coluna in ('confianca', 'score_positivo', 'score_negativo', 'score_neutro'):
+            if coluna in df.columns:
+                self.observar(coluna, df[coluna].to_numpy(dtype='float64'))
+        self.salvar()
+
+    def observar_previsoes(self, df, variacao):
+        """ Features de entrada e impacto previsto de um lote de previsões """
+        for coluna in ('confianca', 'score_positivo', 'score_negativo', 'score_neutro'):
+            if coluna in df.columns:
+                self.observar(f'entrada.{coluna}', df[coluna].to_numpy(dtype='float64'))
+        self.observar('variacao_prevista', np.asarray(variacao, dtype='float64'))
+        self.salvar(intervalo=5.0)
+
+    # ==================
+    # ALERTAS
+    # ==================
+
+    def alertas(self):
+        """
+        Alertas de drift e de qualidade, dos mais graves para os mais leves
+
+        Retorna:
+        list: dicts com nivel ('erro' ou 'aviso'), variavel, tipo e mensagem
+        """
+        alertas = []
+
+        def alertar(nivel, variavel, tipo, mensagem, valor):
+            alertas.append({'nivel': nivel, 'variavel': variavel, 'tipo': tipo,
+                            'mensagem': mensagem, 'valor': round(float(valor), 4)})
+
+        with self._lock:
+            for nome, esboco in sorted(self.esbocos.items()):
+                n_recentes = min(esboco.total, esboco.janela)
+                if n_recentes < MINIMO_DEGENERADO:
+                    continue
+
+                # Saídas degeneradas: uma só classe ou valor constante
+                if isinstance(esboco, EsbocoCategorico):
+                    proporcoes = esboco.proporcoes()
+                    dominante = max(proporcoes, key=proporcoes.get)
+                    if proporcoes[dominante] >= DOMINANCIA_MAXIMA:
+                        alertar('erro', nome, 'degenerado',
+                                f"{proporcoes[dominante]:.0%} das saídas recentes são '{dominante}'",
+                                proporcoes[dominante])
+                else:
+                    recentes = esboco.recentes()
+                    if np.std(recentes) < DESVIO_MINIMO:
+                        alertar('erro', nome, 'degenerado',
+                                f"{nome} constante em {recentes[-1]:.3g} nas últimas observações",
+                                np.std(recentes))
+
+                # Testes de distribuição só com amostra suficiente
+                if n_recentes < MINIMO_AMOSTRAS:
+                    continue
+                if isinstance(esboco, EsbocoNumerico):
+                    nulos = esboco.nulos_recentes / (esboco.nulos_recentes + esboco.recente.sum())
+                    if nulos > NULOS_MAXIMO:
+                        alertar('aviso', nome, 'nulos', f"{nulos:.0%} de valores nulos em {nome}", nulos)
+                    d, critico = esboco.ks()
+                    if d > critico:
+                        alertar('aviso', nome, 'ks', f"{nome}: distribuição recente mudou (KS = {d:.2f})", d)
+
+                # Com pouco histórico além da janela recente, o PSI compara quase a mesma coisa
+                if esboco.referencia.sum() >= 2 * MINIMO_AMOSTRAS:
+                    psi = esboco.psi()
+                    if psi >= PSI_AVISO:
+                        alertar('erro' if psi >= PSI_ERRO else 'aviso', nome, 'psi',
+                                f"{nome}: PSI {psi:.2f} em relação ao histórico", psi)
+
+        alertas.sort(key=lambda a: a['nivel'] != 'erro')
+        return alertas
+
+    def dominante(self, variavel='sentimento'):
+        """
+        Categoria que domina as saídas recentes (ex: 100% neutro)
+
+        Retorna:
+        tuple: (categoria, fração), ou None se a saída não está degenerada
+        """
+        esboco = self.esbocos.get(variavel)
+        if not isinstance(esboco, EsbocoCategorico) or min(esboco.total, esboco.janela) < MINIMO_DEGENERADO:
+            return None
+        proporcoes = esboco.proporcoes()
+        categoria = max(proporcoes, key=proporcoes.get)
+        return (categoria, proporcoes[categoria]) if proporcoes[categoria] >= DOMINANCIA_MAXIMA else None
+
+    def resumo(self):
+        """ Observações e PSI de cada variável monitorada """
+        with self._lock:
+            return [{'variavel': nome, 'observacoes': int(esboco.total),
+                     'psi': round(esboco.psi(), 4)} for nome, esboco in sorted(self.esbocos.items())]
+
+    # ==================
+    # DISCO
+    # ==================
+
+    def _trava(self):
+        return FileLock(self.arquivo + '.trava')
+
+    def _versao_em_disco(self):
+        # os.replace cria um arquivo novo a cada gravação: inode + mtime identificam a versão
+        if not os.path.exists(self.arquivo):
+            return None
+        info = os.stat(self.arquivo)
+        return info.st_ino, info.st_mtime_ns
+
+    def _adotar(self, estado, versao):
+        """ Passa a usar o estado lido do disco, somado ao que ainda não foi gravado """
+        self.janela = estado['janela']
+        self.esbocos = estado['esbocos']
+        for nome, novo in self._novos.items():
+            self._esboco(nome).mesclar(novo)
+        if estado['atualizado_em'] and (self.atualizado_em or 0) < estado['atualizado_em']:
+            self.atualizado_em = estado['atualizado_em']
+        self._versao = versao
+
+    def salvar(self, intervalo=0.0):
+        """
+        Soma ao estado em disco o que este processo observou desde o último
+        salvamento (no máximo uma vez a cada `intervalo` segundos)
+        """
+        if time.time() - self._ultimo_salvo < intervalo:
+            return
+        os.makedirs(os.path.dirname(self.arquivo) or '.', exist_ok=True)
+        temporario = self.arquivo + '.tmp'
+        with self._lock, self._trava():
+            # Outro processo gravou depois da nossa última leitura: parte do dele
+            versao = self._versao_em_disco()
+            if versao is not None and versao != self._versao:
+                with open(self.arquivo, 'rb') as f:
+                    self._adotar(pickle.load(f), versao)
+            with open(temporario, 'wb') as f:
+                pickle.dump({'janela': self.janela, 'esbocos': self.esbocos,
+                             'atualizado_em': self.atualizado_em}, f)
+            os.replace(temporario, self.arquivo)
+            self._versao = self._versao_em_disco()
+            self._novos = {}
+        self._ultimo_salvo = time.time()
+
+    def recarregar(self):
+        """ Relê o estado se outro processo (ex: python main.py sentimento) o atualizou """
+        versao = self._versao_em_disco()
+        if versao is None or versao == self._versao:
+            return False
+        with open(self.arquivo, 'rb') as f:
+            estado = pickle.load(f)
+        with self._lock:
+            self._adotar(estado, versao)
+        return True
+
+
+_monitor = None
+_lock = threading.Lock()
+
+
+def monitor(arquivo=ARQUIVO_ESTADO):
+    """
+    Monitor compartilhado pelo processo, em dia com o estado salvo em disco
+
+    Na primeira vez, sem estado salvo, parte do CSV de sentimentos existente.
+    """
+    global _monitor
+    with _lock:
+        if _monitor is None:
+            _monitor = MonitorDrift(arquivo=arquivo)
+            if not os.path.exists(arquivo):
+                import storage
+                if storage.existe(storage.ARQUIVO_SENTIMENTOS):
+                    _monitor.observar_sentimentos(storage.sentimentos())
+        _monitor.recarregar()
+    return _monitor
+
+
+if __name__ == "__main__":
+    # Pelo módulo importado: o estado em disco referencia drift_monitor.*, não __main__.*
+    import drift_monitor
+
+    atual = drift_monitor.monitor()
+    alertas = atual.alertas()
+    for linha in atual.resumo():
+        print(f"📈 {linha['variavel']}: {linha['observacoes']} observações, PSI {linha['psi']}")
+    if not alertas:
+        print("✅ Nenhum alerta")
+    for alerta in alertas:
+        print(f"{'🚨' if alerta['nivel'] == 'erro' else '⚠️'} {alerta['mensagem']}")
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+from filelock import FileLock
+
+from instrumentation import contar
+
+
+DIR_EMBEDDINGS = 'data/embeddings'
+
+
+def hash_texto(texto):
+    """ Hash estável (64 bits) da manchete normalizada (espaços e maiúsculas não importam) """
+    normalizado = re.sub(r'\s+', ' ', str(texto)).strip().casefold()
+    return int.from_bytes(hashlib.blake2b(normalizado.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def hashes(textos):
+    return np.fromiter((hash_texto(t) for t in textos), dtype=np.uint64, count=len(textos))
+
+
+class CacheEmbeddings:
+    """
+    Matriz de embeddings em float16, mapeada em memória e indexada pelo hash da manchete
+
+    Arquivos em <diretorio>/<modelo>/:
+    - vetores.f16: matriz (capacidade x dimensão) em float16, cresce dobrando
+    - chaves.u64: hash de cada linha, na ordem de inserção (só cresce)
+    - meta.json: dimensão, linhas válidas e capacidade (trocado atomicamente)
+
+    Linhas são só acrescentadas: uma manchete vista uma vez nunca é recalculada.
+    Escritores (páginas do app, python main.py sentimento --embeddings) se
+    revezam por uma trava de arquivo e releem meta.json antes de acrescentar.
+    """
+
+    def __init__(self, modelo='ProsusAI/finbert', dimensao=None, diretorio=DIR_EMBEDDINGS):
+        """
+        Parâmetros:
+        modelo (str): Nome do modelo que gerou os vetores (cada modelo tem sua pasta)
+        dimensao (int): Tamanho dos vetores (obrigatório na primeira gravação)
+        """
+        self.pasta = os.path.join(diretorio, re.sub(r'[^\w.-]+', '_', modelo))
+        self._lock = threading.Lock()
+        self.dimensao = dimensao
+        self.n = 0
+        self.capacidade = 0
+        self._vetores = None
+        # (chaves na ordem de inserção, ordem que as ordena): trocado de uma vez,
+        # então localizar nunca vê as duas partes de versões diferentes
+        self._indice = (np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64))
+        self._abrir()
+
+    def _caminho(self, nome):
+        return os.path.join(self.pasta, nome)
+
+    def _trava(self):
+        os.makedirs(self.pasta, exist_ok=True)
+        return FileLock(self._caminho('.trava'))
+
+    def _abrir(self):
+        """ Lê meta.json e as chaves gravadas até agora (inclusive por outros processos) """
+        if not os.path.exists(self._caminho('meta.json')):
+            return
+        with open(self._caminho('meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if self.dimensao is not None and meta['dimensao'] != self.dimensao:
+            raise ValueError(f"Cache em {self.pasta} tem dimensão {meta['dimensao']}, não {self.dimensao}")
+        if self._vetores is None or meta['capacidade'] != self.capacidade:
+            self._vetores = np.memmap(self._caminho('vetores.f16'), dtype=np.float16, mode='r+',
+                                      shape=(meta['capacidade'], meta['dimensao']))
+        self.dimensao, self.capacidade = meta['dimensao'], meta['capacidade']
+        if meta['n'] != self.n:
+            # Linhas além de meta['n'] podem ser de uma gravação interrompida: são ignoradas
+            chaves = np.fromfile(self._caminho('chaves.u64'), dtype=np.uint64, count=meta['n'])
+            self._indice = (chaves, np.argsort(chaves, kind='stable'))
+            self.n = meta['n']
+
+    def _salvar_meta(self, n):
+        temporario = self._caminho('meta.json.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'dimensao': self.dimensao, 'n': n, 'capacidade': self.capacidade}, f)
+        os.replace(temporario, self._caminho('meta.json'))
+
+    def _garantir_capacidade(self, necessario):
+        if necessario <= self.capacidade:
+            return
+        nova = max(necessario, self.capacidade * 2, 1024)
+        os.makedirs(self.pasta, exist_ok=True)
+        if self._vetores is not None:
+            self._vetores.flush()
+            self._vetores = None
+        with open(self._caminho('vetores.f16'), 'ab') as f:
+            f.truncate(nova * self.dimensao * 2)  # float16 = 2 bytes
+        self.capacidade = nova
+        self._vetores = np.memmap(self._caminho('vetores.f16'), dtype=np.float16, mode='r+',
+                                  shape=(self.capacidade, self.dimensao))
+
+    def __len__(self):
+        return self.n
+
+    def localizar(self, chaves):
+        """
+        Linha de cada hash na matriz
+
+        Retorna:
+        ndarray: Posições (int64), -1 para hashes ausentes
+        """
+        chaves = np.asarray(chaves, dtype=np.uint64)
+        gravadas, ordem = self._indice
+        if len(ordem) == 0:
+            return np.full(len(chaves), -1, dtype=np.int64)
+        ordenadas = gravadas[ordem]
+        pos = np.searchsorted(ordenadas, chaves)
+        pos_valida = np.minimum(pos, len(ordem) - 1)
+        achou = ordenadas[pos_valida] == chaves
+        return np.where(achou, ordem[pos_valida], -1)
+
+    def obter(self, textos):
+        """
+        Embeddings das manchetes já conhecidas
+
+        Retorna:
+        tuple: (matriz float32 n x dimensão com NaN nas ausentes, máscara das encontradas)
+        """
+        linhas = self.localizar(hashes(textos))
+        encontradas = linhas >= 0
+        matriz = np.full((len(linhas), self.dimensao or 0), np.nan, dtype=np.float32)
+        if encontradas.any():
+            matriz[encontradas] = self._vetores[linhas[encontradas]]
+        contar('embeddings.cache', int(encontradas.sum()), resultado='hit')
+        contar('embeddings.cache', int((~encontradas).sum()), resultado='miss')
+        return matriz, encontradas
+
+    def adicionar(self, textos, vetores):
+        """
+        Grava os embeddings de manchetes novas (as já conhecidas são ignoradas)
+
+        Retorna:
+        int: Quantidade de linhas acrescentadas
+        """
+        vetores = np.asarray(vetores, dtype=np.float32)
+        with self._lock, self._trava():
+            # Outro processo (ou outra instância) pode ter acrescentado linhas desde a abertura
+            self._abrir()
+            if self.dimensao is None:
+                self.dimensao = vetores.shape[1]
+            chaves = hashes(textos)
+            _, unicas = np.unique(chaves, return_index=True)
+            novas = np.sort(unicas)[self.localizar(chaves[np.sort(unicas)]) < 0]
+            if len(novas) == 0:
+                return 0
+
+            self._garantir_capacidade(self.n + len(novas))
+            self._vetores[self.n:self.n + len(novas)] = vetores[novas].astype(np.float16)
+            self._vetores.flush()
+            with open(self._caminho('chaves.u64'), 'r+b' if self.n else 'wb') as f:
+                f.seek(self.n * 8)  # descarta chaves de uma gravação interrompida
+                chaves[novas].tofile(f)
+                f.truncate()
+
+            # meta.json por último: só então as linhas passam a valer para outros leitores
+            n = self.n + len(novas)
+            self._salvar_meta(n)
+            gravadas = np.concatenate([self._indice[0], chaves[novas]])
+            self._indice = (gravadas, np.argsort(gravadas, kind='stable'))
+            self.n = n
+        return len(novas)
+
+    def obter_ou_calcular(self, textos, calcular, lote=256):
+        """
+        Embeddings de todas as manchetes, calculando só as que faltam
+
+        Parâmetros:
+        textos (list): Manchetes
+        calcular (callable): lista de textos -> matriz (n x dimensão)
+        lote (int): Manchetes novas calculadas e gravadas por vez
+
+        Retorna:
+        ndarray: Matriz float32 (n x dimensão), na ordem de textos
+        """
+        textos = [str(t) for t in textos]
+        matriz, encontradas = self.obter(textos)
+        faltando = np.flatnonzero(~encontradas)
+        if len(faltando) == 0:
+            return matriz
+
+        print(f"🧮 Calculando {len(faltando)} embeddings novos ({encontradas.sum()} em cache)...")
+        calculados = []
+        for inicio in range(0, len(faltando), lote):
+            idx = faltando[inicio:inicio + lote]
+            vetores = np.asarray(calcular([textos[i] for i in idx]), dtype=np.float32)
+            self.adicionar([textos[i] for i in idx], vetores)
+            calculados.append(vetores)
+        calculados = np.concatenate(calculados)
+        if matriz.shape[1] == 0:
+            matriz = np.full((len(textos), calculados.shape[1]), np.nan, dtype=np.float32)
+        matriz[faltando] = calculados
+        return matriz
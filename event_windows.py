@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import medido
+
+
+# Janelas padrão do rotulador: nome da coluna -> horizonte após a notícia
+JANELAS_PADRAO = {
+    'ret_5m': '5min',
+    'ret_30m': '30min',
+    'ret_1d': '1D'
+}
+
+
+def _para_ns(datas):
+    """ Converte datas (com ou sem fuso) em inteiros ns UTC """
+    return pd.to_datetime(datas, utc=True).to_numpy(dtype='datetime64[ns]').astype('int64')
+
+
+def _duracao_candle(tempos):
+    """ Duração (ns) dos candles: a mediana dos intervalos (pernoites e fins de semana são minoria) """
+    passos = np.diff(tempos)
+    passos = passos[passos > 0]
+    return int(np.median(passos)) if len(passos) else None
+
+
+def _referencias(df_noticias, df_precos, coluna_data):
+    """
+    Percorre os ativos com notícias e preços
+
+    Os candles são marcados pelo início; `fins` é o instante em que cada
+    fechamento passa a ser conhecido (início + duração inferida dos dados).
+
+    Retorna:
+    generator: (posições das notícias, instantes ns, fins ns, fechamentos, i_ref),
+        com i_ref = último candle encerrado até a notícia (-1 se nenhum)
+    """
+    tempos_noticias = _para_ns(df_noticias[coluna_data])
+    validas = ~pd.isna(df_noticias[coluna_data]).to_numpy()
+
+    # Converte os preços uma vez só e separa as posições de cada ativo
+    tempos_precos = _para_ns(df_precos['data'])
+    fechamentos_precos = df_precos['fechamento'].to_numpy(dtype='float64')
+    grupos_precos = df_precos.groupby('ticker', observed=True).indices
+    duracao_geral = None  # para ativos com um candle só
+
+    for ticker, idx_noticias in df_noticias.groupby('ticker', observed=True).indices.items():
+        idx_noticias = idx_noticias[validas[idx_noticias]]
+        idx_precos = grupos_precos.get(ticker)
+        if len(idx_noticias) == 0 or idx_precos is None:
+            continue
+
+        ordem = idx_precos[np.argsort(tempos_precos[idx_precos], kind='stable')]
+        tempos = tempos_precos[ordem]
+        duracao = _duracao_candle(tempos)
+        if duracao is None:
+            if duracao_geral is None:
+                duracao_geral = _duracao_candle(np.unique(tempos_precos)) or 0
+            duracao = duracao_geral
+        fins = tempos + duracao
+
+        t = tempos_noticias[idx_noticias]
+        i_ref = np.searchsorted(fins, t, side='right') - 1
+        yield idx_noticias, t, fins, fechamentos_precos[ordem], i_ref
+
+
+@medido('predictor.retornos_evento')
+def retornos_evento(df_noticias, df_precos, janelas=None, coluna_data='data_noticia'):
+    """
+    Calcula o retorno do ativo em janelas de tempo após cada notícia
+
+    Os candles são marcados pelo início ('data'); o fechamento só é conhecido
+    no fim do candle (início + duração, inferida dos próprios dados). Para cada
+    notícia no instante t, o preço de referência é o último conhecido em t: o
+    fechamento do último candle encerrado até t. O preço alvo é o fechamento
+    do último candle encerrado até t + janela. Assim a reação à notícia fica
+    dentro do retorno (ex: barras diárias, notícia às 14h: fechamento da
+    véspera -> fechamento do dia). Se nenhum candle terminou dentro da janela
+    (ex: notícia com o mercado fechado e janela de 5 minutos) ou se o
+    histórico não cobre t + janela, o retorno fica NaN.
+
+    As buscas usam np.searchsorted sobre os tempos ordenados de cada ativo,
+    sem merges nem cópias do frame de preços.
+
+    Parâmetros:
+    df_noticias: DataFrame com 'ticker' e a coluna de data (UTC)
+    df_precos: DataFrame com 'data', 'ticker' e 'fechamento' (diário ou intraday)
+    janelas (dict): Nome da coluna -> horizonte ('5min', '30min', '1D')
+    coluna_data (str): Coluna com o instante da notícia
+
+    Retorna:
+    DataFrame: Uma coluna de retorno (%) por janela, com o índice de df_noticias
+    """
+    janelas = JANELAS_PADRAO if janelas is None else janelas
+    colunas = {nome: np.full(len(df_noticias), np.nan, dtype='float32') for nome in janelas}
+    if len(df_noticias) == 0 or len(df_precos) == 0:
+        return pd.DataFrame(colunas, index=df_noticias.index)
+
+    horizontes = {nome: pd.Timedelta(h).value for nome, h in janelas.items()}
+
+    for idx_noticias, t, fins, fechamentos, i_ref in _referencias(df_noticias, df_precos, coluna_data):
+        tem_ref = i_ref >= 0
+        preco_ref = fechamentos[np.maximum(i_ref, 0)]
+
+        for nome, horizonte in horizontes.items():
+            alvo_t = t + horizonte
+            i_alvo = np.searchsorted(fins, alvo_t, side='right') - 1
+            ok = tem_ref & (i_alvo > i_ref) & (alvo_t <= fins[-1])
+            retorno = (fechamentos[i_alvo] - preco_ref) / preco_ref * 100
+            colunas[nome][idx_noticias[ok]] = retorno[ok]
+
+    return pd.DataFrame(colunas, index=df_noticias.index)
+
+
+@medido('predictor.retorno_proximo_fechamento')
+def retorno_proximo_fechamento(df_noticias, df_precos, coluna_data='data_noticia'):
+    """
+    Retorno do último fechamento conhecido na notícia até o fechamento seguinte
+
+    Mesma referência de retornos_evento, mas o alvo é o próximo candle a
+    encerrar, qualquer que seja a distância: com barras diárias, uma notícia
+    às 14h compara a véspera com o fechamento do dia, e uma de sábado compara
+    sexta com segunda. NaN se o histórico termina antes do próximo fechamento.
+
+    Retorna:
+    Series: Retorno (%) com o índice de df_noticias
+    """
+    retorno = np.full(len(df_noticias), np.nan, dtype='float32')
+    if len(df_noticias) and len(df_precos):
+        for idx_noticias, _, fins, fechamentos, i_ref in _referencias(df_noticias, df_precos, coluna_data):
+            ok = (i_ref >= 0) & (i_ref + 1 < len(fins))
+            i_ref = i_ref[ok]
+            retorno[idx_noticias[ok]] = (fechamentos[i_ref + 1] - fechamentos[i_ref]) / fechamentos[i_ref] * 100
+    return pd.Series(retorno, index=df_noticias.index)
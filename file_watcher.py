@@ -0,0 +1,404 @@
+"""
+Vigia dos arquivos de dados e atualização das sessões abertas do dashboard
+
+O watchdog avisa quando o scraper, o PriceFetcher, o analisador ou o treino
+gravam em data/. Para cada arquivo o vigia mantém contagens em memória
+(registros, por ticker, por sentimento) e, quando o CSV só cresceu, lê
+apenas as linhas novas. Nos datasets append-only (ver dataset_writer) o aviso
+vem do manifest.json e só os segmentos gravados depois da última leitura são
+lidos. Depois pede às sessões do Streamlit que reexecutem só os fragmentos
+que dependem daquele arquivo.
+"""
+import csv
+import io
+import os
+import threading
+from collections import Counter
+
+import pandas as pd
+
+import dataset_writer
+from instrumentation import span, contar
+from storage import ARQUIVO_NOTICIAS, ARQUIVO_SENTIMENTOS, ARQUIVO_PRECOS
+
+
+ARQUIVO_MODELO = 'data/modelo_predictor.pkl'
+
+# Arquivo -> tópico avisado aos fragmentos
+TOPICOS = {
+    ARQUIVO_NOTICIAS: 'noticias',
+    ARQUIVO_SENTIMENTOS: 'sentimentos',
+    ARQUIVO_PRECOS: 'precos',
+    ARQUIVO_MODELO: 'modelo'
+}
+
+# Colunas contadas por valor em cada CSV
+COLUNAS_CONTADAS = ('ticker', 'sentimento')
+
+AMOSTRA_PREFIXO = 4096  # bytes comparados para saber se o arquivo só cresceu
+
+
+class Agregados:
+    """
+    Contagens de um CSV (ou do seu dataset append-only) mantidas em memória
+
+    Quando o arquivo só ganhou linhas no fim (mesmo cabeçalho e mesmos bytes
+    até onde já foi lido), só o trecho novo é lido; qualquer outra mudança
+    (reescrita, arquivo menor) refaz a contagem do zero. Num dataset, só os
+    segmentos novos são lidos; uma época nova (conteúdo substituído) refaz a
+    contagem.
+
+    atualizar() é serializado por uma trava; registros, existe e contagem()
+    mostram o resultado da última atualização completa (cópias feitas sob a
+    trava), nunca uma contagem pela metade.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._zerar()
+        self._publicar()
+
+    def _zerar(self):
+        self._existe = False
+        self._registros = 0
+        self._contagens = {coluna: Counter() for coluna in COLUNAS_CONTADAS}
+        self._cabecalho = None
+        self._posicao = 0
+        self._prefixo = b''
+        self._fim = b''
+        # Dataset: época/lote já lidos e, na política 'ultima', chave -> valores contados
+        self._epoca = None
+        self._lote = 0
+        self._valores = {}
+
+    def _publicar(self):
+        self.contagens = {coluna: Counter(valores) for coluna, valores in self._contagens.items()}
+        self.registros = self._registros
+        self.existe = self._existe
+
+    def contagem(self, coluna):
+        """ Counter valor -> registros da coluna (vazio se o CSV não a tiver) """
+        return self.contagens.get(coluna, Counter())
+
+    def _so_cresceu(self, f, tamanho):
+        if self._cabecalho is None or tamanho < self._posicao:
+            return False
+        f.seek(0)
+        if f.read(len(self._prefixo)) != self._prefixo:
+            return False
+        f.seek(self._posicao - len(self._fim))
+        return f.read(len(self._fim)) == self._fim
+
+    def _contar(self, linhas):
+        indices = {coluna: self._cabecalho.index(coluna) for coluna in COLUNAS_CONTADAS
+                   if coluna in self._cabecalho}
+        novos = 0
+        for linha in csv.reader(linhas):
+            if not linha:
+                continue
+            novos += 1
+            for coluna, i in indices.items():
+                if i < len(linha):
+                    self._contagens[coluna][linha[i]] += 1
+        self._registros += novos
+        return novos
+
+    def _contar_segmento(self, df, chave, manter):
+        contadas = [coluna for coluna in COLUNAS_CONTADAS if coluna in df.columns]
+        if not chave or manter != 'ultima':
+            for coluna in contadas:
+                valores = df[coluna].astype(object).fillna('').astype(str)
+                self._contagens[coluna].update(valores.value_counts().to_dict())
+            self._registros += len(df)
+            return len(df)
+
+        # Chave regravada: sai a contagem antiga, entra a nova (valor vazio mantém o anterior)
+        novos = 0
+        colunas = [df[coluna].astype(object).tolist() for coluna in contadas]
+        for i, registro in enumerate(dataset_writer.normalizar_chave(df, chave)):
+            antigos = self._valores.get(registro)
+            valores = []
+            for j, coluna in enumerate(colunas):
+                valor = coluna[i]
+                if pd.isna(valor):
+                    valor = '' if antigos is None else antigos[j]
+                valores.append(str(valor))
+            if antigos is None:
+                novos += 1
+            else:
+                for coluna, valor in zip(contadas, antigos):
+                    self._contagens[coluna][valor] -= 1
+            for coluna, valor in zip(contadas, valores):
+                self._contagens[coluna][valor] += 1
+            self._valores[registro] = tuple(valores)
+        for coluna in contadas:
+            self._contagens[coluna] = +self._contagens[coluna]  # descarta contagens zeradas
+        self._registros += novos
+        return novos
+
+    def _atualizar_dataset(self):
+        import pyarrow.parquet as pq
+
+        dataset = dataset_writer.Dataset(self.caminho)
+        manifesto, arquivos = dataset.segmentos_novos(self._epoca, self._lote)
+        incremental = arquivos is not None
+        if not incremental:
+            self._zerar()
+            arquivos = [os.path.join(dataset.pasta, s['arquivo']) for s in manifesto['segmentos']]
+        self._existe = True
+
+        chave = manifesto.get('chave') or []
+        novos = 0
+        for arquivo in arquivos:
+            colunas = [c for c in pq.read_schema(arquivo).names if c in COLUNAS_CONTADAS or c in chave]
+            novos += self._contar_segmento(pd.read_parquet(arquivo, columns=colunas), chave, manifesto.get('manter'))
+        self._epoca, self._lote = manifesto['epoca'], manifesto['lote']
+        contar('vigia.linhas', novos, arquivo=os.path.basename(dataset.pasta),
+               modo='incremental' if incremental else 'completo')
+        return novos
+
+    def atualizar(self):
+        """
+        Relê o arquivo a partir do ponto em que parou
+
+        Retorna:
+        int: Registros novos (ou o total, quando a contagem é refeita)
+        """
+        # Timers do mesmo tópico podem se sobrepor se uma recontagem demora mais que o atraso
+        with self._lock:
+            novos = self._atualizar()
+            self._publicar()
+        return novos
+
+    def _atualizar(self):
+        if dataset_writer.existe(self.caminho):
+            return self._atualizar_dataset()
+        if self._epoca is not None:
+            self._zerar()  # dataset exportado/apagado: volta a ler o CSV do zero
+        if not os.path.exists(self.caminho):
+            self._zerar()
+            return 0
+        if not self.caminho.endswith('.csv'):
+            self._existe = True
+            return 0
+
+        with open(self.caminho, 'rb') as f:
+            tamanho = os.fstat(f.fileno()).st_size
+            incremental = self._so_cresceu(f, tamanho)
+            if not incremental:
+                self._zerar()
+            self._existe = True
+
+            f.seek(self._posicao)
+            dados = f.read(tamanho - self._posicao)
+            # Linha final sem quebra pode estar sendo gravada: fica para a próxima
+            corte = dados.rfind(b'\n') + 1
+            dados = dados[:corte]
+            if not dados:
+                return 0
+
+            texto = dados.decode('utf-8-sig' if self._posicao == 0 else 'utf-8', errors='replace')
+            linhas = io.StringIO(texto, newline='')
+            if self._cabecalho is None:
+                self._cabecalho = next(csv.reader(linhas), [])
+            novos = self._contar(linhas)
+
+            self._posicao += corte
+            f.seek(0)
+            self._prefixo = f.read(min(self._posicao, AMOSTRA_PREFIXO))
+            self._fim = dados[-min(len(dados), AMOSTRA_PREFIXO):]
+        contar('vigia.linhas', novos, arquivo=os.path.basename(self.caminho),
+               modo='incremental' if incremental else 'completo')
+        return novos
+
+
+class Vigia:
+    """
+    Observa data/ com o watchdog e avisa quem depende de cada arquivo
+
+    Assinantes são callbacks (tópico -> None) ou fragmentos do Streamlit,
+    registrados por sessão. Rajadas de eventos do mesmo arquivo (truncate +
+    escrita + rename) viram uma única atualização depois de `atraso` segundos.
+    """
+
+    def __init__(self, arquivos=None, atraso=0.5):
+        """
+        Parâmetros:
+        arquivos (dict): Caminho -> tópico (padrão: TOPICOS)
+        atraso (float): Segundos sem eventos antes de processar um arquivo
+        """
+        arquivos = {os.path.abspath(c): t for c, t in (arquivos or TOPICOS).items()}
+        self.atraso = atraso
+        self.agregados = {t: Agregados(c) for c, t in arquivos.items()}
+        # Datasets append-only avisam pelo manifesto (trocado a cada gravação)
+        self.topicos = dict(arquivos)
+        for caminho, topico in arquivos.items():
+            if caminho.endswith('.csv'):
+                self.topicos[os.path.join(dataset_writer.pasta_dataset(caminho), dataset_writer.MANIFESTO)] = topico
+        self.versoes = {t: 0 for t in self.topicos.values()}
+        self._lock = threading.Lock()
+        self._timers = {}
+        self._assinantes = []
+        self._fragmentos = {}  # (sessão, fragmento) -> (tópicos, página, query string)
+        self._observador = None
+        for agregado in self.agregados.values():
+            agregado.atualizar()
+
+    def agregado(self, topico):
+        return self.agregados[topico]
+
+    def iniciar(self):
+        """ Começa a observar as pastas dos arquivos (thread do watchdog) """
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        vigia = self
+
+        class Tratador(FileSystemEventHandler):
+            def on_any_event(self, evento):
+                if evento.event_type in ('opened', 'closed_no_write'):
+                    return
+                for caminho in (evento.src_path, getattr(evento, 'dest_path', '')):
+                    topico = vigia.topicos.get(os.path.abspath(caminho)) if caminho else None
+                    if topico:
+                        vigia._agendar(topico)
+
+        self._observador = Observer()
+        for pasta in {os.path.dirname(c) for c in self.topicos}:
+            os.makedirs(pasta, exist_ok=True)
+            self._observador.schedule(Tratador(), pasta, recursive=False)
+        self._observador.daemon = True
+        self._observador.start()
+        return self
+
+    def parar(self):
+        if self._observador is not None:
+            self._observador.stop()
+            self._observador.join()
+            self._observador = None
+        with self._lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+
+    def _agendar(self, topico):
+        with self._lock:
+            if topico in self._timers:
+                self._timers[topico].cancel()
+            timer = threading.Timer(self.atraso, self.processar, args=(topico,))
+            timer.daemon = True
+            self._timers[topico] = timer
+            timer.start()
+
+    def processar(self, topico):
+        """ Atualiza os agregados do arquivo e avisa os assinantes do tópico """
+        with self._lock:
+            self._timers.pop(topico, None)
+        with span('vigia.atualizar', topico=topico):
+            self.agregados[topico].atualizar()
+        with self._lock:
+            self.versoes[topico] += 1
+            assinantes = list(self._assinantes)
+            fragmentos = [(chave, info) for chave, info in self._fragmentos.items() if topico in info[0]]
+
+        for topicos, callback in assinantes:
+            if topico in topicos:
+                callback(topico)
+        for (sessao, fragmento), (_, pagina, query) in fragmentos:
+            if not _reexecutar_fragmento(sessao, fragmento, pagina, query):
+                with self._lock:
+                    self._fragmentos.pop((sessao, fragmento), None)
+        contar('vigia.avisos', len(fragmentos), topico=topico)
+
+    def assinar(self, topicos, callback):
+        """ Chama callback(tópico) sempre que um dos arquivos dos tópicos mudar """
+        with self._lock:
+            self._assinantes.append((frozenset(topicos), callback))
+
+    def registrar_fragmento(self, topicos):
+        """
+        Registra o fragmento do Streamlit em execução como dependente dos tópicos
+
+        Chamado de dentro do fragmento a cada execução (ver paginas.comum.fragmento);
+        fora de um fragmento não faz nada.
+        """
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+        if ctx is None or not ctx.current_fragment_id:
+            return
+        with self._lock:
+            self._fragmentos[(ctx.session_id, ctx.current_fragment_id)] = (
+                frozenset(topicos), ctx.page_script_hash, ctx.query_string)
+
+
+_sem_reexecucao = False  # internals do Streamlit indisponíveis
+
+
+def _reexecutar_fragmento(sessao, fragmento, pagina, query):
+    """
+    Pede à sessão que reexecute só o fragmento (como um clique dentro dele)
+
+    Usa internals do Streamlit (Runtime._session_mgr, _get_async_objs e o
+    proto ClientState), testados com streamlit==1.52.2 (requirements.txt).
+    Se uma atualização do Streamlit mudar essas APIs, o vigia só deixa de
+    atualizar os fragmentos sozinho: a primeira falha desliga o recurso.
+
+    Retorna:
+    bool: False se a sessão não existe mais (ou o recurso está desligado)
+    """
+    global _sem_reexecucao
+    if _sem_reexecucao:
+        return False
+    try:
+        from streamlit.proto.ClientState_pb2 import ClientState
+        from streamlit.runtime import Runtime
+
+        if not Runtime.exists():
+            return False
+        runtime = Runtime.instance()
+        info = runtime._session_mgr.get_active_session_info(sessao)
+        if info is None:
+            return False
+
+        estado = ClientState(fragment_id=fragmento, page_script_hash=pagina, query_string=query)
+        # Mantém os valores atuais dos widgets (sem eles a sessão voltaria aos padrões)
+        estado.widget_states.widgets.extend(info.session.session_state.get_widget_states())
+        # AppSession só pode ser usada na thread do event loop do servidor
+        runtime._get_async_objs().eventloop.call_soon_threadsafe(info.session.request_rerun, estado)
+        return True
+    except Exception as e:
+        _sem_reexecucao = True
+        contar('vigia.erros', erro=type(e).__name__)
+        print(f"⚠️ Atualização automática dos fragmentos desligada (Streamlit incompatível: {e})")
+        return False
+
+_vigia = None
+_lock_vigia = threading.Lock()
+
+
+def vigia():
+    """ Vigia do processo, criado e iniciado na primeira chamada """
+    global _vigia
+    with _lock_vigia:
+        if _vigia is None:
+            _vigia = Vigia().iniciar()
+    return _vigia
+
+
+if __name__ == "__main__":
+    import time
+
+    atual = vigia()
+    atual.assinar(set(TOPICOS.values()), lambda topico: print(
+        f"🔔 {topico}: {atual.agregado(topico).registros} registros "
+        f"{dict(atual.agregado(topico).contagem('sentimento')) or ''}"))
+    for topico, agregado in atual.agregados.items():
+        print(f"📄 {topico}: {agregado.registros} registros" if agregado.existe else f"📄 {topico}: (sem arquivo)")
+    print("👀 Observando data/ (Ctrl+C para sair)...")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        atual.parar()
@@ -0,0 +1,121 @@
+"""
+Relatório de tempo de importação (python -X importtime)
+
+Mede, num interpretador novo, o custo dos imports de topo do app e de cada
+página, para acompanhar o tempo de cold start do dashboard.
+
+Uso:
+    python import_report.py                       # app.py + páginas
+    python import_report.py --arquivo antigo.py   # outro script (ex: versão anterior do app)
+    python import_report.py --modulos pandas torch --top 15
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+
+def imports_de_topo(arquivo, funcao=None):
+    """
+    Módulos importados no nível de módulo de um script
+
+    Imports dentro de funções são ignorados, exceto os do primeiro nível de
+    `funcao` (ex: os imports que render() faz sempre que a página abre).
+
+    Retorna:
+    list: Nomes dos módulos, na ordem em que aparecem
+    """
+    with open(arquivo, encoding='utf-8') as f:
+        arvore = ast.parse(f.read())
+
+    nos = list(arvore.body)
+    for no in arvore.body:
+        if isinstance(no, ast.FunctionDef) and no.name == funcao:
+            nos.extend(no.body)
+
+    modulos = []
+    for no in nos:
+        if isinstance(no, ast.Import):
+            modulos.extend(a.name for a in no.names)
+        elif isinstance(no, ast.ImportFrom) and no.module and no.level == 0:
+            modulos.append(no.module)
+    return list(dict.fromkeys(modulos))
+
+
+def medir_imports(modulos, repeticoes=3):
+    """
+    Importa `modulos` num processo novo com -X importtime
+
+    Usa a menor das `repeticoes` medições (a primeira costuma pagar o cache
+    de disco e a compilação dos .pyc).
+
+    Retorna:
+    dict: total_ms e por_pacote (ms cumulativos por pacote de topo)
+    """
+    codigo = '; '.join(f"import {m}" for m in modulos) or 'pass'
+    melhor = None
+    for _ in range(repeticoes):
+        processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                                  capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if processo.returncode != 0:
+            raise ImportError(processo.stderr.strip().splitlines()[-1])
+
+        por_pacote = {}
+        for linha in processo.stderr.splitlines():
+            if not linha.startswith('import time:') or '|' not in linha:
+                continue
+            _, cumulativo, nome = linha[len('import time:'):].split('|')
+            if not cumulativo.strip().isdigit():
+                continue  # cabeçalho
+            # Só as raízes (sem indentação) somam no total; filhos já estão no cumulativo delas
+            if nome.startswith(' ') and not nome.startswith('  '):
+                pacote = nome.strip().split('.')[0]
+                por_pacote[pacote] = por_pacote.get(pacote, 0) + int(cumulativo) / 1000
+
+        total = sum(por_pacote.values())
+        if melhor is None or total < melhor['total_ms']:
+            melhor = {'total_ms': total, 'por_pacote': por_pacote}
+    return melhor
+
+
+def imprimir(titulo, resultado, top=10):
+    print(f"\n📦 {titulo}: {resultado['total_ms']:.0f} ms")
+    for pacote, ms in sorted(resultado['por_pacote'].items(), key=lambda x: -x[1])[:top]:
+        print(f"   {pacote:<25}{ms:>9.1f} ms")
+
+
+def relatorio(arquivo='app.py', paginas=True, top=10):
+    """
+    Tempo de importação do script e, opcionalmente, de cada página do dashboard
+
+    Retorna:
+    dict: Nome -> resultado de medir_imports
+    """
+    resultados = {}
+    modulos = imports_de_topo(arquivo)
+    resultados[arquivo] = medir_imports(modulos)
+    imprimir(f"{arquivo} (imports de topo: {', '.join(modulos)})", resultados[arquivo], top)
+
+    if paginas:
+        from paginas import PAGINAS
+        for nome, modulo in PAGINAS.items():
+            # Módulo da página + imports feitos ao abrir (ações como treinar ficam de fora)
+            ao_abrir = imports_de_topo(modulo.replace('.', os.sep) + '.py', funcao='render')
+            resultados[nome] = medir_imports(modulos + [modulo] + ao_abrir)
+            imprimir(f"{arquivo} + página {nome}", resultados[nome], top)
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relatório de -X importtime")
+    parser.add_argument('--arquivo', default='app.py', help="script cujos imports de topo serão medidos")
+    parser.add_argument('--modulos', nargs='+', help="mede estes módulos em vez de um script")
+    parser.add_argument('--sem-paginas', action='store_true', help="não mede as páginas do dashboard")
+    parser.add_argument('--top', type=int, default=10, help="pacotes mais lentos a listar")
+    args = parser.parse_args()
+
+    if args.modulos:
+        imprimir(', '.join(args.modulos), medir_imports(args.modulos), args.top)
+    else:
+        relatorio(args.arquivo, paginas=not args.sem_paginas, top=args.top)
@@ -0,0 +1,251 @@
+import bisect
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Limites (segundos) dos buckets dos histogramas de duração
+BUCKETS_PADRAO = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+logger = logging.getLogger('sentinel.metricas')
+
+
+class Histograma:
+    """
+    Histograma cumulativo com buckets fixos (memória constante)
+    """
+
+    def __init__(self, buckets=BUCKETS_PADRAO):
+        self.buckets = tuple(buckets)
+        self.contagens = [0] * (len(self.buckets) + 1)  # último = +Inf
+        self.soma = 0.0
+        self.total = 0
+        self.ultimo = None
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.buckets, valor)] += 1
+        self.soma += valor
+        self.total += 1
+        self.ultimo = valor
+        self.maximo = max(self.maximo, valor)
+
+    def quantil(self, q):
+        """ Quantil aproximado (limite superior do bucket) """
+        if self.total == 0:
+            return None
+        alvo = q * self.total
+        acumulado = 0
+        for limite, contagem in zip(self.buckets + (float('inf'),), self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return limite if limite != float('inf') else self.maximo
+        return self.maximo
+
+
+class Metricas:
+    """
+    Registro de contadores e histogramas do pipeline
+
+    Os nomes seguem o padrão 'modulo.etapa' (ex: 'scraper.fonte',
+    'sentimento.forward'). Rótulos extras (fonte, ticker...) entram como
+    dict e viram labels no formato Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.contadores = {}
+        self.histogramas = {}
+
+    @staticmethod
+    def _chave(nome, rotulos):
+        return (nome, tuple(sorted((rotulos or {}).items())))
+
+    def incrementar(self, nome, valor=1, rotulos=None):
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            self.contadores[chave] = self.contadores.get(chave, 0) + valor
+
+    def observar(self, nome, valor, rotulos=None):
+        chave = self._chave(nome, rotulos)
+        with self._lock:
+            if chave not in self.histogramas:
+                self.histogramas[chave] = Histograma()
+            self.histogramas[chave].observar(valor)
+
+    def limpar(self):
+        with self._lock:
+            self.contadores.clear()
+            self.histogramas.clear()
+
+    def resumo_etapas(self):
+        """
+        Tabela de tempos por etapa (soma dos rótulos de cada span)
+
+        Retorna:
+        list: Um dict por etapa com chamadas, último, média, p95 e total (ms)
+        """
+        agregados = {}
+        with self._lock:
+            for (nome, _), h in self.histogramas.items():
+                if not nome.endswith('.segundos'):
+                    continue
+                etapa = nome[:-len('.segundos')]
+                atual = agregados.setdefault(etapa, Histograma())
+                atual.contagens = [a + b for a, b in zip(atual.contagens, h.contagens)]
+                atual.soma += h.soma
+                atual.total += h.total
+                atual.maximo = max(atual.maximo, h.maximo)
+                atual.ultimo = h.ultimo
+
+        linhas = []
+        for etapa, h in sorted(agregados.items()):
+            linhas.append({
+                'etapa': etapa,
+                'chamadas': h.total,
+                'ultimo_ms': round((h.ultimo or 0) * 1000, 1),
+                'media_ms': round(h.soma / h.total * 1000, 1) if h.total else 0.0,
+                'p95_ms': round((h.quantil(0.95) or 0) * 1000, 1),
+                'total_ms': round(h.soma * 1000, 1)
+            })
+        return linhas
+
+    def exportar_prometheus(self):
+        """ Métricas no formato texto do Prometheus """
+        def nome_prom(nome):
+            return 'sentinel_' + nome.replace('.', '_')
+
+        def rotulos_prom(rotulos, extra=()):
+            itens = list(rotulos) + list(extra)
+            if not itens:
+                return ''
+            return '{' + ','.join(f'{k}="{str(v)}"' for k, v in itens) + '}'
+
+        linhas = []
+        with self._lock:
+            for (nome, rotulos), valor in sorted(self.contadores.items()):
+                linhas.append(f"{nome_prom(nome)}_total{rotulos_prom(rotulos)} {valor}")
+            for (nome, rotulos), h in sorted(self.histogramas.items()):
+                base = nome_prom(nome)
+                acumulado = 0
+                for limite, contagem in zip(h.buckets + ('+Inf',), h.contagens):
+                    acumulado += contagem
+                    linhas.append(f"{base}_bucket{rotulos_prom(rotulos, [('le', limite)])} {acumulado}")
+                linhas.append(f"{base}_sum{rotulos_prom(rotulos)} {h.soma}")
+                linhas.append(f"{base}_count{rotulos_prom(rotulos)} {h.total}")
+        return '\n'.join(linhas) + '\n'
+
+
+# Registro global usado por todos os módulos
+METRICAS = Metricas()
+
+
+@contextmanager
+def span(nome, **rotulos):
+    """
+    Mede a duração de um trecho do pipeline
+
+    Registra o tempo no histograma '<nome>.segundos', conta erros em
+    '<nome>.erros' e emite um log JSON estruturado ao final.
+
+    Uso:
+        with span('precos.yfinance', ticker='PETR4'):
+            ...
+    """
+    inicio = time.perf_counter()
+    erro = None
+    try:
+        yield
+    except BaseException as e:
+        erro = e
+        raise
+    finally:
+        duracao = time.perf_counter() - inicio
+        METRICAS.observar(f"{nome}.segundos", duracao, rotulos)
+        if erro is not None:
+            METRICAS.incrementar(f"{nome}.erros", rotulos=rotulos)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'evento': 'span',
+                'nome': nome,
+                'duracao_ms': round(duracao * 1000, 3),
+                'erro': type(erro).__name__ if erro is not None else None,
+                **{k: str(v) for k, v in rotulos.items()}
+            }, ensure_ascii=False))
+
+
+def medido(nome, **rotulos):
+    """ Decorador: mede cada chamada da função com span(nome) """
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def medir(*args, **kwargs):
+            with span(nome, **rotulos):
+                return funcao(*args, **kwargs)
+        return medir
+    return decorar
+
+
+def contar(nome, valor=1, **rotulos):
+    """ Incrementa um contador (ex: notícias coletadas por fonte) """
+    METRICAS.incrementar(nome, valor, rotulos)
+
+
+def observar(nome, valor, **rotulos):
+    """ Registra um valor num histograma (ex: tamanho do lote) """
+    METRICAS.observar(nome, valor, rotulos)
+
+
+def configurar_logs_json(nivel=logging.INFO, arquivo=None):
+    """
+    Ativa a saída dos spans como logs JSON (uma linha por evento)
+
+    Parâmetros:
+    nivel: Nível do logger de métricas
+    arquivo (str): Caminho do arquivo de log (padrão: stderr)
+    """
+    if logger.handlers:
+        return logger.handlers[0]  # Já configurado (ex: rerun do Streamlit)
+    handler = logging.FileHandler(arquivo, encoding='utf-8') if arquivo else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(nivel)
+    logger.propagate = False
+    return handler
+
+
+_servidor = None
+
+
+def iniciar_servidor_metricas(porta=9108, host='127.0.0.1'):
+    """
+    Sobe um endpoint /metrics (formato Prometheus) numa thread em segundo plano
+
+    Chamadas repetidas reaproveitam o servidor já iniciado.
+    """
+    global _servidor
+    if _servidor is not None:
+        return _servidor
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_error(404)
+                return
+            corpo = METRICAS.exportar_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    _servidor = ThreadingHTTPServer((host, porta), Handler)
+    threading.Thread(target=_servidor.serve_forever, daemon=True).start()
+    print(f"📡 Métricas em http://{host}:{porta}/metrics")
+    return _servidor
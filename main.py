@@ -1 +1,135 @@
-print("Olá! O preditor de sentimentos está pronto para começar.")
\ No newline at end of file
+"""
+Pipeline completo pela linha de comando
+
+Uso:
+    python main.py coletar PETR4 VALE3          # notícias -> data/noticias.csv
+    python main.py sentimento                   # -> data/noticias_com_sentimento.csv
+    python main.py sentimento --sentimento-backend roteador   # pt-BR -> modelo em português
+    python main.py sentimento --sentimento-backend aluno      # modelo destilado (python sentiment_student.py destilar)
+    python main.py sentimento --workers 8       # manchetes divididas entre 8 processos
+    python main.py sentimento --cache-tokens    # reaproveita o corpus pré-tokenizado (data/tokens/)
+    python main.py sentimento --reanalisar      # refaz todas as manchetes (padrão: só as novas)
+    python main.py precos PETR4 VALE3 --periodo 6mo
+    python main.py precos --yfinance reproduzir # só respostas já gravadas em data/cache/yfinance (offline)
+    python main.py treinar
+    python main.py treinar --embeddings         # + embeddings das manchetes (PCA) como features
+    python main.py tudo PETR4 VALE3 --profile   # todas as etapas, perfiladas
+
+Com --profile cada etapa roda sob cProfile + amostragem de pilhas + tracemalloc
+e os resultados vão para data/profiles/<run_id>/<etapa>.*
+"""
+import argparse
+
+from profiling import perfilar_se, novo_run_id
+
+
+def coletar(args):
+    from scraper import NoticiasScraper
+    scraper = NoticiasScraper(fontes=args.fontes)
+    scraper.buscar_multiplos_ativos(args.tickers)
+    scraper.salvar_dados()
+
+
+def sentimento(args):
+    from schema import carregar_noticias
+    from sentiment_analyzer import analisar_pendentes, criar_analisador
+
+    df_noticias = carregar_noticias('data/noticias.csv')
+    kwargs = {'cache_tokens': True} if args.cache_tokens else {}
+    if args.workers > 1:
+        from parallel_sentiment import AnalisadorParalelo
+        analyzer = AnalisadorParalelo(args.sentimento_backend, workers=args.workers, **kwargs)
+    else:
+        analyzer = criar_analisador(args.sentimento_backend, **kwargs)
+    cache = None
+    if args.embeddings:
+        from embedding_cache import CacheEmbeddings
+        cache = CacheEmbeddings(dimensao=analyzer.dimensao_embedding)
+    # Só as manchetes ainda não analisadas (--reanalisar refaz e substitui todas)
+    analisar_pendentes(analyzer, df_noticias, reanalisar=args.reanalisar,
+                       batch_size=args.batch_size, cache_embeddings=cache)
+
+
+def precos(args):
+    from price_fetcher import PriceFetcher
+    fetcher = PriceFetcher(modo=args.yfinance)
+    df_precos = fetcher.buscar_multiplas_acoes(args.tickers, periodo=args.periodo, intervalo=args.intervalo)
+    if df_precos is not None:
+        fetcher.salvar_dados(df_precos)
+
+
+def treinar(args):
+    from model_registry import gerenciador
+    from price_predictor import PriceImpactPredictor
+    from schema import carregar_noticias, carregar_precos
+
+    predictor = PriceImpactPredictor()
+    df_treino = predictor.preparar_dados(carregar_noticias(), carregar_precos(), janela=args.janela)
+    if len(df_treino) < 5:
+        print(f"⚠️ Dados insuficientes: {len(df_treino)} amostras (mínimo 5)")
+        return
+    embeddings = None
+    if args.embeddings:
+        from embedding_cache import CacheEmbeddings
+
+        analyzer = []  # FinBERT só é carregado se houver manchete fora do cache
+
+        def calcular(textos):
+            if not analyzer:
+                from sentiment_analyzer import criar_analisador
+                analyzer.append(criar_analisador(args.sentimento_backend))
+            return analyzer[0].embeddings(textos, args.batch_size)
+
+        embeddings = CacheEmbeddings().obter_ou_calcular(df_treino['titulo'].astype(str), calcular)
+
+    # Modelo global + modelos por ativo e por setor (em paralelo)
+    resumo = gerenciador().treinar(df_treino, embeddings=embeddings, n_componentes=args.componentes)
+    print(resumo.to_string(index=False))
+
+
+ETAPAS = {
+    'coletar': coletar,
+    'sentimento': sentimento,
+    'precos': precos,
+    'treinar': treinar
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sentinel AI Finance - pipeline")
+    parser.add_argument('etapa', choices=list(ETAPAS) + ['tudo'])
+    parser.add_argument('tickers', nargs='*', default=['PETR4', 'VALE3', 'ITUB4'])
+    parser.add_argument('--fontes', nargs='+', help="fontes de notícias (padrão: InfoMoney e G1)")
+    parser.add_argument('--periodo', default='1mo')
+    parser.add_argument('--intervalo', default='1d')
+    parser.add_argument('--yfinance', choices=['normal', 'gravar', 'reproduzir'],
+                        help="cache das respostas do Yahoo (padrão: $SENTINEL_YFINANCE ou normal)")
+    parser.add_argument('--janela', help="janela do retorno pós-notícia no treino (ex: 30min)")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--sentimento-backend', choices=['finbert', 'roteador', 'aluno'],
+                        help="analisador de sentimento (padrão: $SENTINEL_SENTIMENTO ou finbert)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="processos para a análise de sentimento (cada um carrega o modelo)")
+    parser.add_argument('--cache-tokens', action='store_true',
+                        help="lê/grava os input_ids das manchetes em data/tokens/ (tokeniza cada uma uma vez)")
+    parser.add_argument('--reanalisar', action='store_true',
+                        help="sentimento: analisa todas as notícias de novo (padrão: só as novas)")
+    parser.add_argument('--embeddings', action='store_true',
+                        help="guarda (sentimento) e usa (treinar) embeddings das manchetes")
+    parser.add_argument('--componentes', type=int, default=16, help="componentes PCA dos embeddings")
+    parser.add_argument('--profile', action='store_true', help="perfila cada etapa em data/profiles/")
+    parser.add_argument('--profile-modo', choices=['cprofile', 'amostragem', 'ambos'], default='ambos')
+    parser.add_argument('--run-id', help="identificador da execução (padrão: data/hora)")
+    args = parser.parse_args(argv)
+
+    etapas = list(ETAPAS) if args.etapa == 'tudo' else [args.etapa]
+    run_id = args.run_id or novo_run_id()
+
+    for nome in etapas:
+        print(f"\n▶️  {nome}")
+        with perfilar_se(args.profile, nome, run_id, modo=args.profile_modo):
+            ETAPAS[nome](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from drift_monitor import monitor
+from instrumentation import medido, contar
+from price_predictor import PriceImpactPredictor
+
+
+DIR_MODELOS = 'data/modelos'
+ARQUIVO_GLOBAL = 'data/modelo_predictor.pkl'  # modelo global (o mesmo usado pelo app)
+
+# Setor de cada ativo (ativos fora da lista usam só o modelo próprio ou o global)
+SETORES = {
+    'PETR3': 'petroleo', 'PETR4': 'petroleo', 'PRIO3': 'petroleo', 'RECV3': 'petroleo',
+    'RRRP3': 'petroleo', 'CSAN3': 'petroleo', 'UGPA3': 'petroleo', 'VBBR3': 'petroleo',
+    'VALE3': 'mineracao', 'CMIN3': 'mineracao', 'CSNA3': 'siderurgia', 'GGBR4': 'siderurgia',
+    'GOAU4': 'siderurgia', 'USIM5': 'siderurgia',
+    'ITUB4': 'bancos', 'ITUB3': 'bancos', 'BBDC4': 'bancos', 'BBDC3': 'bancos', 'BBAS3': 'bancos',
+    'SANB11': 'bancos', 'BPAC11': 'bancos', 'ITSA4': 'bancos', 'B3SA3': 'financeiro',
+    'BBSE3': 'financeiro', 'CXSE3': 'financeiro',
+    'ELET3': 'energia', 'ELET6': 'energia', 'EQTL3': 'energia', 'CMIG4': 'energia',
+    'CPLE6': 'energia', 'TAEE11': 'energia', 'EGIE3': 'energia', 'ENEV3': 'energia',
+    'SBSP3': 'saneamento', 'SAPR11': 'saneamento',
+    'ABEV3': 'consumo', 'MGLU3': 'varejo', 'LREN3': 'varejo', 'ASAI3': 'varejo', 'CRFB3': 'varejo',
+    'BRFS3': 'alimentos', 'JBSS3': 'alimentos', 'MRFG3': 'alimentos', 'BEEF3': 'alimentos',
+    'SUZB3': 'papel_celulose', 'KLBN11': 'papel_celulose',
+    'WEGE3': 'industria', 'EMBR3': 'industria', 'RENT3': 'locacao',
+    'VIVT3': 'telecom', 'TIMS3': 'telecom',
+    'RDOR3': 'saude', 'HAPV3': 'saude', 'RADL3': 'saude'
+}
+
+
+def setor_de(ticker):
+    """ Setor do ativo, ou None se não estiver em SETORES """
+    return SETORES.get(str(ticker).upper())
+
+
+def _arquivo_modelo(diretorio, chave):
+    return os.path.join(diretorio, chave.replace(':', '_') + '.pkl')
+
+
+class GerenciadorModelos:
+    """
+    Modelos de impacto por ativo, por setor e global
+
+    A previsão de um ativo usa o modelo mais específico disponível:
+    ticker:<ATIVO> -> setor:<SETOR> -> global. Grupos com menos de
+    `min_amostras` notícias não ganham modelo próprio e caem no próximo nível.
+
+    Os modelos ficam em disco e são carregados sob demanda num cache LRU
+    limitado por memória (tamanho estimado pelo arquivo salvo).
+    """
+
+    def __init__(self, diretorio=DIR_MODELOS, min_amostras=50, memoria_max_mb=512, max_workers=None):
+        """
+        Parâmetros:
+        diretorio (str): Onde ficam os modelos por ativo/setor e o índice
+        min_amostras (int): Mínimo de exemplos para treinar um modelo próprio
+        memoria_max_mb (float): Limite do cache de modelos carregados
+        max_workers (int): Modelos treinados em paralelo (padrão: nº de CPUs)
+        """
+        self.diretorio = diretorio
+        self.min_amostras = min_amostras
+        self.memoria_max = memoria_max_mb * 1024 ** 2
+        self.max_workers = max_workers or os.cpu_count()
+        self.indice = {}
+        self._versao_indice = None
+        self._cache = OrderedDict()  # chave -> (predictor, bytes, mtime do arquivo)
+        self._lock = threading.Lock()
+        self._ler_indice()
+
+    # ==================
+    # TREINO
+    # ==================
+
+    def _ler_indice(self):
+        """ Relê o índice se outro processo (ex: python main.py treinar) o atualizou """
+        caminho = os.path.join(self.diretorio, 'indice.json')
+        versao = os.path.getmtime(caminho) if os.path.exists(caminho) else None
+        if versao != self._versao_indice:
+            self.indice = {}
+            if versao is not None:
+                with open(caminho, encoding='utf-8') as f:
+                    self.indice = json.load(f)
+            self._versao_indice = versao
+
+    def _salvar_indice(self):
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho = os.path.join(self.diretorio, 'indice.json')
+        temporario = caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.indice, f, indent=2, ensure_ascii=False)
+        os.replace(temporario, caminho)
+        self._versao_indice = os.path.getmtime(caminho)
+
+    def grupos(self, df_treino):
+        """
+        Subconjuntos de treino com dados suficientes
+
+        Retorna:
+        dict: chave ('ticker:PETR4', 'setor:bancos') -> DataFrame
+        """
+        grupos = {}
+        tickers = df_treino['ticker'].astype(str)
+        for ticker, idx in tickers.groupby(tickers).groups.items():
+            if len(idx) >= self.min_amostras:
+                grupos[f'ticker:{ticker}'] = df_treino.loc[idx]
+
+        setores = tickers.map(setor_de)
+        for setor, idx in setores.dropna().groupby(setores.dropna()).groups.items():
+            # Setor com um único ativo seria igual ao modelo do ativo
+            if len(idx) >= self.min_amostras and tickers.loc[idx].nunique() > 1:
+                grupos[f'setor:{setor}'] = df_treino.loc[idx]
+        return grupos
+
+    def _treinar_grupo(self, chave, df, embeddings=None, n_componentes=16):
+        predictor = PriceImpactPredictor()
+        mae, r2 = predictor.treinar_modelo(df, n_jobs=1, verbose=False,
+                                           embeddings=embeddings, n_componentes=n_componentes)
+        arquivo = ARQUIVO_GLOBAL if chave == 'global' else _arquivo_modelo(self.diretorio, chave)
+        os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+        predictor.salvar_modelo(arquivo)
+        return chave, {
+            'nivel': chave.split(':')[0],
+            'amostras': len(df),
+            'mae': round(float(mae), 4),
+            'r2': round(float(r2), 4),
+            'arquivo': arquivo
+        }
+
+    @medido('modelos.treinar')
+    def treinar(self, df_treino, incluir_global=True, embeddings=None, n_componentes=16):
+        """
+        Treina o modelo global e os modelos por ativo e por setor em paralelo
+
+        Cada floresta usa um core (n_jobs=1) e os modelos rodam em threads:
+        o scikit-learn libera o GIL durante a construção das árvores.
+
+        Parâmetros:
+        df_treino (DataFrame): Saída de PriceImpactPredictor.preparar_dados
+        incluir_global (bool): Retreina também o modelo global
+        embeddings (ndarray): Embeddings das manchetes, uma linha por linha de df_treino
+        n_componentes (int): Componentes do PCA dos embeddings usados por cada modelo
+
+        Retorna:
+        DataFrame: Uma linha por modelo treinado (nível, amostras, MAE, R²)
+        """
+        tarefas = self.grupos(df_treino)
+        if incluir_global:
+            tarefas['global'] = df_treino
+        print(f"🎓 Treinando {len(tarefas)} modelos ({self.max_workers} em paralelo)...")
+
+        if embeddings is not None:
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+
+        def treinar_grupo(item):
+            chave, df = item
+            parte = None if embeddings is None else embeddings[df_treino.index.get_indexer(df.index)]
+            return self._treinar_grupo(chave, df, parte, n_componentes)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            resultados = list(executor.map(treinar_grupo, tarefas.items()))
+
+        # O índice passa a ter só os modelos deste treino (grupos que ficaram
+        # com poucos dados perdem o modelo próprio); o global antigo é mantido
+        # se não foi retreinado
+        global_anterior = None if incluir_global else self.indice.get('global')
+        self.indice = dict(resultados)
+        if global_anterior:
+            self.indice['global'] = global_anterior
+        self._salvar_indice()
+        with self._lock:
+            self._cache.clear()
+
+        resumo = pd.DataFrame([{'modelo': chave, **info} for chave, info in resultados])
+        print(f"✅ {len(resultados)} modelos salvos em {self.diretorio}")
+        return resumo.drop(columns='arquivo').sort_values('modelo').reset_index(drop=True)
+
+    # ==================
+    # PREVISÃO
+    # ==================
+
+    def rota(self, ticker):
+        """
+        Modelo que atende o ativo: o mais específico disponível
+
+        Retorna:
+        str: 'ticker:<ATIVO>', 'setor:<SETOR>' ou 'global' (None se nada foi treinado)
+        """
+        self._ler_indice()
+        ticker = str(ticker).upper()
+        setor = setor_de(ticker)
+        for chave in (f'ticker:{ticker}', f'setor:{setor}' if setor else None, 'global'):
+            if chave in self.indice:
+                return chave
+        return 'global' if os.path.exists(ARQUIVO_GLOBAL) else None
+
+    def modelo(self, chave):
+        """ Predictor da chave, do cache LRU ou do disco (se o arquivo mudou) """
+        arquivo = self.indice.get(chave, {}).get('arquivo', ARQUIVO_GLOBAL if chave == 'global' else None)
+        if arquivo is None or not os.path.exists(arquivo):
+            return None
+        versao = os.path.getmtime(arquivo)
+
+        with self._lock:
+            if chave in self._cache and self._cache[chave][2] == versao:
+                self._cache.move_to_end(chave)
+                contar('modelos.cache', resultado='hit')
+                return self._cache[chave][0]
+
+        contar('modelos.cache', resultado='miss')
+        predictor = PriceImpactPredictor()
+        if not predictor.carregar_modelo(arquivo):
+            return None
+
+        with self._lock:
+            self._cache[chave] = (predictor, os.path.getsize(arquivo), versao)
+            # Descarta os menos usados até caber no limite (mantém ao menos o atual)
+            while len(self._cache) > 1 and self.memoria_mb() * 1024 ** 2 > self.memoria_max:
+                self._cache.popitem(last=False)
+        return predictor
+
+    def memoria_mb(self):
+        """ Memória estimada dos modelos carregados, em MB """
+        return sum(tamanho for _, tamanho, _ in self._cache.values()) / 1024 ** 2
+
+    def prever(self, ticker, sentimento, confianca, score_positivo, score_negativo, score_neutro,
+               embedding=None):
+        """
+        Prevê o impacto de uma notícia com o modelo do ativo
+
+        Parâmetros:
+        embedding (ndarray): Embedding da manchete (para modelos treinados com embeddings)
+
+        Retorna:
+        dict: Resultado de prever_impacto + 'modelo' (chave usada), ou None
+        """
+        chave = self.rota(ticker)
+        predictor = self.modelo(chave) if chave else None
+        if predictor is None:
+            print("❌ Nenhum modelo treinado ainda!")
+            return None
+        resultado = predictor.prever_impacto(sentimento, confianca, score_positivo,
+                                             score_negativo, score_neutro, embedding)
+        resultado['modelo'] = chave
+        monitor().observar_previsoes(
+            pd.DataFrame([{'confianca': confianca, 'score_positivo': score_positivo,
+                           'score_negativo': score_negativo, 'score_neutro': score_neutro}]),
+            [resultado['variacao_prevista']])
+        return resultado
+
+    @medido('modelos.prever_lote')
+    def prever_lote(self, df, embeddings=None):
+        """
+        Prevê o impacto de várias notícias, cada ativo com o seu modelo
+
+        Parâmetros:
+        df: DataFrame com ticker, sentimento, confianca e scores
+        embeddings (ndarray): Embeddings das manchetes, uma linha por linha de df
+
+        Retorna:
+        DataFrame: variacao_prevista, direcao e modelo, com o índice de df
+        """
+        partes = []
+        tickers = df['ticker'].astype(str).str.upper()
+        for ticker, idx in tickers.groupby(tickers).groups.items():
+            chave = self.rota(ticker)
+            predictor = self.modelo(chave) if chave else None
+            if predictor is None:
+                continue
+            parte = predictor.prever_lote(
+                df.loc[idx], None if embeddings is None else np.asarray(embeddings)[df.index.get_indexer(idx)])
+            parte['modelo'] = chave
+            partes.append(parte)
+
+        if not partes:
+            return pd.DataFrame(columns=['variacao_prevista', 'direcao', 'modelo'])
+        resultado = pd.concat(partes).reindex(df.index)
+        previstas = resultado['variacao_prevista'].notna().to_numpy()
+        monitor().observar_previsoes(df[previstas], resultado['variacao_prevista'][previstas])
+        return resultado
+
+
+_gerenciador = None
+
+
+def gerenciador():
+    """ Gerenciador de modelos compartilhado pelo processo """
+    global _gerenciador
+    if _gerenciador is None:
+        _gerenciador = GerenciadorModelos()
+    return _gerenciador
+
+
+if __name__ == "__main__":
+    from schema import carregar_noticias, carregar_precos
+
+    df_treino = PriceImpactPredictor().preparar_dados(carregar_noticias(), carregar_precos())
+    print(gerenciador().treinar(df_treino).to_string(index=False))
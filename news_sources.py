@@ -0,0 +1,215 @@
+from bs4 import BeautifulSoup
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import xml.etree.ElementTree as ET
+import random
+import time
+
+
+# Registro de fontes: nome -> fábrica (classe ou função) que cria o adaptador
+FONTES = {}
+
+# Fontes usadas quando o scraper é criado sem lista explícita
+FONTES_PADRAO = ['InfoMoney', 'G1']
+
+
+def registrar_fonte(nome, fabrica=None):
+    """
+    Registra um adaptador de fonte de notícias
+
+    Pode ser usado como decorador de classe (`@registrar_fonte('Nome')`)
+    ou chamado diretamente com uma fábrica (`registrar_fonte('Nome', lambda: ...)`).
+    """
+    def registrar(f):
+        FONTES[nome] = f
+        return f
+
+    if fabrica is not None:
+        return registrar(fabrica)
+    return registrar
+
+
+def criar_fontes(nomes=None):
+    """
+    Instancia os adaptadores registrados
+
+    Parâmetros:
+    nomes (list): Nomes das fontes (padrão: FONTES_PADRAO)
+
+    Retorna:
+    list: Adaptadores prontos para uso
+    """
+    nomes = FONTES_PADRAO if nomes is None else nomes
+    desconhecidas = [n for n in nomes if n not in FONTES]
+    if desconhecidas:
+        raise ValueError(f"Fontes não registradas: {', '.join(desconhecidas)}")
+    return [FONTES[n]() for n in nomes]
+
+
+class FonteNoticias:
+    """
+    Interface base dos adaptadores de fonte de notícias
+
+    Cada fonte só precisa saber montar as URLs de busca e extrair as
+    notícias do conteúdo baixado. Paralelismo, timeout, retry e circuit
+    breaker ficam a cargo do NoticiasScraper.
+    """
+
+    nome = None
+    timeout = 15          # timeout (s) de cada requisição HTTP
+    tempo_limite = 60     # tempo máximo (s) da tarefa ticker × fonte
+    tentativas = 3        # tentativas por requisição
+    concorrencia = None   # tarefas simultâneas da fonte (padrão: fatia igual do pool)
+    pausa_paginas = None  # (min, max) de pausa entre páginas da mesma fonte
+
+    def urls(self, ticker):
+        """Lista de URLs a visitar, em ordem (ex: páginas de busca)"""
+        raise NotImplementedError
+
+    def parsear(self, conteudo, ticker):
+        """Extrai a lista de notícias (dicts) do conteúdo de uma URL"""
+        raise NotImplementedError
+
+    def buscar(self, ticker, baixar):
+        """
+        Busca as notícias de um ticker nesta fonte
+
+        Parâmetros:
+        ticker (str): Código da ação
+        baixar (callable): Função url -> conteúdo (bytes) ou None
+
+        Retorna:
+        list: Notícias encontradas
+        """
+        noticias = []
+        for i, url in enumerate(self.urls(ticker)):
+            if i > 0 and self.pausa_paginas:
+                time.sleep(random.uniform(*self.pausa_paginas))
+
+            conteudo = baixar(url)
+            if conteudo is None:
+                continue
+
+            itens = self.parsear(conteudo, ticker)
+            if not itens:
+                break  # Página vazia: não há mais resultados
+            noticias.extend(itens)
+        return noticias
+
+    def noticia(self, ticker, titulo, link, data):
+        return {
+            'ticker': ticker,
+            'titulo': titulo,
+            'link': link,
+            'data': data,
+            'fonte': self.nome,
+            # Momento da coleta: base para datas relativas ("há 2 horas")
+            'coletado_em': datetime.now(timezone.utc).isoformat()
+        }
+
+
+@registrar_fonte('InfoMoney')
+class FonteInfoMoney(FonteNoticias):
+    """ Busca no InfoMoney com suporte a múltiplas páginas (Histórico) """
+
+    nome = 'InfoMoney'
+    pausa_paginas = (1, 3)  # Pausa humana para não ser banido
+
+    def __init__(self, num_paginas=2):
+        self.num_paginas = num_paginas
+
+    def urls(self, ticker):
+        # A URL muda dependendo da página para pegar notícias antigas
+        return [f"https://www.infomoney.com.br/busca/?q={ticker}&page={pagina}"
+                for pagina in range(1, self.num_paginas + 1)]
+
+    def parsear(self, conteudo, ticker):
+        soup = BeautifulSoup(conteudo, 'html.parser')
+        noticias = []
+        for artigo in soup.find_all('article'):
+            titulo_tag = artigo.find('h2') or artigo.find('h3')
+            if titulo_tag:
+                titulo = titulo_tag.get_text(strip=True)
+                link = artigo.find('a')['href'] if artigo.find('a') else ""
+                data_tag = artigo.find('time')
+                data = data_tag.get_text(strip=True) if data_tag else "Data antiga"
+                noticias.append(self.noticia(ticker, titulo, link, data))
+        return noticias
+
+
+@registrar_fonte('G1')
+class FonteG1(FonteNoticias):
+    """ Fonte extra: G1 Economia """
+
+    nome = 'G1'
+
+    def urls(self, ticker):
+        return [f"https://g1.globo.com/busca/?q={ticker}"]
+
+    def parsear(self, conteudo, ticker):
+        soup = BeautifulSoup(conteudo, 'html.parser')
+
+        # No G1 as notícias ficam em 'widget--info__text-container'
+        itens = soup.find_all('div', class_='widget--info__text-container', limit=5)
+
+        noticias = []
+        for item in itens:
+            titulo_tag = item.find('div', class_='widget--info__title')
+            link_tag = item.find('a')
+            if titulo_tag is None or link_tag is None:
+                continue
+            # A busca do G1 mostra a data em 'widget--info__meta' ("há 3 horas")
+            meta_tag = item.find('div', class_='widget--info__meta')
+            data = (meta_tag.get_text(strip=True) if meta_tag
+                    else datetime.now().strftime('%d/%m/%Y'))
+            noticias.append(self.noticia(
+                ticker,
+                titulo_tag.get_text(strip=True),
+                "https:" + link_tag['href'],
+                data
+            ))
+        return noticias
+
+
+class FonteRSS(FonteNoticias):
+    """
+    Adaptador genérico para feeds RSS 2.0
+
+    Parâmetros:
+    nome (str): Nome da fonte gravado na coluna 'fonte'
+    url_template (str): URL do feed com '{ticker}' no lugar do código
+    limite (int): Máximo de itens lidos por feed
+    """
+
+    def __init__(self, nome, url_template, limite=20):
+        self.nome = nome
+        self.url_template = url_template
+        self.limite = limite
+
+    def urls(self, ticker):
+        return [self.url_template.format(ticker=ticker)]
+
+    def parsear(self, conteudo, ticker):
+        raiz = ET.fromstring(conteudo)
+        noticias = []
+        for item in raiz.iter('item'):
+            titulo = (item.findtext('title') or '').strip()
+            if not titulo:
+                continue
+            link = (item.findtext('link') or '').strip()
+            data = (item.findtext('pubDate') or '').strip()
+            if data:
+                try:
+                    data = parsedate_to_datetime(data).isoformat()
+                except (TypeError, ValueError):
+                    pass
+            noticias.append(self.noticia(ticker, titulo, link, data))
+            if len(noticias) >= self.limite:
+                break
+        return noticias
+
+
+registrar_fonte('GoogleNews', lambda: FonteRSS(
+    'GoogleNews',
+    'https://news.google.com/rss/search?q={ticker}&hl=pt-BR&gl=BR&ceid=BR:pt-419'
+))
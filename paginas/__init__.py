@@ -0,0 +1,25 @@
+"""
+Páginas do dashboard
+
+Cada página é um módulo com uma função render(arquivos, modo_profiling).
+Os módulos só são importados quando a página é aberta, e bibliotecas pesadas
+(pandas, plotly, torch/transformers, scikit-learn) são importadas dentro das
+funções, no momento em que a página ou a ação precisa delas.
+"""
+import importlib
+
+
+# Nome no menu -> módulo da página
+PAGINAS = {
+    "Dashboard": "paginas.dashboard",
+    "Notícias": "paginas.noticias",
+    "Sentimento": "paginas.sentimento",
+    "Preços": "paginas.precos",
+    "Previsão": "paginas.previsao",
+    "Consultas SQL": "paginas.consultas"
+}
+
+
+def carregar(nome):
+    """ Importa (uma vez) o módulo da página escolhida no menu """
+    return importlib.import_module(PAGINAS[nome])
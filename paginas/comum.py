@@ -0,0 +1,86 @@
+"""
+Utilitários leves compartilhados pelas páginas (sem pandas)
+"""
+import functools
+
+import streamlit as st
+
+from instrumentation import medido
+
+
+def fragmento(nome, topicos=()):
+    """
+    Decorador: transforma a função num st.fragment medido por span('app.fragmento')
+
+    Interagir com um widget dentro do fragmento reexecuta só a função,
+    e não a página inteira.
+
+    Parâmetros:
+    topicos (tuple): Arquivos de que o fragmento depende ('noticias', 'sentimentos',
+        'precos', 'modelo'); quando um deles muda em disco o vigia
+        (file_watcher) reexecuta o fragmento nas sessões abertas
+    """
+    def decorar(funcao):
+        medida = medido('app.fragmento', fragmento=nome)(funcao)
+        if not topicos:
+            return st.fragment(medida)
+
+        @functools.wraps(funcao)
+        def registrada(*args, **kwargs):
+            from file_watcher import vigia
+            vigia().registrar_fragmento(topicos)
+            return medida(*args, **kwargs)
+        return st.fragment(registrada)
+    return decorar
+
+
+def tabela_paginada(df, chave, coluna_data=None, categorias=('ticker',), ordenacao_padrao=None, altura=400):
+    """
+    Tabela com filtros, ordenação e paginação feitos no servidor
+
+    Só a página visível é enviada ao navegador. Chame dentro de um
+    fragmento para que mexer nos controles reexecute apenas a tabela.
+
+    Parâmetros:
+    df (DataFrame): Dataset completo (ex: storage.sentimentos())
+    chave (str): Prefixo único das keys dos widgets
+    coluna_data (str): Coluna para o filtro de período
+    categorias (tuple): Colunas com filtro de múltipla escolha
+    ordenacao_padrao (str): Coluna inicial de ordenação
+    """
+    from storage import consultar, filtrar
+
+    colunas_filtro = [c for c in categorias if c in df.columns]
+    cols = st.columns(len(colunas_filtro) + (1 if coluna_data in df.columns else 0) or 1)
+    filtros = {}
+    for col, coluna in zip(cols, colunas_filtro):
+        opcoes = sorted(df[coluna].dropna().unique().tolist())
+        filtros[coluna] = col.multiselect(coluna.capitalize(), opcoes, key=f"{chave}_{coluna}")
+
+    inicio = fim = None
+    if coluna_data in df.columns and df[coluna_data].notna().any():
+        minimo, maximo = df[coluna_data].min().date(), df[coluna_data].max().date()
+        periodo = cols[-1].date_input("Período", (minimo, maximo), min_value=minimo,
+                                      max_value=maximo, key=f"{chave}_periodo")
+        if isinstance(periodo, (tuple, list)) and len(periodo) == 2:
+            inicio, fim = periodo
+
+    col_ord, col_dir, col_tam, col_pag = st.columns([2, 1, 1, 1])
+    colunas = list(df.columns)
+    ordenar_por = col_ord.selectbox(
+        "Ordenar por", colunas, key=f"{chave}_ordem",
+        index=colunas.index(ordenacao_padrao) if ordenacao_padrao in colunas else 0
+    )
+    crescente = col_dir.radio("Ordem", ["↓", "↑"], horizontal=True, key=f"{chave}_dir") == "↑"
+    tamanho = col_tam.selectbox("Linhas", [25, 50, 100, 250], index=1, key=f"{chave}_tamanho")
+
+    # Total após os filtros (sem ordenar) para limitar o seletor de página
+    total = int(filtrar(df, filtros, coluna_data, inicio, fim).sum())
+    paginas = max((total + tamanho - 1) // tamanho, 1)
+    pagina = col_pag.number_input(f"Página (de {paginas})", 1, paginas, 1, key=f"{chave}_pagina")
+
+    dados, total = consultar(df, filtros, coluna_data, inicio, fim, ordenar_por,
+                             crescente, pagina, tamanho)
+    st.dataframe(dados, use_container_width=True, height=altura, hide_index=True)
+    primeira = (pagina - 1) * tamanho + 1 if total else 0
+    st.caption(f"Mostrando {primeira}–{primeira + len(dados) - 1 if total else 0} de {total} registros")
@@ -0,0 +1,66 @@
+"""
+Consultas SQL ad hoc sobre notícias, sentimentos e preços (DuckDB)
+"""
+import time
+
+import streamlit as st
+
+from paginas.comum import fragmento
+
+
+LIMITE_EXIBICAO = 1000
+
+
+def render(arquivos, modo_profiling=False):
+    """
+    Parâmetros:
+    arquivos (dict): Quais etapas do pipeline já têm arquivo salvo
+    modo_profiling (bool): Não usado nesta página
+    """
+    st.header("Consultas SQL")
+
+    if not (arquivos['Notícias'] or arquivos['Sentimentos'] or arquivos['Preços']):
+        st.warning("Nenhum dado salvo ainda. Colete notícias ou importe preços primeiro.")
+        return
+
+    st.info("💡 Tabelas: **noticias**, **sentimentos** e **precos**. "
+            "As consultas rodam no DuckDB sobre cópias em parquet dos CSVs.")
+    editor()
+
+
+@fragmento('consultas.editor')
+def editor():
+    """ Editor e resultado da consulta (fragmento: reexecuta sozinho) """
+    import duckdb
+    from query_engine import CONSULTAS_EXEMPLO, ConsultaNaoPermitida, motor
+
+    with st.expander("📋 Tabelas e colunas"):
+        for nome, colunas in motor().tabelas().items():
+            st.markdown(f"**{nome}**")
+            st.dataframe(colunas, use_container_width=True, hide_index=True)
+
+    exemplo = st.selectbox("Exemplos:", list(CONSULTAS_EXEMPLO), key="sql_exemplo")
+    sql = st.text_area("SQL:", CONSULTAS_EXEMPLO[exemplo].strip(), height=260, key=f"sql_{exemplo}")
+    executar = st.button("▶️ Executar", key="btn_sql")
+
+    if not executar:
+        return
+
+    try:
+        inicio = time.perf_counter()
+        # Conexão só de leitura: a página não grava arquivos nem altera as views
+        resultado = motor().consultar_leitura(sql)
+        duracao = (time.perf_counter() - inicio) * 1000
+    except ConsultaNaoPermitida as e:
+        st.error(f"❌ {e}")
+        return
+    except duckdb.Error as e:
+        st.error(f"❌ Erro na consulta: {str(e)}")
+        return
+
+    st.success(f"✓ {len(resultado)} linhas em {duracao:.0f} ms")
+    st.dataframe(resultado.head(LIMITE_EXIBICAO), use_container_width=True, height=400, hide_index=True)
+    if len(resultado) > LIMITE_EXIBICAO:
+        st.caption(f"Mostrando as primeiras {LIMITE_EXIBICAO} linhas; baixe o CSV para o resultado completo")
+    st.download_button("💾 Baixar CSV", resultado.to_csv(index=False).encode('utf-8-sig'),
+                       file_name="consulta.csv", mime="text/csv", key="btn_sql_csv")
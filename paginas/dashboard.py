@@ -0,0 +1,462 @@
+"""
+Página inicial: status do pipeline, contagens e gráficos de resumo
+"""
+import streamlit as st
+
+from profiling import perfilar_se
+from paginas.comum import fragmento
+
+
+def render(arquivos, modo_profiling=False):
+    """
+    Parâmetros:
+    arquivos (dict): Quais etapas do pipeline já têm arquivo salvo
+    modo_profiling (bool): Perfila as ações pesadas (treino, sentimento)
+    """
+    st.header("Dashboard Principal")
+    
+    # Barra de progresso horizontal no topo com setas
+    st.markdown("### Status do Pipeline")
+    
+    # Container centralizado para a barra de progresso
+    progress_container = st.container()
+    with progress_container:
+        # Criar layout com setas entre os passos
+        cols = st.columns([3, 1, 3, 1, 3, 1, 3])
+        
+        with cols[0]:
+            status = "Ativo" if arquivos['Notícias'] else "Pendente"
+            color = "#38ef7d" if arquivos['Notícias'] else "#666"
+            border_color = "#38ef7d" if arquivos['Notícias'] else "#333"
+            st.markdown(f"""
+                <div style='text-align: center; padding: 15px; background: rgba(255,255,255,0.05); 
+                            border-radius: 8px; border: 2px solid {border_color}; color: {color};'>
+                    <b>1. Notícias</b><br><small>{status}</small>
+                </div>
+            """, unsafe_allow_html=True)
+        
+        with cols[1]:
+            st.markdown("<div style='text-align: center; padding: 20px 0; font-size: 1.5em; color: #666;'>→</div>", unsafe_allow_html=True)
+        
+        with cols[2]:
+            status = "Ativo" if arquivos['Sentimentos'] else "Pendente"
+            color = "#38ef7d" if arquivos['Sentimentos'] else "#666"
+            border_color = "#38ef7d" if arquivos['Sentimentos'] else "#333"
+            st.markdown(f"""
+                <div style='text-align: center; padding: 15px; background: rgba(255,255,255,0.05); 
+                            border-radius: 8px; border: 2px solid {border_color}; color: {color};'>
+                    <b>2. Sentimento</b><br><small>{status}</small>
+                </div>
+            """, unsafe_allow_html=True)
+        
+        with cols[3]:
+            st.markdown("<div style='text-align: center; padding: 20px 0; font-size: 1.5em; color: #666;'>→</div>", unsafe_allow_html=True)
+        
+        with cols[4]:
+            status = "Ativo" if arquivos['Preços'] else "Pendente"
+            color = "#38ef7d" if arquivos['Preços'] else "#666"
+            border_color = "#38ef7d" if arquivos['Preços'] else "#333"
+            st.markdown(f"""
+                <div style='text-align: center; padding: 15px; background: rgba(255,255,255,0.05); 
+                            border-radius: 8px; border: 2px solid {border_color}; color: {color};'>
+                    <b>3. Preços</b><br><small>{status}</small>
+                </div>
+            """, unsafe_allow_html=True)
+        
+        with cols[5]:
+            st.markdown("<div style='text-align: center; padding: 20px 0; font-size: 1.5em; color: #666;'>→</div>", unsafe_allow_html=True)
+        
+        with cols[6]:
+            status = "Treinado" if arquivos['Modelo'] else "Não Treinado"
+            color = "#38ef7d" if arquivos['Modelo'] else "#ff5858"
+            border_color = "#38ef7d" if arquivos['Modelo'] else "#ff5858"
+            st.markdown(f"""
+                <div style='text-align: center; padding: 15px; background: rgba(255,255,255,0.05); 
+                            border-radius: 8px; border: 2px solid {border_color}; color: {color};'>
+                    <b>4. Modelo</b><br><small>{status}</small>
+                </div>
+            """, unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    # Métricas principais com cards coloridos (contagens atualizadas pelo vigia de arquivos)
+    col_contagens, col4 = st.columns([3, 1])
+
+    with col_contagens:
+        cartoes_contagens()
+    
+    with col4:
+        # Card com destaque especial se modelo não estiver treinado
+        if not arquivos['Modelo']:
+            # Container para alinhar card e botão perfeitamente
+            card_container = st.container()
+            with card_container:
+                st.markdown(f"""
+                    <div class="metric-card-alert">
+                        <div class="metric-label">MODELO</div>
+                        <div class="metric-value">N/A</div>
+                        <div class="metric-label">Requer Treinamento</div>
+                    </div>
+                """, unsafe_allow_html=True)
+                
+                # Espaçamento mínimo
+                st.markdown("<div style='height: 10px;'></div>", unsafe_allow_html=True)
+                
+                # Botão direto para treinar - mesma largura do card com animação
+                if arquivos['Sentimentos'] and arquivos['Preços']:
+                    # Adicionar pulso visual se modelo não treinado
+                    st.markdown("""
+                        <style>
+                        @keyframes pulse-button {
+                            0%, 100% { transform: scale(1); }
+                            50% { transform: scale(1.05); }
+                        }
+                        .stButton > button[kind="primary"] {
+                            animation: pulse-button 2s infinite;
+                            font-weight: bold;
+                            font-size: 1.1em;
+                        }
+                        </style>
+                    """, unsafe_allow_html=True)
+                    
+                    if st.button("🚀 TREINAR AGORA", key="btn_treinar_dashboard", use_container_width="always", type="primary"):
+                        # Status visual com etapas
+                        status_container = st.status("Iniciando treinamento...", expanded=True)
+                        
+                        try:
+                            from model_registry import gerenciador
+                            from price_predictor import PriceImpactPredictor
+                            from schema import carregar_noticias, carregar_precos
+                            
+                            with status_container, perfilar_se(modo_profiling, 'treinar_modelo'):
+                                st.write("📂 Carregando dados...")
+                                df_not = carregar_noticias()
+                                df_prec = carregar_precos()
+                                
+                                # Diagnóstico por ativo
+                                st.write("🔍 Analisando por ativo...")
+                                ativos_not = df_not['ticker'].value_counts()
+                                ativos_prec = df_prec['ticker'].value_counts() if 'ticker' in df_prec.columns else None
+                                
+                                if ativos_prec is not None:
+                                    col_a, col_b = st.columns(2)
+                                    with col_a:
+                                        st.write("**Notícias por ativo:**")
+                                        for ativo, count in ativos_not.items():
+                                            st.write(f"• {ativo}: {count} notícias")
+                                    with col_b:
+                                        st.write("**Preços por ativo:**")
+                                        for ativo, count in ativos_prec.items():
+                                            st.write(f"• {ativo}: {count} registros")
+                                
+                                st.write("🤖 Preparando dataset...")
+                                predictor = PriceImpactPredictor()
+                                df_treino = predictor.preparar_dados(df_not, df_prec)
+                                
+                                st.write(f"✅ Dataset preparado: **{len(df_treino)} exemplos**")
+                                
+                                # Verificação com feedback detalhado
+                                if len(df_treino) >= 5:
+                                    st.write("🎓 Treinando modelos de Machine Learning (global, por ativo e por setor)...")
+                                    progress_bar = st.progress(0)
+                                    
+                                    import time
+                                    progress_bar.progress(30)
+                                    
+                                    # Mesmo caminho do main.py: atualiza o índice de modelos usado nas previsões
+                                    resumo = gerenciador().treinar(df_treino)
+                                    modelo_global = resumo.set_index('modelo').loc['global']
+                                    progress_bar.progress(100)
+                                    
+                                    st.write(f"✅ {len(resumo)} modelos treinados e salvos!")
+                                    
+                                    status_container.update(label="✅ Treinamento concluído!", state="complete")
+                                    
+                                    st.success(f"🎉 {len(resumo)} modelos treinados com sucesso! "
+                                               f"Global - MAE: {modelo_global['mae']:.2f}% | R²: {modelo_global['r2']:.3f}")
+                                    st.balloons()
+                                    
+                                    time.sleep(1)
+                                    st.rerun()
+                                else:
+                                    status_container.update(label="⚠ Dados insuficientes", state="error")
+                                    
+                                    st.error(f"**Dados insuficientes:** {len(df_treino)} amostras encontradas")
+                                    st.warning("**Requisito mínimo:** 5 amostras para treinar o modelo")
+                                    
+                                    # Diagnóstico visual
+                                    col1, col2, col3 = st.columns(3)
+                                    col1.metric("Notícias", len(df_not))
+                                    col2.metric("Preços", len(df_prec))
+                                    col3.metric("Dataset", len(df_treino), delta=f"{len(df_treino)-5} faltam")
+                                    
+                                    # Verificar sincronização
+                                    ativos_comuns = set(df_not['ticker'].unique()) & set(df_prec['ticker'].unique() if 'ticker' in df_prec.columns else [])
+                                    
+                                    if len(ativos_comuns) == 0:
+                                        st.error("🚨 **Problema de Sincronização:** Nenhum ativo em comum!")
+                                        st.info("Certifique-se de buscar preços dos mesmos tickers das notícias")
+                                    else:
+                                        st.info(f"Ativos sincronizados: {', '.join(ativos_comuns)}")
+                                    
+                                    with st.expander("💡 Como corrigir?"):
+                                        st.markdown("""
+                                        ### Soluções Recomendadas
+                                        
+                                        **1. Colete mais notícias:**
+                                        - Vá para **Notícias**
+                                        - Use período de **3-6 meses**
+                                        - Adicione mais tickers
+                                        
+                                        **2. Sincronize os ativos:**
+                                        - Notícias de PETR4 → Preços de PETR4
+                                        - Use os **mesmos códigos** em ambas as etapas
+                                        
+                                        **3. Aumente período de preços:**
+                                        - Em **Preços**, selecione **6 meses** ou **1 ano**
+                                        - Mais dados históricos = mais cruzamentos
+                                        """)
+                        except Exception as e:
+                            status_container.update(label="❌ Erro no treinamento", state="error")
+                            st.error(f"Erro: {str(e)}")
+                            st.info("Verifique os arquivos de dados e tente novamente")
+                else:
+                    st.button("Complete etapas 1-3", key="btn_disabled", use_container_width=True, disabled=True)
+                    st.caption("⚠ Necessário: Notícias + Sentimento + Preços")
+        else:
+            st.markdown(f"""
+                <div class="metric-card-green">
+                    <div class="metric-label">MODELO</div>
+                    <div class="metric-value">OK</div>
+                    <div class="metric-label">Treinado</div>
+                </div>
+            """, unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    # Gráficos lado a lado
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        grafico_performance(arquivos)
+
+    with col2:
+        grafico_sentimento(arquivos)
+
+
+@fragmento('dashboard.contagens', topicos=('noticias', 'sentimentos', 'precos'))
+def cartoes_contagens():
+    """ Cards de notícias, análises e preços (contagens em memória, sem ler os CSVs) """
+    from file_watcher import vigia
+
+    atual = vigia()
+    total_news = atual.agregado('noticias').registros
+    analyzed = atual.agregado('sentimentos').registros
+    price_records = atual.agregado('precos').registros
+
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.markdown(f"""
+            <div class="metric-card-green">
+                <div class="metric-label">Base Local</div>
+                <div class="metric-value">{total_news}</div>
+                <div class="metric-label">Notícias</div>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    with col2:
+        variation = "+0.5%" if analyzed > 0 else "0.0%"
+        st.markdown(f"""
+            <div class="metric-card-blue">
+                <div class="metric-label">Crescimento</div>
+                <div class="metric-value">{variation}</div>
+                <div class="metric-label">Análises</div>
+            </div>
+        """, unsafe_allow_html=True)
+    
+    with col3:
+        st.markdown(f"""
+            <div class="metric-card-orange">
+                <div class="metric-label">Registros</div>
+                <div class="metric-value">{price_records}</div>
+                <div class="metric-label">Preços</div>
+            </div>
+        """, unsafe_allow_html=True)
+
+
+@fragmento('dashboard.performance', topicos=('modelo', 'sentimentos'))
+def grafico_performance(arquivos):
+    """ Gráfico de performance do modelo (fragmento: reexecuta sozinho) """
+    st.subheader("Performance do Modelo vs Realidade")
+    
+    # Estado atual dos arquivos (o vigia pode reexecutar o fragmento depois do treino)
+    from file_watcher import vigia
+    if vigia().agregado('modelo').existe and vigia().agregado('sentimentos').existe:
+        # Criar dados de exemplo para o gráfico de linha
+        import numpy as np
+        import pandas as pd
+        import plotly.graph_objects as go
+        dates = pd.date_range(start='2024-01-01', periods=10, freq='D')
+        np.random.seed(42)
+        real_values = np.cumsum(np.random.randn(10)) + 5
+        pred_values = real_values + np.random.randn(10) * 0.3
+        
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=dates,
+            y=pred_values,
+            mode='lines+markers',
+            name='Predição',
+            line=dict(color='#4facfe', width=3),
+            marker=dict(size=8)
+        ))
+        fig.add_trace(go.Scatter(
+            x=dates,
+            y=real_values,
+            mode='lines+markers',
+            name='Real',
+            line=dict(color='#fa709a', width=3),
+            marker=dict(size=8)
+        ))
+        
+        fig.update_layout(
+            height=400,
+            template='plotly_dark',
+            hovermode='x unified',
+            showlegend=True,
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=1.02,
+                xanchor="right",
+                x=1
+            ),
+            margin=dict(l=20, r=20, t=40, b=20)
+        )
+        
+        st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.markdown("""
+            <div class="empty-state">
+                <h2>📊</h2>
+                <h3>Modelo não disponível</h3>
+                <p>Aguardando treinamento do modelo para exibir comparações.</p>
+                <p><b>Próximos passos:</b></p>
+                <p>1. Colete notícias em <b>📰 Notícias</b></p>
+                <p>2. Analise sentimentos em <b>🧠 Sentimento</b></p>
+                <p>3. Busque preços e treine em <b>💰 Preços</b></p>
+            </div>
+        """, unsafe_allow_html=True)
+        
+        # Botão de navegação contextual
+        col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
+        with col_btn2:
+            if st.button("💰 Ir para Preços", key="btn_nav_prices", use_container_width=True):
+                st.info("💡 Use o menu lateral para navegar até 💰 Preços")
+
+
+@fragmento('dashboard.sentimento', topicos=('sentimentos',))
+def grafico_sentimento(arquivos):
+    """ Distribuição de sentimento (fragmento: reexecuta sozinho) """
+    st.subheader("Distribuição de Sentimento")
+    
+    # Verificar se existe arquivo E se tem dados (contagens do vigia, sem reler o CSV)
+    from file_watcher import vigia
+    agregado = vigia().agregado('sentimentos')
+    total_sentimentos = agregado.registros
+    has_data = agregado.existe and total_sentimentos > 0
+    
+    # Estado 1: Sem dados (nunca mostrar gráfico)
+    if not has_data or total_sentimentos == 0:
+        st.markdown("""
+            <div class="empty-state">
+                <h3>Aguardando Análise</h3>
+                <p>O gráfico de sentimento será gerado após a etapa 2.</p>
+                <p><b>Status atual:</b></p>
+                <p>• Nenhuma notícia analisada ainda</p>
+                <p><b>Próximos passos:</b></p>
+                <p>1. Complete a etapa <b>1. Notícias</b></p>
+                <p>2. Execute a etapa <b>2. Sentimento</b></p>
+                <p>3. Este gráfico será gerado automaticamente</p>
+            </div>
+        """, unsafe_allow_html=True)
+        
+        # Botão contextual
+        if st.button("Iniciar Coleta de Notícias", key="btn_nav_news_start", use_container_width=True, type="secondary"):
+            st.info("Use o menu lateral para navegar até Notícias")
+    
+    # Estado 2: Tem dados mas a saída recente é degenerada (ex: 100% neutro),
+    # segundo o monitor de drift
+    elif has_data:
+        try:
+            from drift_monitor import monitor
+            import pandas as pd
+            sent_counts = pd.Series(agregado.contagem('sentimento')).sort_values(ascending=False)
+            sent_counts = sent_counts[sent_counts > 0]
+            
+            dominante = monitor().dominante('sentimento')
+            
+            if dominante and dominante[0] == 'neutro':
+                st.markdown("""
+                    <div class="empty-state">
+                        <h3>Resultado: {pct} Neutro</h3>
+                        <p>A IA analisou {count} notícias e {pct} das mais recentes foram classificadas como <b>neutras</b>.</p>
+                        <p><b>Possíveis causas:</b></p>
+                        <p>• Linguagem muito técnica ou factual</p>
+                        <p>• Ausência de termos com carga emocional</p>
+                        <p>• Textos puramente informativos</p>
+                        <p><b>Recomendação:</b> Colete notícias de fontes opinativas (editoriais, análises de mercado).</p>
+                    </div>
+                """.replace('{count}', str(total_sentimentos)).replace(
+                    '{pct}', f"{dominante[1]:.0%}"
+                ), unsafe_allow_html=True)
+                
+                # Botão para recoletar
+                if st.button("Coletar Notícias Opinativas", key="btn_goto_news_recollect", use_container_width=True, type="secondary"):
+                    st.info("Use o menu lateral para navegar até Notícias")
+            
+            # Estado 3: Dados normais com variedade - MOSTRAR GRÁFICO
+            else:
+                labels_map = {
+                    'positivo': 'Positivo',
+                    'negativo': 'Negativo', 
+                    'neutro': 'Neutro'
+                }
+                labels = [labels_map.get(x, x) for x in sent_counts.index]
+                
+                import plotly.graph_objects as go
+                fig = go.Figure(data=[go.Pie(
+                    labels=labels,
+                    values=sent_counts.values,
+                    hole=.3,
+                    marker=dict(
+                        colors=['#38ef7d', '#f5576c', '#4facfe'],
+                        line=dict(color='#000000', width=2)
+                    )
+                )])
+                
+                fig.update_layout(
+                    height=400,
+                    template='plotly_dark',
+                    showlegend=True,
+                    legend=dict(
+                        orientation="v",
+                        yanchor="middle",
+                        y=0.5,
+                        xanchor="left",
+                        x=1.05
+                    ),
+                    margin=dict(l=20, r=120, t=20, b=20)
+                )
+                
+                st.plotly_chart(fig, use_container_width=True)
+                
+        except Exception as e:
+            st.markdown("""
+                <div class="empty-state">
+                    <h3>Erro ao Processar Dados</h3>
+                    <p>Não foi possível gerar o gráfico de sentimentos.</p>
+                    <p>Tente reanalizar as notícias na página Sentimento.</p>
+                </div>
+            """, unsafe_allow_html=True)
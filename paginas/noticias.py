@@ -0,0 +1,86 @@
+"""
+Coleta de notícias dos portais
+"""
+
+import streamlit as st
+
+import storage
+from paginas.comum import fragmento, tabela_paginada
+
+
+def render(arquivos, modo_profiling=False):
+    """
+    Parâmetros:
+    arquivos (dict): Quais etapas do pipeline já têm arquivo salvo
+    modo_profiling (bool): Perfila as ações pesadas (treino, sentimento)
+    """
+    st.header("Coletar Notícias")
+    
+    st.info("💡 Colete notícias financeiras de múltiplas fontes para alimentar o sistema")
+    
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        tickers = st.text_input(
+            "Digite os códigos das ações (separados por vírgula):",
+            value="PETR4, VALE3, ITUB4",
+            key="input_tickers"
+        )
+    
+    with col2:
+        st.markdown("###")
+        buscar = st.button("🔍 Buscar Notícias", key="btn_buscar", use_container_width=True)
+    
+    if buscar:
+        tickers_list = [t.strip().upper() for t in tickers.split(',')]
+        
+        with st.spinner("Buscando notícias..."):
+            try:
+                from scraper import NoticiasScraper
+                
+                scraper = NoticiasScraper()
+                scraper.buscar_multiplos_ativos(tickers_list)
+                df = scraper.salvar_dados()
+                
+                if df is not None and len(df) > 0:
+                    st.success(f"✓ {len(df)} notícias coletadas com sucesso!")
+                    
+                    # Métricas rápidas
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("Total de Notícias", len(df))
+                    col2.metric("Ativos Únicos", df['ticker'].nunique())
+                    col3.metric("Período", f"{df['data'].min()} a {df['data'].max()}")
+                    
+                    st.dataframe(df.head(50), use_container_width=True, hide_index=True)
+                    st.caption("Prévia das 50 primeiras; a base completa, com filtros e páginas, fica abaixo")
+                else:
+                    st.warning("⚠ Nenhuma notícia encontrada para os tickers informados")
+                    
+            except Exception as e:
+                st.error(f"❌ Erro: {str(e)}")
+                st.info("Verifique se o arquivo scraper.py existe e está configurado corretamente")
+    
+    # Mostra dados existentes
+    if storage.existe(storage.ARQUIVO_NOTICIAS):
+        st.markdown("---")
+        st.subheader("📚 Base de Dados de Notícias")
+        tabela_noticias()
+
+
+@fragmento('noticias.tabela', topicos=('noticias',))
+def tabela_noticias():
+    """ Base de notícias coletadas (fragmento: reexecuta sozinho) """
+    try:
+        df = storage.noticias()
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Total de Registros", len(df))
+        if 'ticker' in df.columns:
+            col2.metric("Ativos Monitorados", df['ticker'].nunique())
+        if 'coletado_em' in df.columns and df['coletado_em'].notna().any():
+            col3.metric("Última Atualização", f"{df['coletado_em'].max():%d/%m/%Y %H:%M}")
+        
+        tabela_paginada(df, 'noticias', coluna_data='data_utc', categorias=('ticker', 'fonte'),
+                        ordenacao_padrao='data_utc')
+    except Exception as e:
+        st.error(f"Erro ao carregar arquivo: {str(e)}")
@@ -0,0 +1,136 @@
+"""
+Importação de preços (yfinance) e treino do modelo
+"""
+
+import streamlit as st
+
+import storage
+
+from profiling import perfilar_se
+from paginas.comum import fragmento, tabela_paginada
+
+
+def render(arquivos, modo_profiling=False):
+    """
+    Parâmetros:
+    arquivos (dict): Quais etapas do pipeline já têm arquivo salvo
+    modo_profiling (bool): Perfila as ações pesadas (treino, sentimento)
+    """
+    st.header("Preços e Modelo")
+    
+    tab1, tab2 = st.tabs(["📈 Buscar Preços", "🎓 Treinar Modelo"])
+    
+    with tab1:
+        col1, col2, col3 = st.columns([2, 1, 1])
+        
+        with col1:
+            tickers_preco = st.text_input("Ativos:", "PETR4, VALE3, ITUB4")
+        with col2:
+            periodo = st.selectbox("Período:", ['1 mês', '3 meses', '6 meses', '1 ano', '2 anos'], index=2)
+        with col3:
+            st.markdown("###")
+            buscar_preco = st.button("📊 Buscar", key="btn_precos", use_container_width=True)
+        
+        if buscar_preco:
+            with st.spinner("Buscando dados de mercado..."):
+                try:
+                    from price_fetcher import PriceFetcher
+                    
+                    # Mapear período em português para código da API
+                    periodo_map = {
+                        '1 mês': '1mo',
+                        '3 meses': '3mo',
+                        '6 meses': '6mo',
+                        '1 ano': '1y',
+                        '2 anos': '2y'
+                    }
+                    periodo_api = periodo_map.get(periodo, '6mo')
+                    
+                    tickers_list = [t.strip().upper() for t in tickers_preco.split(',')]
+                    fetcher = PriceFetcher()
+                    df = fetcher.buscar_multiplas_acoes(tickers_list, periodo_api)
+                    
+                    if df is not None:
+                        fetcher.salvar_dados(df)
+                        st.success(f"✓ {len(df)} registros importados!")
+                        
+                except Exception as e:
+                    st.error(f"❌ Erro: {str(e)}")
+        
+        if storage.existe(storage.ARQUIVO_PRECOS):
+            st.markdown("---")
+            st.subheader("📚 Base de Preços")
+            base_precos()
+    
+    with tab2:
+        if not (arquivos['Sentimentos'] and arquivos['Preços']):
+            st.warning("⚠ Necessário ter notícias analisadas E dados de preços")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.info("✓ Notícias Analisadas" if arquivos['Sentimentos'] else "✗ Notícias Analisadas")
+            with col2:
+                st.info("✓ Dados de Preços" if arquivos['Preços'] else "✗ Dados de Preços")
+        else:
+            st.info("✓ Todos os requisitos atendidos. Pronto para treinar!")
+            
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.markdown("**Algoritmo:** Random Forest Regressor (global + por ativo e por setor)")
+            with col2:
+                treinar = st.button("🚀 Treinar Modelo", key="btn_treinar", use_container_width=True)
+            
+            if treinar:
+                with st.spinner("Treinando modelo..."), perfilar_se(modo_profiling, 'treinar_modelo'):
+                    try:
+                        from price_predictor import PriceImpactPredictor
+                        from model_registry import gerenciador
+                        from schema import carregar_noticias, carregar_precos
+                        
+                        df_not = carregar_noticias()
+                        df_prec = carregar_precos()
+                        
+                        predictor = PriceImpactPredictor()
+                        df_treino = predictor.preparar_dados(df_not, df_prec)
+                        
+                        if len(df_treino) >= 5:
+                            resumo = gerenciador().treinar(df_treino)
+                            modelo_global = resumo.set_index('modelo').loc['global']
+                            
+                            st.success(f"✓ {len(resumo)} modelos treinados com sucesso!")
+                            
+                            col1, col2, col3 = st.columns(3)
+                            col1.metric("Erro Médio Absoluto", f"{modelo_global['mae']:.2f}%")
+                            col2.metric("R² Score", f"{modelo_global['r2']:.3f}")
+                            col3.metric("Amostras de Treino", len(df_treino))
+                            
+                            st.dataframe(resumo, use_container_width=True, hide_index=True)
+                        else:
+                            st.error(f"⚠ Dados insuficientes. Encontrado {len(df_treino)} amostras, necessário mínimo 5.")
+                            st.info("Colete mais notícias e dados de preços.")
+                            
+                    except Exception as e:
+                        st.error(f"❌ Erro: {str(e)}")
+
+
+@fragmento('precos.base', topicos=('precos',))
+def base_precos():
+    """ Gráfico (reduzido por LTTB) e tabela paginada dos preços salvos """
+    import plotly.express as px
+    from downsampling import reduzir_serie
+
+    df = storage.precos()
+    tickers = sorted(df['ticker'].dropna().unique().tolist())
+    escolhidos = st.multiselect("Ativos no gráfico", tickers, default=tickers[:5], key="precos_grafico_tickers")
+
+    serie = df[df['ticker'].isin(escolhidos)]
+    reduzida = reduzir_serie(serie, x='data', y='fechamento', n_pontos=1000)
+    fig = px.line(reduzida, x='data', y='fechamento', 
+                 color='ticker', title='Evolução dos Preços',
+                 template='plotly_dark')
+    st.plotly_chart(fig, use_container_width=True)
+    if len(reduzida) < len(serie):
+        st.caption(f"Gráfico com {len(reduzida)} de {len(serie)} pontos (LTTB, até 1000 por ativo)")
+
+    tabela_paginada(df, 'precos', coluna_data='data', categorias=('ticker',),
+                    ordenacao_padrao='data', altura=300)
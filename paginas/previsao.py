@@ -0,0 +1,176 @@
+"""
+Previsão do impacto de uma notícia no preço
+"""
+import streamlit as st
+
+from profiling import perfilar_se
+
+
+def render(arquivos, modo_profiling=False):
+    """
+    Parâmetros:
+    arquivos (dict): Quais etapas do pipeline já têm arquivo salvo
+    modo_profiling (bool): Perfila as ações pesadas (treino, sentimento)
+    """
+    import plotly.graph_objects as go
+
+    st.header("Fazer Previsão")
+    
+    if not arquivos['Modelo']:
+        st.markdown("""
+            <div class="empty-state">
+                <h3>⚠ Modelo não treinado</h3>
+                <p>O sistema de previsão requer um modelo treinado.</p>
+                <p><b>Complete estas etapas primeiro:</b></p>
+                <p>1. Colete notícias (aba Notícias)</p>
+                <p>2. Analise sentimentos (aba Sentimento)</p>
+                <p>3. Importe preços e treine o modelo (aba Preços)</p>
+            </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.info("💡 Digite uma notícia para prever seu impacto no preço da ação")
+        
+        noticia = st.text_area(
+            "Notícia:",
+            "Petrobras anuncia dividendos de R$ 10 bilhões",
+            height=100
+        )
+        
+        col1, col2 = st.columns([3, 1])
+        
+        with col1:
+            ticker = st.text_input("Ativo:", "PETR4")
+        
+        with col2:
+            st.markdown("###")
+            prever = st.button("🔮 Prever Impacto", key="btn_prever", use_container_width=True)
+        
+        if prever:
+            with st.spinner("Analisando com IA..."), perfilar_se(modo_profiling, 'previsao'):
+                try:
+                    from embedding_cache import CacheEmbeddings
+                    from sentiment_analyzer import criar_analisador
+                    from model_registry import gerenciador
+                    
+                    # Analisa sentimento (o embedding da manchete sai do mesmo forward pass)
+                    analyzer = criar_analisador()  # backend em SENTINEL_SENTIMENTO
+                    cache = CacheEmbeddings(dimensao=analyzer.dimensao_embedding)
+                    sent = analyzer.analisar_lote([noticia], cache_embeddings=cache)[0]
+                    # Sem vetor no cache (ex: backend que não grava), calcula na hora
+                    embedding = cache.obter_ou_calcular([noticia], analyzer.embeddings)[0]
+                    
+                    # Prevê impacto com o modelo do ativo (ou do setor / global)
+                    pred = gerenciador().prever(
+                        ticker,
+                        sent['sentimento'],
+                        sent['confianca'],
+                        sent['score_positivo'],
+                        sent['score_negativo'],
+                        sent['score_neutro'],
+                        embedding
+                    )
+                    
+                    # Mostra resultado
+                    st.markdown("---")
+                    st.subheader("📊 Resultado da Análise")
+                    st.caption(f"Modelo usado: `{pred['modelo']}`")
+                    
+                    col1, col2, col3, col4 = st.columns(4)
+                    
+                    with col1:
+                        st.markdown(f"""
+                            <div class="metric-card-blue">
+                                <div class="metric-label">Sentimento</div>
+                                <div class="metric-value">{sent['sentimento'].upper()}</div>
+                            </div>
+                        """, unsafe_allow_html=True)
+                    
+                    with col2:
+                        st.markdown(f"""
+                            <div class="metric-card-green">
+                                <div class="metric-label">Confiança</div>
+                                <div class="metric-value">{sent['confianca']}%</div>
+                            </div>
+                        """, unsafe_allow_html=True)
+                    
+                    with col3:
+                        color_class = "metric-card-green" if pred['direcao'] == "ALTA" else "metric-card-red"
+                        st.markdown(f"""
+                            <div class="{color_class}">
+                                <div class="metric-label">Direção</div>
+                                <div class="metric-value">{pred['direcao']}</div>
+                            </div>
+                        """, unsafe_allow_html=True)
+                    
+                    with col4:
+                        color_class = "metric-card-green" if pred['variacao_prevista'] > 0 else "metric-card-red"
+                        st.markdown(f"""
+                            <div class="{color_class}">
+                                <div class="metric-label">Impacto</div>
+                                <div class="metric-value">{pred['variacao_prevista']:+.2f}%</div>
+                            </div>
+                        """, unsafe_allow_html=True)
+                    
+                    # Notícias passadas parecidas e o que o preço fez no dia seguinte
+                    from ann_index import busca_noticias
+                    busca = busca_noticias()
+                    similares = busca.buscar(noticia, embedding, k=5) if busca is not None else None
+                    if similares is not None and len(similares):
+                        st.markdown("#### 📚 Notícias parecidas")
+                        colunas = [c for c in ['titulo', 'ticker', 'data_utc', 'sentimento',
+                                               'variacao_1d', 'similaridade'] if c in similares.columns]
+                        st.dataframe(
+                            similares[colunas],
+                            column_config={
+                                'titulo': 'Notícia', 'ticker': 'Ativo', 'data_utc': 'Data',
+                                'sentimento': 'Sentimento',
+                                'variacao_1d': st.column_config.NumberColumn('Variação em 1 dia', format="%+.2f%%"),
+                                'similaridade': st.column_config.ProgressColumn(
+                                    'Similaridade', min_value=0.0, max_value=1.0, format="%.2f")
+                            },
+                            hide_index=True, use_container_width=True
+                        )
+                        if 'variacao_1d' in similares.columns and similares['variacao_1d'].notna().any():
+                            st.caption(f"Variação média depois dessas notícias: "
+                                       f"{similares['variacao_1d'].mean():+.2f}% "
+                                       f"(previsão do modelo: {pred['variacao_prevista']:+.2f}%)")
+                    
+                    st.markdown("---")
+                    
+                    # Gráfico com cores estratégicas
+                    fig = go.Figure(go.Indicator(
+                        mode="gauge+number",
+                        value=pred['variacao_prevista'],
+                        domain={'x': [0, 1], 'y': [0, 1]},
+                        title={'text': "Impacto Previsto no Preço (%)"},
+                        gauge={
+                            'axis': {'range': [-10, 10]},
+                            'bar': {'color': "#4facfe"},
+                            'steps': [
+                                {'range': [-10, -2], 'color': "#f5576c"},
+                                {'range': [-2, 2], 'color': "#fee140"},
+                                {'range': [2, 10], 'color': "#38ef7d"}
+                            ],
+                            'threshold': {
+                                'line': {'color': "white", 'width': 4},
+                                'thickness': 0.75,
+                                'value': pred['variacao_prevista']
+                            }
+                        }
+                    ))
+                    fig.update_layout(template='plotly_dark', height=300)
+                    st.plotly_chart(fig, use_container_width=True)
+                    
+                    # Interpretação
+                    st.markdown("### 📋 Interpretação")
+                    st.markdown(f"""
+                    A notícia foi classificada como **{sent['sentimento']}** com **{sent['confianca']}%** de confiança.
+                    
+                    Com base em padrões históricos, esta notícia deve causar um movimento de **{pred['variacao_prevista']:+.2f}%** 
+                    no preço de **{ticker}**, indicando uma tendência de **{pred['direcao']}**.
+                    
+                    ⚠ **Aviso:** Esta é uma previsão baseada em modelo estatístico e não constitui recomendação de investimento.
+                    """)
+                    
+                except Exception as e:
+                    st.error(f"❌ Erro: {str(e)}")
@@ -0,0 +1,125 @@
+"""
+Análise de sentimento das notícias coletadas (FinBERT)
+"""
+import streamlit as st
+
+import storage
+from profiling import perfilar_se
+from paginas.comum import fragmento, tabela_paginada
+
+
+def render(arquivos, modo_profiling=False):
+    """
+    Parâmetros:
+    arquivos (dict): Quais etapas do pipeline já têm arquivo salvo
+    modo_profiling (bool): Perfila as ações pesadas (treino, sentimento)
+    """
+    st.header("Análise de Sentimento")
+    
+    if not arquivos['Notícias']:
+        st.warning("Primeiro colete notícias na página Notícias!")
+    else:
+        df_noticias = storage.noticias()
+        st.info(f"📊 {len(df_noticias)} notícias prontas para análise")
+        
+        col1, col2 = st.columns([3, 1])
+        
+        with col1:
+            st.markdown("**Modelo:** FinBERT (especializado em textos financeiros)")
+            reanalisar = st.checkbox("Reanalisar todas (padrão: só as notícias novas)", key="chk_reanalisar")
+        
+        with col2:
+            analisar = st.button("🤖 Analisar Sentimento", key="btn_sentimento", use_container_width=True)
+        
+        if analisar:
+            with st.spinner("Processando com IA..."), perfilar_se(modo_profiling, 'sentimento'):
+                try:
+                    from embedding_cache import CacheEmbeddings
+                    from sentiment_analyzer import analisar_pendentes, criar_analisador
+                    
+                    progress_bar = st.progress(0)
+                    status_text = st.empty()
+                    
+                    analyzer = criar_analisador()  # backend em SENTINEL_SENTIMENTO
+                    status_text.text("Carregando modelo...")
+                    progress_bar.progress(30)
+                    
+                    # Embeddings das manchetes saem do mesmo forward pass e ficam em cache
+                    # (features do modelo de preço com python main.py treinar --embeddings)
+                    cache = CacheEmbeddings(dimensao=analyzer.dimensao_embedding)
+                    df_result = analisar_pendentes(analyzer, df_noticias, reanalisar=reanalisar,
+                                                   cache_embeddings=cache)
+                    progress_bar.progress(100)
+                    status_text.text("Concluído!")
+                    
+                    if df_result.empty:
+                        st.info("Nenhuma notícia nova: todas já foram analisadas")
+                    else:
+                        st.success(f"✓ Análise completa! {len(df_result)} notícias analisadas")
+                    
+                        # Métricas com cards coloridos
+                        col1, col2, col3 = st.columns(3)
+                    
+                        positivas = len(df_result[df_result['sentimento']=='positivo'])
+                        negativas = len(df_result[df_result['sentimento']=='negativo'])
+                        neutras = len(df_result[df_result['sentimento']=='neutro'])
+                    
+                        with col1:
+                            st.markdown(f"""
+                                <div class="metric-card-green">
+                                    <div class="metric-label">Positivas</div>
+                                    <div class="metric-value">{positivas}</div>
+                                    <div class="metric-label">{(positivas/len(df_result)*100):.1f}%</div>
+                                </div>
+                            """, unsafe_allow_html=True)
+                    
+                        with col2:
+                            st.markdown(f"""
+                                <div class="metric-card-red">
+                                    <div class="metric-label">Negativas</div>
+                                    <div class="metric-value">{negativas}</div>
+                                    <div class="metric-label">{(negativas/len(df_result)*100):.1f}%</div>
+                                </div>
+                            """, unsafe_allow_html=True)
+                    
+                        with col3:
+                            st.markdown(f"""
+                                <div class="metric-card-blue">
+                                    <div class="metric-label">Neutras</div>
+                                    <div class="metric-value">{neutras}</div>
+                                    <div class="metric-label">{(neutras/len(df_result)*100):.1f}%</div>
+                                </div>
+                            """, unsafe_allow_html=True)
+                    
+                        st.markdown("<br>", unsafe_allow_html=True)
+                    
+                        # Alertar se tudo for neutro
+                        if neutras == len(df_result):
+                            st.warning("⚠ Todas as notícias foram classificadas como neutras. Considere coletar notícias com maior polaridade emocional.")
+                    
+                        st.dataframe(df_result.head(50), use_container_width=True, hide_index=True)
+                        st.caption("Prévia das 50 primeiras; a base completa, com filtros e páginas, fica abaixo")
+                    
+                except Exception as e:
+                    st.error(f"❌ Erro: {str(e)}")
+        
+        if arquivos['Sentimentos']:
+            st.markdown("---")
+            st.subheader("📊 Dados Analisados")
+            tabela_sentimentos()
+
+
+@fragmento('sentimento.tabela', topicos=('sentimentos',))
+def tabela_sentimentos():
+    """ Notícias já analisadas (fragmento: reexecuta sozinho) """
+    df = storage.sentimentos()
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Total Analisado", len(df))
+    with col2:
+        if 'confianca' in df.columns:
+            st.metric("Confiança Média", f"{df['confianca'].mean():.1f}%")
+    
+    tabela_paginada(df, 'sentimento', coluna_data='data_utc',
+                    categorias=('ticker', 'sentimento', 'fonte'), ordenacao_padrao='data_utc')
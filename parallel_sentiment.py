@@ -0,0 +1,345 @@
+"""
+Análise de sentimento em vários processos
+
+Um processo PyTorch não ocupa todos os núcleos com manchetes curtas
+(tokenização em Python + forward pequeno). Aqui as manchetes são divididas
+em fatias e cada fatia vai para um processo do pool; cada processo carrega o
+modelo uma única vez e roda com poucas threads (torch.set_num_threads). Os
+resultados são escritos direto em memória compartilhada, na linha de cada
+manchete, então a ordem original sai de graça.
+
+    python main.py sentimento --workers 8
+    python parallel_sentiment.py escalonamento --textos 4000 --modelo data/modelos_sentimento/en
+"""
+import os
+import time
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from drift_monitor import monitor
+from instrumentation import span, contar
+
+
+# Colunas numéricas de cada resultado no buffer compartilhado
+COLUNAS = ('score_negativo', 'score_neutro', 'score_positivo', 'confianca', 'codigo', 'tem_embedding')
+SENTIMENTOS = ('negativo', 'neutro', 'positivo')  # codigo -> sentimento
+
+# Estado de cada processo do pool
+_analisador = None
+
+
+def _iniciar(backend, kwargs, threads):
+    """ Inicializador do processo: limita as threads e carrega o modelo uma vez """
+    global _analisador
+    import torch
+    from sentiment_analyzer import criar_analisador
+
+    torch.set_num_threads(threads)
+    _analisador = criar_analisador(backend, **kwargs)
+
+
+@contextmanager
+def _anexar(nome, shape, dtype):
+    """ Visão NumPy de um bloco de memória compartilhada criado pelo processo principal """
+    memoria = shared_memory.SharedMemory(name=nome)
+    try:
+        yield np.ndarray(shape, dtype=dtype, buffer=memoria.buf)
+    finally:
+        memoria.close()
+
+
+class _ColetorEmbeddings:
+    """ Faz o papel do CacheEmbeddings no processo: grava os vetores na linha de cada texto """
+
+    def __init__(self, vetores, numeros, posicoes):
+        self.vetores = vetores
+        self.numeros = numeros
+        self.posicoes = posicoes  # texto -> linhas no buffer
+
+    def adicionar(self, textos, vetores):
+        for texto, vetor in zip(textos, vetores):
+            linhas = self.posicoes[texto]
+            self.vetores[linhas] = vetor
+            self.numeros[linhas, COLUNAS.index('tem_embedding')] = 1
+        return len(textos)
+
+
+def _analisar_fatia(buffers, inicio, textos, batch_size):
+    """
+    Analisa uma fatia de manchetes dentro do processo do pool
+
+    Retorna:
+    tuple: (inicio, colunas extras não numéricas por nome, segundos)
+    """
+    comeco = time.perf_counter()
+    n, dimensao, nome_numeros, nome_vetores = buffers
+    with ExitStack() as pilha:
+        numeros = pilha.enter_context(_anexar(nome_numeros, (n, len(COLUNAS)), np.float64))
+        vetores = coletor = None
+        if nome_vetores is not None:
+            posicoes = {}
+            for i, texto in enumerate(textos):
+                posicoes.setdefault(texto, []).append(inicio + i)
+            vetores = pilha.enter_context(_anexar(nome_vetores, (n, dimensao), np.float32))
+            coletor = _ColetorEmbeddings(vetores, numeros, posicoes)
+
+        resultados = _analisador.analisar_lote(textos, batch_size, coletor)
+
+        fatia = numeros[inicio:inicio + len(textos)]
+        for coluna in COLUNAS[:4]:
+            fatia[:, COLUNAS.index(coluna)] = [r[coluna] for r in resultados]
+        fatia[:, COLUNAS.index('codigo')] = [SENTIMENTOS.index(r['sentimento']) for r in resultados]
+        # As visões precisam sumir antes de o bloco ser fechado
+        del fatia, numeros, vetores, coletor
+
+    # Chaves próprias do backend ('idioma', 'origem'...) voltam pelo pipe: são poucas e pequenas
+    extras = {chave: [r.get(chave) for r in resultados]
+              for chave in resultados[0] if chave not in COLUNAS and chave != 'sentimento'} \
+        if resultados else {}
+    return inicio, extras, time.perf_counter() - comeco
+
+
+def _embeddings_fatia(buffers, inicio, textos, batch_size):
+    n, dimensao, nome_vetores = buffers
+    with _anexar(nome_vetores, (n, dimensao), np.float32) as vetores:
+        vetores[inicio:inicio + len(textos)] = _analisador.embeddings(textos, batch_size)
+        del vetores  # as visões precisam sumir antes de o bloco ser fechado
+    return inicio
+
+
+def _dimensao():
+    return _analisador.dimensao_embedding
+
+
+def _nome():
+    return _analisador.nome
+
+
+class _Buffer:
+    """ Bloco de memória compartilhada com uma visão NumPy, apagado ao sair do with """
+
+    def __init__(self, shape, dtype):
+        tamanho = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        self.memoria = shared_memory.SharedMemory(create=True, size=tamanho)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self.memoria.buf)
+        self.array[:] = 0
+
+    @property
+    def nome(self):
+        return self.memoria.name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        del self.array
+        self.memoria.close()
+        self.memoria.unlink()
+
+
+class AnalisadorParalelo:
+    """
+    Analisador que distribui as manchetes por um pool de processos
+
+    Mesma interface do SentimentAnalyzer; qualquer backend de
+    criar_analisador pode ser usado dentro dos processos.
+    """
+
+    def __init__(self, backend=None, workers=None, threads_por_worker=None, tamanho_fatia=512, **kwargs):
+        """
+        Parâmetros:
+        backend (str): Backend carregado em cada processo (padrão: o de criar_analisador)
+        workers (int): Processos do pool (padrão: todos os núcleos)
+        threads_por_worker (int): torch.set_num_threads de cada processo
+            (padrão: núcleos / workers, no mínimo 1)
+        tamanho_fatia (int): Manchetes por tarefa enviada ao pool
+        kwargs: Repassados ao construtor do backend (precisam ser serializáveis)
+        """
+        nucleos = os.cpu_count() or 1
+        self.backend = backend
+        self.workers = workers or nucleos
+        self.threads_por_worker = threads_por_worker or max(1, nucleos // self.workers)
+        self.tamanho_fatia = tamanho_fatia
+        if kwargs.get('cache_tokens') is True:
+            # Vários processos só leem o corpus pré-tokenizado; quem grava é o processo único
+            kwargs['cache_tokens'] = 'leitura'
+        self.kwargs = kwargs
+        self._executor = None
+        self._nome = None
+        self._dimensao = None
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: fork depois do PyTorch iniciar suas threads pode travar o processo filho
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=get_context('spawn'),
+                initializer=_iniciar, initargs=(self.backend, self.kwargs, self.threads_por_worker))
+        return self._executor
+
+    def fechar(self):
+        """ Encerra os processos do pool (o próximo uso cria outro) """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    @property
+    def nome(self):
+        if self._nome is None:
+            self._nome = self._pool().submit(_nome).result()
+        return self._nome
+
+    @property
+    def dimensao_embedding(self):
+        if self._dimensao is None:
+            self._dimensao = self._pool().submit(_dimensao).result()
+        return self._dimensao
+
+    def _fatias(self, n):
+        # Fatias menores quando há poucas manchetes, para todos os processos trabalharem
+        tamanho = max(1, min(self.tamanho_fatia, -(-n // self.workers)))
+        return range(0, n, tamanho), tamanho
+
+    def _analisar(self, textos, batch_size, cache_embeddings):
+        """
+        Retorna:
+        tuple: (DataFrame de resultados na ordem de textos, embeddings calculados ou None)
+        """
+        textos = [str(t) for t in textos]
+        n = len(textos)
+        dimensao = self.dimensao_embedding if cache_embeddings is not None else 0
+        inicios, tamanho = self._fatias(n)
+        extras = {}
+
+        with _Buffer((n, len(COLUNAS)), np.float64) as numeros, \
+                _Buffer((n, dimensao), np.float32) as vetores:
+            buffers = (n, dimensao, numeros.nome, vetores.nome if cache_embeddings is not None else None)
+            with span('sentimento.paralelo', workers=self.workers):
+                tarefas = [self._pool().submit(_analisar_fatia, buffers, inicio,
+                                               textos[inicio:inicio + tamanho], batch_size)
+                           for inicio in inicios]
+                for tarefa in as_completed(tarefas):
+                    inicio, colunas, _ = tarefa.result()
+                    for chave, valores in colunas.items():
+                        extras.setdefault(chave, [None] * n)[inicio:inicio + len(valores)] = valores
+            contar('sentimento.paralelo', n)
+
+            dados = numeros.array
+            df = pd.DataFrame({
+                'sentimento': np.asarray(SENTIMENTOS, dtype=object)[dados[:, COLUNAS.index('codigo')].astype(int)],
+                'confianca': dados[:, COLUNAS.index('confianca')],
+                'score_positivo': dados[:, COLUNAS.index('score_positivo')],
+                'score_negativo': dados[:, COLUNAS.index('score_negativo')],
+                'score_neutro': dados[:, COLUNAS.index('score_neutro')],
+                **extras
+            })
+            if cache_embeddings is not None:
+                com_vetor = dados[:, COLUNAS.index('tem_embedding')] > 0
+                if com_vetor.any():
+                    cache_embeddings.adicionar([t for t, c in zip(textos, com_vetor) if c],
+                                               vetores.array[com_vetor])
+        return df
+
+    def analisar_texto(self, texto):
+        return self.analisar_lote([texto])[0]
+
+    def analisar_lote(self, textos, batch_size=32, cache_embeddings=None):
+        """
+        Analisa vários textos dividindo-os entre os processos
+
+        Retorna:
+        list: Um resultado (dict) por texto, na mesma ordem
+        """
+        return self._analisar(textos, batch_size, cache_embeddings).to_dict('records')
+
+    def embeddings(self, textos, batch_size=32):
+        textos = [str(t) for t in textos]
+        n, dimensao = len(textos), self.dimensao_embedding
+        inicios, tamanho = self._fatias(n)
+        with _Buffer((n, dimensao), np.float32) as vetores:
+            buffers = (n, dimensao, vetores.nome)
+            for tarefa in [self._pool().submit(_embeddings_fatia, buffers, inicio,
+                                               textos[inicio:inicio + tamanho], batch_size)
+                           for inicio in inicios]:
+                tarefa.result()
+            return vetores.array.copy()
+
+    def analisar_dataframe(self, df, coluna='titulo', batch_size=32, cache_embeddings=None):
+        """
+        Analisa o sentimento de todas as notícias de um DataFrame
+
+        Retorna:
+        DataFrame: Cópia de df com sentimento, confianca e scores
+        """
+        print(f"🧠 Analisando {len(df)} notícias em {self.workers} processos "
+              f"({self.threads_por_worker} thread(s) cada)...")
+        inicio = time.perf_counter()
+        resultados = self._analisar(df[coluna].astype(str).tolist(), batch_size, cache_embeddings)
+        base = df.reset_index(drop=True).drop(columns=list(resultados.columns), errors='ignore')
+        df_resultado = pd.concat([base, resultados], axis=1)
+        monitor().observar_sentimentos(df_resultado)
+        segundos = time.perf_counter() - inicio
+        print(f"✅ Análise concluída! ({len(df) / segundos:.1f} textos/s)" if segundos else "✅ Análise concluída!")
+        return df_resultado
+
+
+def escalonamento(textos, workers=None, backend=None, batch_size=32, threads_por_worker=1, **kwargs):
+    """
+    Vazão do pool com 1..N processos (modelo já carregado, fora da medição)
+
+    Parâmetros:
+    textos (list): Manchetes usadas na medição
+    workers (list): Quantidades de processos (padrão: 1, 2, 4... até os núcleos)
+    threads_por_worker (int): Fixo em todas as medições, para comparar só o número de processos
+
+    Retorna:
+    DataFrame: workers, segundos, textos_por_segundo, speedup e eficiencia
+        (speedup / workers; 1.0 = escalonamento perfeito)
+    """
+    nucleos = os.cpu_count() or 1
+    if workers is None:
+        workers = sorted({min(2 ** i, nucleos) for i in range(nucleos.bit_length() + 1)})
+    linhas = []
+    for n in workers:
+        with AnalisadorParalelo(backend, workers=n, threads_por_worker=threads_por_worker,
+                                **kwargs) as analisador:
+            analisador.analisar_lote(textos[:n * 64], batch_size)  # aquece: carrega o modelo em cada processo
+            inicio = time.perf_counter()
+            analisador.analisar_lote(textos, batch_size)
+            segundos = time.perf_counter() - inicio
+        linhas.append({'workers': n, 'segundos': round(segundos, 3),
+                       'textos_por_segundo': round(len(textos) / segundos, 1)})
+    df = pd.DataFrame(linhas)
+    df['speedup'] = (df['textos_por_segundo'] / df['textos_por_segundo'].iloc[0]).round(2)
+    df['eficiencia'] = (df['speedup'] / df['workers']).round(2)
+    return df
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sentimento em vários processos")
+    parser.add_argument('comando', choices=['escalonamento'])
+    parser.add_argument('--dados', default='data/noticias.csv')
+    parser.add_argument('--textos', type=int, default=2000)
+    parser.add_argument('--workers', type=int, nargs='+')
+    parser.add_argument('--backend', choices=['finbert', 'roteador', 'aluno'])
+    parser.add_argument('--modelo', help="diretório do modelo (backend finbert)")
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    from schema import carregar_noticias
+
+    titulos = carregar_noticias(args.dados)['titulo'].astype(str).tolist()
+    titulos = (titulos * (args.textos // max(len(titulos), 1) + 1))[:args.textos]
+    kwargs = {'modelo': args.modelo, 'local_files_only': True} if args.modelo else {}
+    print(escalonamento(titulos, args.workers, args.backend, args.batch_size, **kwargs).to_string(index=False))
@@ -0,0 +1,344 @@
+"""
+Impacto agregado das notícias do dia numa carteira
+
+Cada notícia prevista pelo PriceImpactPredictor vira um movimento esperado
+para o seu ativo (média das previsões ponderada pela confiança). Ativos da
+carteira sem notícia recebem o movimento implícito pela covariância dos
+retornos: E[r_B | r_A] = Σ_BA Σ_AA⁻¹ r_A. O impacto na carteira é a soma
+ponderada pelos pesos, comparada com a volatilidade diária da carteira.
+
+Somas por ativo ficam em arrays: cada manchete nova custa um np.add.at e a
+reavaliação é um solve do tamanho dos ativos com notícia.
+
+    python portfolio.py PETR4=100000 VALE3=50000 ITUB4=-30000
+"""
+import numpy as np
+import pandas as pd
+
+from drift_monitor import SINONIMOS
+from instrumentation import contar, medido
+
+
+JANELA_COVARIANCIA = 60  # pregões usados na covariância
+ENCOLHIMENTO = 0.1       # peso da diagonal na covariância (estabiliza o solve)
+MINIMO_RETORNOS = 10     # retornos em comum para estimar uma covariância
+VARIANCIA_PADRAO = 4.0   # %² diário (2% de volatilidade) para ativos sem histórico
+
+# Limites dos alertas (em % ou em volatilidades diárias da carteira);
+# acima do dobro do limite o alerta vira 'erro'
+LIMITES_PADRAO = {'posicao': 2.0, 'carteira': 1.0, 'sigmas': 2.0}
+
+
+def normalizar_ticker(ticker):
+    """ 'petr4.sa' -> 'PETR4' (mesmo formato dos CSVs) """
+    ticker = str(ticker).strip().upper()
+    return ticker[:-3] if ticker.endswith('.SA') else ticker
+
+
+def covariancia_retornos(df_precos, tickers, janela=JANELA_COVARIANCIA, encolhimento=ENCOLHIMENTO):
+    """
+    Covariância dos retornos diários (em %²) dos últimos `janela` pregões
+
+    Ativos sem histórico suficiente ficam com a variância mediana e sem
+    correlação com os demais. A matriz é encolhida para a diagonal e
+    projetada para ser positiva definida.
+
+    Parâmetros:
+    df_precos: DataFrame com data, ticker e fechamento
+    tickers (list): Ordem das linhas/colunas da matriz
+
+    Retorna:
+    ndarray: Matriz (n, n)
+    """
+    fechamentos = df_precos.pivot_table(index='data', columns='ticker', values='fechamento',
+                                        observed=True).sort_index()
+    fechamentos.columns = [normalizar_ticker(t) for t in fechamentos.columns]
+    retornos = fechamentos.pct_change(fill_method=None).iloc[-janela:] * 100
+    cov = retornos.reindex(columns=tickers).cov(min_periods=MINIMO_RETORNOS).to_numpy()
+
+    variancias = np.diag(cov).copy()
+    conhecidas = np.isfinite(variancias) & (variancias > 0)
+    variancias[~conhecidas] = np.median(variancias[conhecidas]) if conhecidas.any() else VARIANCIA_PADRAO
+    cov = np.nan_to_num(cov, nan=0.0)
+    cov[~conhecidas, :] = 0.0
+    cov[:, ~conhecidas] = 0.0
+    np.fill_diagonal(cov, variancias)
+
+    # Covariâncias par a par (amostras diferentes) podem não ser PSD
+    cov = (1 - encolhimento) * cov + encolhimento * np.diag(variancias)
+    autovalores, autovetores = np.linalg.eigh(cov)
+    autovalores = np.maximum(autovalores, 1e-6 * variancias.max())
+    return (autovetores * autovalores) @ autovetores.T
+
+
+class Carteira:
+    """
+    Posições, covariância e impacto esperado das notícias acumuladas
+
+    Uso:
+        carteira = Carteira({'PETR4': 100_000, 'VALE3': 50_000}, storage.precos())
+        carteira.adicionar_previsoes(df_noticias_do_dia, predictor)
+        carteira.adicionar(['VALE3'], [-1.8], [90.0])   # manchete nova
+        for alerta in carteira.novos_alertas():
+            print(alerta['mensagem'])
+    """
+
+    def __init__(self, posicoes, df_precos=None, janela=JANELA_COVARIANCIA, limites=None):
+        """
+        Parâmetros:
+        posicoes (dict): Ticker -> valor financeiro em R$ (negativo = vendido)
+        df_precos: Histórico de preços para a covariância (None = ativos independentes)
+        janela (int): Pregões usados na covariância
+        limites (dict): Sobrescreve LIMITES_PADRAO (posicao, carteira, sigmas)
+        """
+        valores = {}
+        for ticker, valor in posicoes.items():
+            ticker = normalizar_ticker(ticker)
+            valores[ticker] = valores.get(ticker, 0.0) + float(valor)
+        self.tickers = list(valores)
+        self._indice = {t: i for i, t in enumerate(self.tickers)}
+        self.valores = np.array(list(valores.values()), dtype=np.float64)
+        self.patrimonio = float(np.abs(self.valores).sum())
+        if self.patrimonio == 0:
+            raise ValueError("Carteira sem posições")
+        self.pesos = self.valores / self.patrimonio
+        self.limites = {**LIMITES_PADRAO, **(limites or {})}
+
+        if df_precos is not None and len(df_precos):
+            self.covariancia = covariancia_retornos(df_precos, self.tickers, janela)
+        else:
+            self.covariancia = np.eye(len(self.tickers)) * VARIANCIA_PADRAO
+        # Volatilidade diária da carteira, em %
+        self.volatilidade = float(np.sqrt(self.pesos @ self.covariancia @ self.pesos))
+        self.zerar()
+
+    def zerar(self):
+        """ Descarta as notícias acumuladas (ex: virada do dia) """
+        n = len(self.tickers)
+        self._soma = np.zeros(n)
+        self._peso = np.zeros(n)
+        self.noticias = np.zeros(n, dtype=np.int64)
+        self._alertas_ativos = set()
+
+    # ==================
+    # NOTÍCIAS
+    # ==================
+
+    def adicionar(self, tickers, variacoes, confiancas=None):
+        """
+        Acumula previsões de impacto (uma por notícia)
+
+        Parâmetros:
+        tickers (list): Ativo de cada notícia (fora da carteira = ignorada)
+        variacoes (array): Variação prevista em %
+        confiancas (array): Confiança do sentimento (0-100); None = pesos iguais
+
+        Retorna:
+        int: Notícias que afetam a carteira
+        """
+        linhas = np.fromiter((self._indice.get(normalizar_ticker(t), -1) for t in tickers),
+                             dtype=np.int64, count=len(tickers))
+        variacoes = np.asarray(variacoes, dtype=np.float64)
+        pesos = np.ones(len(linhas)) if confiancas is None else np.asarray(confiancas, dtype=np.float64) / 100
+        validas = (linhas >= 0) & np.isfinite(variacoes) & np.isfinite(pesos) & (pesos > 0)
+        np.add.at(self._soma, linhas[validas], pesos[validas] * variacoes[validas])
+        np.add.at(self._peso, linhas[validas], pesos[validas])
+        np.add.at(self.noticias, linhas[validas], 1)
+        contar('carteira.noticias', int(validas.sum()))
+        return int(validas.sum())
+
+    @medido('carteira.previsoes')
+    def adicionar_previsoes(self, df, predictor, embeddings=None):
+        """
+        Prevê o impacto de um lote de notícias com sentimento e acumula
+
+        Parâmetros:
+        df: DataFrame com ticker, sentimento, confianca e scores
+        predictor: Qualquer objeto com prever_lote(df, embeddings) - o
+            gerenciador de modelos ou um PriceImpactPredictor treinado
+        embeddings (ndarray): Embeddings das manchetes, uma linha por linha de df
+
+        Retorna:
+        DataFrame: Previsões (variacao_prevista, direcao) com o índice de df
+        """
+        na_carteira = df['ticker'].astype(str).map(normalizar_ticker).isin(self._indice).to_numpy()
+        df = df[na_carteira]
+        if embeddings is not None:
+            embeddings = np.asarray(embeddings)[na_carteira]
+        if df.empty:
+            return pd.DataFrame(columns=['variacao_prevista', 'direcao'])
+        if 'sentimento' in df.columns:
+            # CSVs de versões antigas do analisador têm rótulos em inglês
+            df = df.assign(sentimento=df['sentimento'].astype(object).replace(SINONIMOS))
+        previsoes = predictor.prever_lote(df, embeddings=embeddings)
+        if previsoes is not None:
+            self.adicionar(df['ticker'].astype(str).tolist(), previsoes['variacao_prevista'],
+                           df['confianca'] if 'confianca' in df.columns else None)
+        return previsoes
+
+    # ==================
+    # AVALIAÇÃO
+    # ==================
+
+    def movimentos(self):
+        """
+        Movimento esperado (%) de cada posição
+
+        Retorna:
+        tuple: (direto, total) - direto é a média das previsões do próprio
+            ativo (0 sem notícia); total inclui o efeito via covariância
+        """
+        com_noticia = self._peso > 0
+        direto = np.divide(self._soma, self._peso, out=np.zeros_like(self._soma), where=com_noticia)
+        total = direto.copy()
+        if com_noticia.any() and not com_noticia.all():
+            a = np.flatnonzero(com_noticia)
+            b = np.flatnonzero(~com_noticia)
+            total[b] = self.covariancia[np.ix_(b, a)] @ np.linalg.solve(
+                self.covariancia[np.ix_(a, a)], direto[a])
+        return direto, total
+
+    def avaliar(self):
+        """
+        Impacto esperado da carteira com as notícias acumuladas
+
+        Retorna:
+        dict: impacto_pct, impacto_valor (R$), sigmas (impacto / volatilidade
+            diária), volatilidade, e por posição: direto, movimento, contribuicao
+        """
+        direto, movimento = self.movimentos()
+        contribuicao = self.pesos * movimento
+        impacto = float(contribuicao.sum())
+        return {
+            'impacto_pct': impacto,
+            'impacto_valor': float(self.valores @ movimento / 100),
+            'sigmas': impacto / self.volatilidade if self.volatilidade > 0 else 0.0,
+            'volatilidade': self.volatilidade,
+            'direto': direto,
+            'movimento': movimento,
+            'contribuicao': contribuicao
+        }
+
+    def tabela(self):
+        """ Uma linha por posição: peso, notícias, movimento direto/total, contribuição e R$ """
+        resultado = self.avaliar()
+        return pd.DataFrame({
+            'ticker': self.tickers,
+            'valor': self.valores,
+            'peso': self.pesos.round(4),
+            'noticias': self.noticias,
+            'movimento_direto': resultado['direto'].round(3),
+            'movimento': resultado['movimento'].round(3),
+            'contribuicao': resultado['contribuicao'].round(4),
+            'impacto_valor': (self.valores * resultado['movimento'] / 100).round(2)
+        })
+
+    # ==================
+    # ALERTAS
+    # ==================
+
+    def alertas(self, resultado=None):
+        """
+        Posições e carteira acima dos limites
+
+        Retorna:
+        list: dicts com nivel ('erro' ou 'aviso'), alvo, tipo, mensagem e valor
+        """
+        resultado = resultado or self.avaliar()
+        alertas = []
+
+        def alertar(alvo, tipo, valor, limite, mensagem):
+            if abs(valor) >= limite:
+                alertas.append({'nivel': 'erro' if abs(valor) >= 2 * limite else 'aviso',
+                                'alvo': alvo, 'tipo': tipo, 'mensagem': mensagem,
+                                'valor': round(float(valor), 4)})
+
+        for i in np.flatnonzero(np.abs(resultado['movimento']) >= self.limites['posicao']):
+            origem = 'notícias' if self.noticias[i] else 'correlação'
+            alertar(self.tickers[i], 'posicao', resultado['movimento'][i], self.limites['posicao'],
+                    f"{self.tickers[i]}: movimento esperado {resultado['movimento'][i]:+.2f}% ({origem})")
+        alertar('carteira', 'carteira', resultado['impacto_pct'], self.limites['carteira'],
+                f"Carteira: impacto esperado {resultado['impacto_pct']:+.2f}% "
+                f"(R$ {resultado['impacto_valor']:+,.0f})")
+        alertar('carteira', 'sigmas', resultado['sigmas'], self.limites['sigmas'],
+                f"Carteira: impacto de {resultado['sigmas']:+.1f} volatilidades diárias")
+
+        alertas.sort(key=lambda a: a['nivel'] != 'erro')
+        return alertas
+
+    def novos_alertas(self, resultado=None):
+        """ Alertas que não estavam ativos na chamada anterior (para notificar uma vez só) """
+        alertas = self.alertas(resultado)
+        ativos = {(a['alvo'], a['tipo'], a['nivel']) for a in alertas}
+        novos = [a for a in alertas if (a['alvo'], a['tipo'], a['nivel']) not in self._alertas_ativos]
+        self._alertas_ativos = ativos
+        contar('carteira.alertas', len(novos))
+        return novos
+
+
+def noticias_do_dia(df, dia=None):
+    """
+    Notícias de um dia (no fuso de São Paulo); padrão: o dia mais recente do arquivo
+    """
+    from date_parser import FUSO_PADRAO, normalizar_datas
+
+    dias = normalizar_datas(df['data']).dt.tz_convert(FUSO_PADRAO).dt.date
+    dia = pd.Timestamp(dia).date() if dia is not None else dias.max()
+    return df[(dias == dia).to_numpy()], dia
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    import storage
+    from embedding_cache import CacheEmbeddings
+    from model_registry import gerenciador
+
+    parser = argparse.ArgumentParser(description="Impacto das notícias do dia numa carteira")
+    parser.add_argument('posicoes', nargs='+', help="TICKER=valor em R$ (negativo = vendido)")
+    parser.add_argument('--dia', help="AAAA-MM-DD (padrão: o mais recente com notícias)")
+    parser.add_argument('--janela', type=int, default=JANELA_COVARIANCIA)
+    for chave, valor in LIMITES_PADRAO.items():
+        parser.add_argument(f'--limite-{chave}', type=float, default=valor)
+    args = parser.parse_args()
+
+    posicoes = {}
+    for item in args.posicoes:
+        ticker, _, valor = item.partition('=')
+        posicoes[ticker] = float(valor)
+
+    carteira = Carteira(posicoes, storage.precos(), janela=args.janela,
+                        limites={chave: getattr(args, f'limite_{chave}') for chave in LIMITES_PADRAO})
+    # Cada ativo com o seu modelo (ou o do setor / global)
+    predictor = gerenciador()
+    if not any(predictor.rota(ticker) for ticker in carteira.tickers):
+        raise SystemExit("💡 Treine o modelo antes: python main.py treinar")
+
+    noticias, dia = noticias_do_dia(storage.sentimentos(), args.dia)
+    # Só embeddings já em cache (sem carregar o FinBERT); ausentes ficam NaN
+    cache = CacheEmbeddings()
+    embeddings = cache.obter(noticias['titulo'].astype(str))[0] if len(cache) else None
+    previsoes = carteira.adicionar_previsoes(noticias, predictor, embeddings)
+    resultado = carteira.avaliar()
+
+    print(f"\n💼 Carteira: R$ {carteira.patrimonio:,.0f} | volatilidade diária {carteira.volatilidade:.2f}%")
+    print(f"📰 {dia}: {len(previsoes)} notícias dos ativos da carteira")
+    print(carteira.tabela().to_string(index=False))
+    print(f"\n🎯 Impacto esperado: {resultado['impacto_pct']:+.3f}% (R$ {resultado['impacto_valor']:+,.0f}, "
+          f"{resultado['sigmas']:+.2f} volatilidades)")
+
+    alertas = carteira.novos_alertas(resultado)
+    if not alertas:
+        print("✅ Nenhum alerta")
+    for alerta in alertas:
+        print(f"{'🚨' if alerta['nivel'] == 'erro' else '⚠️'} {alerta['mensagem']}")
+
+    # Custo de reavaliar a cada manchete nova
+    rng = np.random.default_rng(0)
+    n = 2000
+    inicio = time.perf_counter()
+    for i in range(n):
+        carteira.adicionar([carteira.tickers[i % len(carteira.tickers)]], [rng.normal()], [80.0])
+        carteira.novos_alertas()
+    print(f"\n⏱️ Manchete nova + reavaliação: {(time.perf_counter() - inicio) / n * 1e6:.0f} µs")
@@ -0,0 +1,195 @@
+"""
+Cache em disco das respostas do yfinance, com retry e modo gravação/reprodução
+
+Cada chamada history(ticker, parâmetros) vira um parquet em data/cache/yfinance.
+Respostas de períodos já encerrados nunca expiram; as que ainda podem mudar
+(o candle de hoje) valem por um TTL que depende do intervalo. Falhas são
+classificadas: limite de requisições e erros de rede são tentados de novo
+com backoff exponencial e jitter; ticker inexistente ou período inválido não.
+
+Modos (parâmetro `modo` ou variável SENTINEL_YFINANCE):
+- normal: usa o cache e vai ao Yahoo quando a resposta falta ou expirou
+- gravar: sempre vai ao Yahoo e regrava o cache
+- reproduzir: só lê o que foi gravado, sem rede (testes e execuções offline)
+"""
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+import yfinance as yf
+
+from instrumentation import span, contar
+from resilience import CircuitBreaker, CircuitoAbertoError, executar_com_retry
+
+
+DIR_CACHE = 'data/cache/yfinance'
+MODOS = ('normal', 'gravar', 'reproduzir')
+
+# Segundos que uma resposta ainda aberta (inclui o candle atual) vale
+TTL_INTERVALO = {
+    '1m': 60,
+    '2m': 120,
+    '5m': 300,
+    '15m': 900,
+    '30m': 1800,
+    '60m': 3600,
+    '1h': 3600,
+    '1d': 900,
+    '1wk': 6 * 3600,
+    '1mo': 12 * 3600
+}
+TTL_PADRAO = 3600
+
+# O Yahoo pode corrigir os últimos candles por alguns minutos depois do fim
+ATRASO_DADOS = pd.Timedelta(minutes=30)
+
+# Erros do yfinance que não mudam tentando de novo
+ERROS_PERMANENTES = ('YFPricesMissingError', 'YFTickerMissingError', 'YFTzMissingError',
+                     'YFInvalidPeriodError', 'YFNotImplementedError')
+
+# Erros que só dizem que não há candles no período (feriado, ticker deslistado):
+# viram uma resposta vazia, gravada como qualquer outra
+SEM_CANDLES = ('YFPricesMissingError', 'YFTzMissingError')
+
+# Sem isso o yfinance registra erros de rede no log e devolve um DataFrame vazio,
+# que seria gravado como resposta válida
+if hasattr(yf, 'config'):
+    yf.config.debug.hide_exceptions = False
+
+
+class ErroSemGravacao(Exception):
+    """Modo reproduzir e a resposta pedida não foi gravada"""
+
+
+def classificar_erro(erro):
+    """
+    Tipo de uma falha do yfinance
+
+    Retorna:
+    str: 'limite' (HTTP 429), 'transitorio' (rede, timeout, Yahoo fora do ar)
+        ou 'permanente' (ticker/período inválido, resposta não gravada)
+    """
+    nome = type(erro).__name__
+    if nome == 'YFRateLimitError':
+        return 'limite'
+    if isinstance(erro, ErroSemGravacao) or nome in ERROS_PERMANENTES or isinstance(erro, (ValueError, KeyError)):
+        return 'permanente'
+    status = getattr(getattr(erro, 'response', None), 'status_code', None)
+    if status is not None and 400 <= status < 500 and status not in (408, 429):
+        return 'permanente'
+    return 'transitorio'
+
+
+def ttl_resposta(parametros):
+    """
+    Segundos de validade da resposta (None = nunca expira)
+
+    Períodos com `end` no passado já estão fechados; `period` ('1mo', '5d')
+    sempre inclui o candle atual.
+    """
+    fim = parametros.get('end')
+    if fim is not None:
+        fim = pd.Timestamp(fim)
+        fim = fim.tz_localize('UTC') if fim.tz is None else fim.tz_convert('UTC')
+        if fim + ATRASO_DADOS <= pd.Timestamp.now(tz='UTC'):
+            return None
+    return TTL_INTERVALO.get(parametros.get('interval', '1d'), TTL_PADRAO)
+
+
+class CacheRespostas:
+    """
+    history() do yfinance com cache em disco, retry e circuit breaker
+
+    Uso:
+        cache = CacheRespostas()
+        df = cache.historico('PETR4.SA', period='1mo', interval='1d')
+    """
+
+    def __init__(self, diretorio=DIR_CACHE, modo=None, tentativas=4, base=2.0, maximo=60.0):
+        """
+        Parâmetros:
+        diretorio (str): Pasta dos parquets
+        modo (str): 'normal', 'gravar' ou 'reproduzir' (padrão: SENTINEL_YFINANCE ou 'normal')
+        tentativas (int): Tentativas por resposta em falhas transitórias
+        base, maximo (float): Backoff exponencial com jitter (resilience.tempo_backoff)
+        """
+        modo = modo or os.environ.get('SENTINEL_YFINANCE', 'normal')
+        if modo not in MODOS:
+            raise ValueError(f"Modo inválido: {modo} (use {', '.join(MODOS)})")
+        self.diretorio = diretorio
+        self.modo = modo
+        self.tentativas = tentativas
+        self.base = base
+        self.maximo = maximo
+        # Um só breaker: limite de requisições do Yahoo vale para todos os tickers
+        self.breaker = CircuitBreaker(limite_falhas=5, tempo_reset=120)
+        self.requisicoes = 0
+
+    def arquivo(self, ticker, parametros):
+        """ Parquet da resposta: ticker, intervalo e hash dos parâmetros """
+        chave = json.dumps({'ticker': ticker, **{k: str(v) for k, v in parametros.items()}}, sort_keys=True)
+        resumo = hashlib.blake2b(chave.encode('utf-8'), digest_size=8).hexdigest()
+        intervalo = parametros.get('interval', '1d')
+        return os.path.join(self.diretorio, f"{ticker.replace('.SA', '')}_{intervalo}_{resumo}.parquet")
+
+    def _valida(self, arquivo, ttl):
+        if not os.path.exists(arquivo):
+            return False
+        if self.modo == 'reproduzir' or ttl is None:
+            return True
+        return time.time() - os.path.getmtime(arquivo) < ttl
+
+    def _baixar(self, ticker, parametros):
+        intervalo = parametros.get('interval', '1d')
+        self.requisicoes += 1
+        try:
+            with span('precos.yfinance', intervalo=intervalo):
+                return yf.Ticker(ticker).history(**parametros)
+        except Exception as e:
+            contar('precos.erros', tipo=classificar_erro(e), intervalo=intervalo)
+            if type(e).__name__ in SEM_CANDLES:
+                return pd.DataFrame()
+            raise
+
+    def historico(self, ticker, **parametros):
+        """
+        yf.Ticker(ticker).history(**parametros), do cache quando possível
+
+        Parâmetros:
+        ticker (str): Ticker do Yahoo (ex: 'PETR4.SA')
+        parametros: Argumentos do history() (period/start/end/interval)
+
+        Retorna:
+        DataFrame: Resposta do yfinance (pode ser vazia)
+        """
+        intervalo = parametros.get('interval', '1d')
+        arquivo = self.arquivo(ticker, parametros)
+
+        if self.modo != 'gravar' and self._valida(arquivo, ttl_resposta(parametros)):
+            contar('precos.cache', resultado='hit', intervalo=intervalo)
+            return pd.read_parquet(arquivo)
+        contar('precos.cache', resultado='miss', intervalo=intervalo)
+        if self.modo == 'reproduzir':
+            raise ErroSemGravacao(f"Sem resposta gravada para {ticker} {parametros} em {self.diretorio}")
+
+        df = executar_com_retry(lambda: self._baixar(ticker, parametros),
+                                tentativas=self.tentativas, base=self.base, maximo=self.maximo,
+                                retentavel=lambda e: classificar_erro(e) != 'permanente',
+                                breaker=self.breaker,
+                                # Ticker ou período inválido é erro do pedido, não do Yahoo
+                                conta_no_breaker=lambda e: classificar_erro(e) != 'permanente')
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        temporario = f"{arquivo}.{os.getpid()}.tmp"
+        df.to_parquet(temporario)
+        os.replace(temporario, arquivo)
+        return df
+
+
+def descrever_erro(erro):
+    """ Mensagem curta com o tipo da falha (para os prints do PriceFetcher) """
+    if isinstance(erro, CircuitoAbertoError):
+        return "Yahoo Finance indisponível (circuit breaker aberto)"
+    return f"{classificar_erro(erro)}: {erro}"
@@ -1,23 +1,80 @@
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import time
 
+import dataset_writer
+import storage
+from instrumentation import contar
+from price_cache import CacheRespostas, classificar_erro, descrever_erro
+from schema import otimizar_precos
+
+# Limites do Yahoo Finance para candles intraday:
+# intervalo -> (dias por requisição, quantos dias para trás existem)
+LIMITES_INTRADAY = {
+    '1m': (7, 30),
+    '5m': (30, 60),
+    '15m': (30, 60)
+}
+
 class PriceFetcher:
     """
     Classe que busca preços históricos de ações brasileiras
     """
     
-    def __init__(self):
+    def __init__(self, cache_dir='data/cache/yfinance', modo=None):
+        """
+        Parâmetros:
+        cache_dir (str): Pasta do cache de respostas do yfinance
+        modo (str): 'normal', 'gravar' ou 'reproduzir' (ver price_cache)
+        """
+        self.cache_dir = cache_dir
+        self.cache = CacheRespostas(cache_dir, modo)
+        self.falhas = {}  # ticker -> tipo da última falha ('limite', 'transitorio', 'permanente')
         print("📈 Price Fetcher inicializado!")
     
-    def buscar_preco_acao(self, ticker, periodo='1mo'):
+    @staticmethod
+    def _ticker_yahoo(ticker):
+        # Adiciona .SA para ações brasileiras (B3)
+        return f"{ticker}.SA" if not ticker.endswith('.SA') else ticker
+    
+    @staticmethod
+    def _formatar(df, ticker):
+        """
+        Converte o retorno do yfinance para o formato do projeto
+        """
+        # Reseta index para ter a data como coluna
+        df = df.reset_index()
+        
+        # Adiciona coluna com ticker original
+        df['ticker'] = ticker.replace('.SA', '')
+        
+        # Calcula variação percentual entre candles
+        df['variacao_pct'] = df['Close'].pct_change() * 100
+        
+        # Renomeia colunas para português (intraday vem com 'Datetime')
+        df = df.rename(columns={
+            'Date': 'data',
+            'Datetime': 'data',
+            'Open': 'abertura',
+            'High': 'maxima',
+            'Low': 'minima',
+            'Close': 'fechamento',
+            'Volume': 'volume'
+        })
+        
+        # Seleciona colunas importantes, já com tipos compactos
+        return otimizar_precos(df[['data', 'ticker', 'abertura', 'fechamento', 'maxima', 
+                                   'minima', 'volume', 'variacao_pct']])
+    
+    def buscar_preco_acao(self, ticker, periodo='1mo', intervalo='1d'):
         """
         Busca dados históricos de uma ação
         
         Parâmetros:
         ticker (str): Código da ação (ex: 'PETR4.SA')
         periodo (str): Período ('1d', '5d', '1mo', '3mo', '1y')
+        intervalo (str): Tamanho do candle ('1d'; para '1m', '5m', '15m'
+            prefira buscar_intraday, que respeita os limites do Yahoo)
         
         Retorna:
         DataFrame: Dados históricos (data, abertura, fechamento, volume, etc)
@@ -25,148 +82,232 @@ class PriceFetcher:
         print(f"🔍 Buscando dados de {ticker}...")
         
         try:
-            # Adiciona .SA para ações brasileiras (B3)
-            if not ticker.endswith('.SA'):
-                ticker_yahoo = f"{ticker}.SA"
-            else:
-                ticker_yahoo = ticker
-            
-            # Busca dados no Yahoo Finance
-            acao = yf.Ticker(ticker_yahoo)
-            df = acao.history(period=periodo)
-            
-            if df.empty:
-                print(f"⚠️ Nenhum dado encontrado para {ticker}")
-                return None
-            
-            # Reseta index para ter a data como coluna
-            df = df.reset_index()
-            
-            # Adiciona coluna com ticker original
-            df['ticker'] = ticker.replace('.SA', '')
-            
-            # Calcula variação percentual diária
-            df['variacao_pct'] = df['Close'].pct_change() * 100
-            
-            # Renomeia colunas para português
-            df = df.rename(columns={
-                'Date': 'data',
-                'Open': 'abertura',
-                'High': 'maxima',
-                'Low': 'minima',
-                'Close': 'fechamento',
-                'Volume': 'volume'
-            })
-            
-            # Seleciona colunas importantes
-            df = df[['data', 'ticker', 'abertura', 'fechamento', 'maxima', 
-                    'minima', 'volume', 'variacao_pct']]
+            # Busca dados no Yahoo Finance (ou no cache, se ainda válido)
+            df = self.cache.historico(self._ticker_yahoo(ticker), period=periodo, interval=intervalo)
+        except Exception as e:
+            # Já passou pelos retries: falhas transitórias são tentadas de novo
+            # no fim de buscar_multiplas_acoes
+            self.falhas[ticker] = classificar_erro(e)
+            print(f"❌ Erro ao buscar {ticker} ({descrever_erro(e)})")
+            return None
+        self.falhas.pop(ticker, None)
+        
+        if df.empty:
+            print(f"⚠️ Nenhum dado encontrado para {ticker}")
+            return None
+        
+        df = self._formatar(df, ticker)
+        
+        print(f"✅ {len(df)} candles de dados obtidos!")
+        return df
+    
+    def buscar_intraday(self, ticker, intervalo='5m', dias=None, fim=None):
+        """
+        Busca candles intraday em blocos, com cache em disco
+        
+        O Yahoo limita quantos dias cabem numa requisição e até quando vai o
+        histórico intraday (ver LIMITES_INTRADAY). O período é dividido em
+        blocos de dias_bloco dias alinhados ao calendário (múltiplos contados a
+        partir de 1970-01-01): cada bloco pede sempre o mesmo start/end, então
+        blocos já encerrados ficam no cache de respostas e nunca são baixados
+        de novo. Só o bloco que contém hoje é baixado outra vez, quando vence
+        o TTL do intervalo (ver price_cache.TTL_INTERVALO).
+        
+        Parâmetros:
+        ticker (str): Código da ação
+        intervalo (str): '1m', '5m' ou '15m'
+        dias (int): Quantos dias para trás (padrão: o máximo disponível)
+        fim (datetime): Data final (padrão: agora)
+        
+        Retorna:
+        DataFrame: Candles no mesmo formato de buscar_preco_acao
+        """
+        if intervalo not in LIMITES_INTRADAY:
+            raise ValueError(f"Intervalo intraday inválido: {intervalo} (use {', '.join(LIMITES_INTRADAY)})")
+        
+        dias_bloco, dias_max = LIMITES_INTRADAY[intervalo]
+        dias = dias_max if dias is None else min(dias, dias_max)
+        hoje = pd.Timestamp.now(tz='UTC').normalize()
+        fim_aberto = fim is None  # até agora: o bloco atual é pedido inteiro (end no futuro)
+        if fim is None:
+            fim = hoje + pd.Timedelta(days=1)
+        else:
+            fim = pd.Timestamp(fim)
+            fim = (fim.tz_localize('UTC') if fim.tz is None else fim.tz_convert('UTC')).normalize()
+        limite = hoje - pd.Timedelta(days=dias_max - 1)  # o Yahoo não tem intraday antes disso
+        inicio = max(fim - pd.Timedelta(days=dias), limite)
+        
+        print(f"🔍 Buscando candles de {intervalo} de {ticker} ({inicio:%d/%m} a {fim:%d/%m})...")
+        
+        passo = pd.Timedelta(days=dias_bloco)
+        origem = pd.Timestamp(0, tz='UTC')
+        blocos = []
+        falhou = False
+        bloco_inicio = origem + ((inicio - origem) // passo) * passo
+        while bloco_inicio < fim:
+            proximo = bloco_inicio + passo
+            # Só o bloco mais antigo é cortado (no limite do Yahoo) e só o
+            # último, se `fim` foi dado; os demais têm sempre as mesmas bordas
+            bloco_fim = proximo if fim_aberto else min(proximo, fim)
+            bloco_inicio = max(bloco_inicio, limite)
+            try:
+                # Blocos encerrados nunca expiram; o de hoje vale pelo TTL do intervalo
+                df = self.cache.historico(self._ticker_yahoo(ticker), start=bloco_inicio,
+                                          end=bloco_fim, interval=intervalo)
+            except Exception as e:
+                falhou = True
+                self.falhas[ticker] = classificar_erro(e)
+                print(f"  ❌ Erro no bloco {bloco_inicio:%d/%m}-{bloco_fim:%d/%m} ({descrever_erro(e)})")
+                df = pd.DataFrame()
             
-            print(f"✅ {len(df)} dias de dados obtidos!")
-            return df
+            if not df.empty:
+                blocos.append(self._formatar(df, ticker))
             
-        except Exception as e:
-            print(f"❌ Erro ao buscar {ticker}: {e}")
+            bloco_inicio = proximo
+        
+        if not falhou:
+            self.falhas.pop(ticker, None)
+        if not blocos:
+            print(f"⚠️ Nenhum candle intraday encontrado para {ticker}")
             return None
+        
+        df = pd.concat(blocos, ignore_index=True)
+        df = df.drop_duplicates(subset=['data']).sort_values('data', ignore_index=True)
+        # Os blocos alinhados podem passar do período pedido
+        df = df[(df['data'] >= inicio) & (df['data'] < fim)].reset_index(drop=True)
+        # A variação é recalculada sobre a série inteira (as bordas dos blocos ficariam vazias)
+        df['variacao_pct'] = (df['fechamento'].pct_change() * 100).astype('float32')
+        
+        print(f"✅ {len(df)} candles de {intervalo} obtidos!")
+        return df
     
-    def buscar_multiplas_acoes(self, tickers_list, periodo='1mo'):
+    def buscar_multiplas_acoes(self, tickers_list, periodo='1mo', intervalo='1d'):
         """
         Busca dados de múltiplas ações
         
         Parâmetros:
         tickers_list (list): Lista de tickers ['PETR4', 'VALE3']
-        periodo (str): Período de dados
+        periodo (str): Período de dados (ignorado nos intervalos intraday)
+        intervalo (str): '1d' ou um intervalo intraday ('1m', '5m', '15m')
+        
+        Tickers que falharam por limite de requisições ou erro de rede são
+        tentados mais uma vez depois dos demais; os que continuarem falhando
+        ficam em self.falhas.
         
         Retorna:
         DataFrame: Todos os dados concatenados
         """
         todos_dados = []
         
-        for ticker in tickers_list:
-            df = self.buscar_preco_acao(ticker, periodo)
+        def buscar(ticker):
+            requisicoes = self.cache.requisicoes
+            if intervalo in LIMITES_INTRADAY:
+                df = self.buscar_intraday(ticker, intervalo)
+            else:
+                df = self.buscar_preco_acao(ticker, periodo, intervalo)
             if df is not None:
                 todos_dados.append(df)
-            time.sleep(1)  # Pausa de 1 segundo entre requisições
+            if self.cache.requisicoes > requisicoes:
+                time.sleep(1)  # Pausa de 1 segundo entre requisições (respostas do cache não esperam)
+        
+        for ticker in tickers_list:
+            buscar(ticker)
+        
+        # Segunda rodada só para falhas transitórias (o throttle pode ter passado)
+        pendentes = [t for t in tickers_list if self.falhas.get(t) in ('limite', 'transitorio')]
+        if pendentes:
+            print(f"🔁 Tentando de novo: {', '.join(pendentes)}")
+            contar('precos.segunda_rodada', len(pendentes))
+            for ticker in pendentes:
+                buscar(ticker)
+        sem_dados = [t for t in tickers_list if t in self.falhas]
+        if sem_dados:
+            print(f"⚠️ Sem dados de {', '.join(sem_dados)}")
         
         if todos_dados:
-            df_completo = pd.concat(todos_dados, ignore_index=True)
+            # concat de categorias diferentes vira object: recompacta o resultado
+            df_completo = otimizar_precos(pd.concat(todos_dados, ignore_index=True))
             print(f"\n🎉 Total: {len(df_completo)} registros de {len(tickers_list)} ações")
             return df_completo
         else:
             print("⚠️ Nenhum dado foi coletado")
             return None
     
-    def calcular_variacao_periodo(self, ticker, data_inicio, data_fim):
+    def calcular_variacao_periodo(self, ticker, data_inicio, data_fim, arquivo='data/precos.csv'):
         """
         Calcula a variação de preço entre duas datas
         
+        Usa o histórico local (price_stats); só vai ao Yahoo Finance quando
+        o arquivo não existe, não tem dois fechamentos no período ou ainda
+        não chegou ao último pregão antes de data_fim.
+        
         Parâmetros:
         ticker (str): Código da ação
-        data_inicio (str): Data inicial 'YYYY-MM-DD'
-        data_fim (str): Data final 'YYYY-MM-DD'
+        data_inicio (str): Data inicial 'YYYY-MM-DD' (inclusiva)
+        data_fim (str): Data final 'YYYY-MM-DD' (exclusiva, como no yfinance)
+        arquivo (str): Histórico de preços local
         
         Retorna:
         dict: Variação percentual e absoluta
         """
+        if storage.existe(arquivo):
+            from price_stats import estatisticas
+            resultado = estatisticas(arquivo).variacao(ticker, data_inicio, data_fim)
+            if resultado is not None:
+                contar('precos.variacao', origem='local')
+                return resultado
+        
+        contar('precos.variacao', origem='yfinance')
         try:
-            ticker_yahoo = f"{ticker}.SA" if not ticker.endswith('.SA') else ticker
-            acao = yf.Ticker(ticker_yahoo)
-            
-            # Busca dados do período
-            df = acao.history(start=data_inicio, end=data_fim)
-            
-            if len(df) < 2:
-                return None
-            
-            preco_inicial = df['Close'].iloc[0]
-            preco_final = df['Close'].iloc[-1]
-            variacao_pct = ((preco_final - preco_inicial) / preco_inicial) * 100
-            variacao_abs = preco_final - preco_inicial
-            
-            return {
-                'ticker': ticker.replace('.SA', ''),
-                'preco_inicial': round(preco_inicial, 2),
-                'preco_final': round(preco_final, 2),
-                'variacao_pct': round(variacao_pct, 2),
-                'variacao_abs': round(variacao_abs, 2),
-                'data_inicio': data_inicio,
-                'data_fim': data_fim
-            }
-            
+            df = self.cache.historico(self._ticker_yahoo(ticker), start=data_inicio, end=data_fim)
         except Exception as e:
-            print(f"❌ Erro ao calcular variação: {e}")
+            print(f"❌ Erro ao calcular variação ({descrever_erro(e)})")
             return None
+        
+        if len(df) < 2:
+            return None
+        
+        from price_stats import EstatisticasPrecos
+        return EstatisticasPrecos(self._formatar(df, ticker)).variacao(ticker, data_inicio, data_fim)
     
     def salvar_dados(self, df, nome_arquivo='data/precos.csv'):
         """
-        Salva dados de preços em CSV
+        Salva dados de preços no histórico local (append-only, ver dataset_writer)
+        
+        Candles já gravados (mesmo ticker e data) são atualizados, os demais acrescentados.
         """
         if df is not None and not df.empty:
-            df.to_csv(nome_arquivo, index=False, encoding='utf-8-sig')
-            print(f"💾 Dados salvos em {nome_arquivo}")
+            linhas = dataset_writer.dataset(nome_arquivo).acrescentar(df)
+            print(f"💾 {linhas} linhas salvas em {dataset_writer.pasta_dataset(nome_arquivo)}")
         else:
             print("⚠️ Nenhum dado para salvar")
     
-    def resumo_precos(self, df):
+    def resumo_precos(self, df=None, arquivo='data/precos.csv'):
         """
-        Mostra resumo estatístico dos preços
+        Mostra resumo estatístico dos preços (todos os ativos numa passada)
+        
+        Parâmetros:
+        df: DataFrame de preços (padrão: o histórico local em `arquivo`)
+        
+        Retorna:
+        DataFrame: Resumo por ativo (ver price_stats.EstatisticasPrecos.resumo)
         """
+        from price_stats import EstatisticasPrecos, estatisticas
+        
+        resumo = (estatisticas(arquivo) if df is None else EstatisticasPrecos(df)).resumo()
         print("\n📊 RESUMO DOS PREÇOS:\n")
         
-        for ticker in df['ticker'].unique():
-            df_ticker = df[df['ticker'] == ticker]
-            
-            preco_atual = df_ticker['fechamento'].iloc[-1]
-            preco_minimo = df_ticker['minima'].min()
-            preco_maximo = df_ticker['maxima'].max()
-            variacao_media = df_ticker['variacao_pct'].mean()
-            
-            print(f"{ticker}:")
-            print(f"  Preço atual: R$ {preco_atual:.2f}")
-            print(f"  Mínima do período: R$ {preco_minimo:.2f}")
-            print(f"  Máxima do período: R$ {preco_maximo:.2f}")
-            print(f"  Variação média diária: {variacao_media:.2f}%")
+        for linha in resumo.itertuples(index=False):
+            print(f"{linha.ticker}:")
+            print(f"  Preço atual: R$ {linha.preco_atual:.2f}")
+            print(f"  Mínima do período: R$ {linha.minima:.2f}")
+            print(f"  Máxima do período: R$ {linha.maxima:.2f}")
+            print(f"  Variação média diária: {linha.variacao_media:.2f}%")
+            print(f"  Volatilidade diária: {linha.volatilidade:.2f}%")
+            print(f"  Maior queda desde o topo: {linha.drawdown_maximo:.2f}%")
             print()
+        
+        return resumo
 
 
 # TESTE DO PRICE FETCHER
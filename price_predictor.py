@@ -2,10 +2,22 @@ import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.decomposition import PCA
 from sklearn.metrics import mean_absolute_error, r2_score
 import pickle
 from datetime import datetime, timedelta
 
+from date_parser import normalizar_datas
+from event_windows import retornos_evento, retorno_proximo_fechamento
+from instrumentation import medido
+from schema import otimizar_precos, otimizar_noticias, alinhar_categorias, carregar_precos, carregar_noticias
+
+# Codificação do sentimento usada como feature
+CODIGOS_SENTIMENTO = {'positivo': 1, 'neutro': 0, 'negativo': -1}
+
+FEATURES_BASE = ['sentimento_encoded', 'confianca', 'score_positivo',
+                 'score_negativo', 'score_neutro']
+
 class PriceImpactPredictor:
     """
     Modelo que prevê o impacto de notícias no preço das ações
@@ -14,88 +26,133 @@ class PriceImpactPredictor:
     def __init__(self):
         self.model = None
         self.feature_names = []
+        self.pca = None  # redução dos embeddings das manchetes (None = sem embeddings)
         print("🧠 Price Impact Predictor inicializado!")
     
-    def preparar_dados(self, df_noticias, df_precos):
+    @medido('predictor.preparar_dados')
+    def preparar_dados(self, df_noticias, df_precos, janela=None):
         """
         Combina notícias com dados de preço para criar dataset de treino
         
         Parâmetros:
         df_noticias: DataFrame com notícias e sentimentos
         df_precos: DataFrame com preços históricos
+        janela (str): Horizonte do alvo após a notícia ('5min', '30min', '1D').
+            Use com preços intraday; sem janela, o alvo é a variação até o
+            próximo fechamento diário.
         
         Retorna:
         DataFrame: Dataset pronto para treino
         """
         print("🔧 Preparando dados para treino...")
         
-        # Converte data para datetime
-        df_precos['data'] = pd.to_datetime(df_precos['data'])
+        # Tipos compactos e datas em UTC (notícias e preços na mesma escala de tempo)
+        df_precos = otimizar_precos(df_precos)
+        df_precos['data'] = df_precos['data'].dt.tz_convert('UTC')
         
-        # Para cada notícia, busca variação de preço do dia
-        dados_treino = []
+        noticias = otimizar_noticias(df_noticias)
+        noticias = noticias[noticias['ticker'].isin(df_precos['ticker'].unique())].copy()
+        alinhar_categorias(noticias, df_precos)
+        if 'data_utc' in noticias.columns:
+            noticias['data_noticia'] = noticias['data_utc']
+        else:
+            noticias['data_noticia'] = normalizar_datas(noticias['data'])
         
-        for idx, noticia in df_noticias.iterrows():
-            ticker = noticia['ticker']
-            
-            # Filtra preços desse ticker
-            precos_ticker = df_precos[df_precos['ticker'] == ticker].copy()
-            
-            if len(precos_ticker) == 0:
-                continue
-            
-            # Pega data mais recente (simulando notícia de hoje)
-            # Em produção real, você parsearia a data da notícia
-            data_noticia = precos_ticker['data'].max()
-            
-            # Busca variação do preço após a notícia (próximo dia útil)
-            preco_antes = precos_ticker[precos_ticker['data'] <= data_noticia]['fechamento'].iloc[-1]
-            
-            # Tenta pegar preço do dia seguinte
-            proximos_dias = precos_ticker[precos_ticker['data'] > data_noticia]
-            if len(proximos_dias) > 0:
-                preco_depois = proximos_dias['fechamento'].iloc[0]
-                variacao_real = ((preco_depois - preco_antes) / preco_antes) * 100
-            else:
-                # Se não tem dia seguinte, usa variação do próprio dia
-                variacao_real = precos_ticker[precos_ticker['data'] == data_noticia]['variacao_pct'].iloc[-1]
-            
-            # Cria features (características) para o modelo
-            dados_treino.append({
-                'ticker': ticker,
-                'sentimento': noticia['sentimento'],
-                'confianca': noticia['confianca'],
-                'score_positivo': noticia['score_positivo'],
-                'score_negativo': noticia['score_negativo'],
-                'score_neutro': noticia['score_neutro'],
-                'variacao_real': variacao_real  # Target (o que queremos prever)
-            })
-        
-        df_treino = pd.DataFrame(dados_treino)
+        # Notícias sem data reconhecível ("Data antiga") ficam no último pregão do ativo
+        sem_data = noticias['data_noticia'].isna()
+        if sem_data.any():
+            ultimo_pregao = df_precos.groupby('ticker', observed=True)['data'].max()
+            noticias.loc[sem_data, 'data_noticia'] = noticias.loc[sem_data, 'ticker'].astype(object).map(ultimo_pregao)
+            print(f"   ⚠️ {sem_data.sum()} notícias sem data: usando o último pregão")
+        
+        if janela is not None:
+            # Alvo: retorno na janela logo após a notícia (candles intraday)
+            noticias['variacao_real'] = retornos_evento(
+                noticias, df_precos, janelas={'variacao_real': janela}
+            )['variacao_real']
+            noticias = noticias.dropna(subset=['variacao_real'])
+        else:
+            noticias = self._variacao_proximo_fechamento(noticias, df_precos)
+        
+        # Cria features (características) para o modelo
+        # (o título fica junto para buscar o embedding da manchete no cache)
+        colunas = ['ticker', 'data_noticia', 'sentimento', 'confianca',
+                   'score_positivo', 'score_negativo', 'score_neutro', 'variacao_real']
+        if 'titulo' in noticias.columns:
+            colunas.insert(1, 'titulo')
+        df_treino = noticias[colunas].reset_index(drop=True)
         
         # Codifica sentimento (positivo=1, neutro=0, negativo=-1)
-        df_treino['sentimento_encoded'] = df_treino['sentimento'].map({
-            'positivo': 1,
-            'neutro': 0,
-            'negativo': -1
-        })
+        df_treino['sentimento_encoded'] = df_treino['sentimento'].astype(object).map(
+            CODIGOS_SENTIMENTO
+        ).astype('float32')
         
         print(f"✅ Dataset preparado: {len(df_treino)} exemplos")
         return df_treino
     
-    def treinar_modelo(self, df_treino):
+    def _variacao_proximo_fechamento(self, noticias, df_precos):
+        """
+        Alvo diário: variação do último fechamento conhecido na notícia até o
+        fechamento seguinte (ex: notícia às 14h -> véspera até o fechamento do
+        dia); notícias depois do último candle ficam de fora
+        """
+        noticias['variacao_real'] = retorno_proximo_fechamento(noticias, df_precos).to_numpy()
+        return noticias.dropna(subset=['variacao_real'])
+    
+    def _componentes(self, embeddings, n):
+        """
+        Embeddings reduzidos pelo PCA do modelo (emb_0, emb_1, ...)
+        
+        Linhas sem embedding (NaN ou embeddings=None) ficam com 0, que é a
+        média do treino depois da centralização do PCA.
+        """
+        colunas = [f'emb_{i}' for i in range(self.pca.n_components_)]
+        if embeddings is None:
+            return np.zeros((n, len(colunas)), dtype=np.float32), colunas
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(n, -1)
+        validas = ~np.isnan(embeddings).any(axis=1)
+        componentes = np.zeros((n, len(colunas)), dtype=np.float32)
+        if validas.any():
+            componentes[validas] = self.pca.transform(embeddings[validas])
+        return componentes, colunas
+    
+    @medido('predictor.treinar_modelo')
+    def treinar_modelo(self, df_treino, n_jobs=-1, verbose=True, embeddings=None, n_componentes=16):
         """
         Treina o modelo de Machine Learning
+        
+        Parâmetros:
+        n_jobs (int): Cores usados pela floresta (-1 = todos; use 1 ao treinar vários modelos em paralelo)
+        verbose (bool): Imprime métricas e importância das features
+        embeddings (ndarray): Embeddings das manchetes, uma linha por linha de
+            df_treino (NaN onde não houver); reduzidos por PCA viram features extras
+        n_componentes (int): Componentes do PCA usados como features
         """
-        print("\n🎓 Treinando modelo...")
+        if verbose:
+            print("\n🎓 Treinando modelo...")
         
         # Define features (X) e target (y)
-        feature_cols = ['sentimento_encoded', 'confianca', 'score_positivo', 
-                       'score_negativo', 'score_neutro']
-        
+        feature_cols = list(FEATURES_BASE)
         X = df_treino[feature_cols]
         y = df_treino['variacao_real']
         
+        self.pca = None
+        if embeddings is not None:
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            validas = ~np.isnan(embeddings).any(axis=1)
+            n_componentes = min(n_componentes, int(validas.sum()), embeddings.shape[1])
+            if n_componentes > 0:
+                self.pca = PCA(n_components=n_componentes, random_state=42).fit(embeddings[validas])
+                componentes, colunas = self._componentes(embeddings, len(df_treino))
+                X = pd.concat([X.reset_index(drop=True),
+                               pd.DataFrame(componentes, columns=colunas)], axis=1)
+                X.index = df_treino.index
+                feature_cols = feature_cols + colunas
+                if verbose:
+                    print(f"   🧮 {n_componentes} componentes de embedding "
+                          f"({self.pca.explained_variance_ratio_.sum():.0%} da variância, "
+                          f"{validas.sum()}/{len(validas)} manchetes com embedding)")
+        
         self.feature_names = feature_cols
         
         # Divide em treino e teste (80% treino, 20% teste)
@@ -108,7 +165,7 @@ class PriceImpactPredictor:
             n_estimators=100,  # 100 árvores
             max_depth=10,
             random_state=42,
-            n_jobs=-1  # Usa todos os cores do PC
+            n_jobs=n_jobs  # -1 = usa todos os cores do PC
         )
         
         self.model.fit(X_train, y_train)
@@ -118,31 +175,35 @@ class PriceImpactPredictor:
         mae = mean_absolute_error(y_test, y_pred)
         r2 = r2_score(y_test, y_pred)
         
-        print(f"✅ Modelo treinado!")
-        print(f"📊 Métricas:")
-        print(f"   MAE (Erro Médio Absoluto): {mae:.2f}%")
-        print(f"   R² Score: {r2:.3f}")
-        print(f"\n💡 Interpretação:")
-        print(f"   O modelo erra em média {mae:.2f}% na previsão")
-        print(f"   R² de {r2:.3f} {'(bom)' if r2 > 0.5 else '(precisa mais dados)'}")
+        if verbose:
+            print(f"✅ Modelo treinado!")
+            print(f"📊 Métricas:")
+            print(f"   MAE (Erro Médio Absoluto): {mae:.2f}%")
+            print(f"   R² Score: {r2:.3f}")
+            print(f"\n💡 Interpretação:")
+            print(f"   O modelo erra em média {mae:.2f}% na previsão")
+            print(f"   R² de {r2:.3f} {'(bom)' if r2 > 0.5 else '(precisa mais dados)'}")
         
-        # Mostra importância das features
-        importancias = pd.DataFrame({
-            'feature': feature_cols,
-            'importancia': self.model.feature_importances_
-        }).sort_values('importancia', ascending=False)
+            # Mostra importância das features
+            importancias = pd.DataFrame({
+                'feature': feature_cols,
+                'importancia': self.model.feature_importances_
+            }).sort_values('importancia', ascending=False)
         
-        print(f"\n🔍 Features mais importantes:")
-        for _, row in importancias.iterrows():
-            print(f"   {row['feature']}: {row['importancia']:.3f}")
+            print(f"\n🔍 Features mais importantes:")
+            for _, row in importancias.iterrows():
+                print(f"   {row['feature']}: {row['importancia']:.3f}")
         
         return mae, r2
     
     def prever_impacto(self, sentimento, confianca, score_positivo, 
-                       score_negativo, score_neutro):
+                       score_negativo, score_neutro, embedding=None):
         """
         Prevê o impacto de uma notícia no preço
         
+        Parâmetros:
+        embedding (ndarray): Embedding da manchete (usado se o modelo foi treinado com embeddings)
+        
         Retorna:
         dict: Previsão de variação percentual
         """
@@ -151,7 +212,7 @@ class PriceImpactPredictor:
             return None
         
         # Codifica sentimento
-        sentimento_encoded = {'positivo': 1, 'neutro': 0, 'negativo': -1}[sentimento]
+        sentimento_encoded = CODIGOS_SENTIMENTO[sentimento]
         
         # Prepara features
         features = np.array([[
@@ -161,6 +222,8 @@ class PriceImpactPredictor:
             score_negativo,
             score_neutro
         ]])
+        if self.pca is not None:
+            features = np.hstack([features, self._componentes(embedding, 1)[0]])
         
         # Faz previsão
         variacao_prevista = self.model.predict(features)[0]
@@ -171,6 +234,35 @@ class PriceImpactPredictor:
             'intensidade': abs(variacao_prevista)
         }
     
+    @medido('predictor.prever_lote')
+    def prever_lote(self, df, embeddings=None):
+        """
+        Prevê o impacto de várias notícias de uma vez
+        
+        Parâmetros:
+        df: DataFrame com sentimento, confianca e scores (ex: saída do analisador)
+        embeddings (ndarray): Embeddings das manchetes, uma linha por linha de df
+        
+        Retorna:
+        DataFrame: variacao_prevista e direcao, com o índice de df
+        """
+        if self.model is None:
+            print("❌ Modelo não foi treinado ainda!")
+            return None
+        
+        X = df.reindex(columns=self.feature_names)
+        if 'sentimento_encoded' in self.feature_names and 'sentimento' in df.columns:
+            X['sentimento_encoded'] = df['sentimento'].astype(object).map(CODIGOS_SENTIMENTO)
+        if self.pca is not None:
+            componentes, colunas = self._componentes(embeddings, len(df))
+            X[colunas] = componentes
+        
+        variacao = self.model.predict(X.astype('float32'))
+        return pd.DataFrame({
+            'variacao_prevista': variacao.round(2),
+            'direcao': np.where(variacao > 0, '📈 ALTA', '📉 QUEDA')
+        }, index=df.index)
+    
     def salvar_modelo(self, nome_arquivo='data/modelo_predictor.pkl'):
         """
         Salva o modelo treinado
@@ -179,7 +271,8 @@ class PriceImpactPredictor:
             with open(nome_arquivo, 'wb') as f:
                 pickle.dump({
                     'model': self.model,
-                    'feature_names': self.feature_names
+                    'feature_names': self.feature_names,
+                    'pca': self.pca
                 }, f)
             print(f"💾 Modelo salvo em {nome_arquivo}")
         else:
@@ -194,6 +287,7 @@ class PriceImpactPredictor:
                 data = pickle.load(f)
                 self.model = data['model']
                 self.feature_names = data['feature_names']
+                self.pca = data.get('pca')  # modelos antigos não têm embeddings
             print(f"✅ Modelo carregado de {nome_arquivo}")
             return True
         except FileNotFoundError:
@@ -209,8 +303,8 @@ if __name__ == "__main__":
     
     # Carrega dados
     try:
-        df_noticias = pd.read_csv('data/noticias_com_sentimento.csv')
-        df_precos = pd.read_csv('data/precos.csv')
+        df_noticias = carregar_noticias('data/noticias_com_sentimento.csv')
+        df_precos = carregar_precos('data/precos.csv')
         
         print(f"\n📊 Dados carregados:")
         print(f"   Notícias: {len(df_noticias)}")
@@ -0,0 +1,283 @@
+"""
+Estatísticas de preços por ativo, calculadas sobre o precos.csv local
+
+Os candles ficam ordenados por (ticker, data) em arrays contínuos. O resumo
+de todos os ativos sai de uma única passada agrupada (reduceat nos limites de
+cada ativo) e as consultas de variação por período usam somas prefixadas dos
+retornos: cada janela (ticker, início, fim) custa duas buscas binárias e
+algumas subtrações, e milhares de janelas são respondidas de uma vez.
+
+    python price_stats.py                                # resumo de data/precos.csv
+    python price_stats.py --janela PETR4 2025-12-01 2026-01-05
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from date_parser import FUSO_PADRAO
+from instrumentation import medido
+from storage import ARQUIVO_PRECOS
+
+
+def _normalizar_ticker(ticker):
+    ticker = str(ticker).strip().upper()
+    return ticker[:-3] if ticker.endswith('.SA') else ticker
+
+
+def _codigos_tickers(tickers, indice):
+    """ Código de cada ticker em `indice` (-1 se ausente), normalizando cada valor distinto uma vez """
+    codigos, valores = pd.factorize(pd.Series(tickers).astype(str))
+    mapa = np.array([indice.get(_normalizar_ticker(v), -1) for v in valores] + [-1], dtype=np.int64)
+    return mapa[codigos]
+
+
+def _instantes(datas, fuso=FUSO_PADRAO):
+    """ Datas ('AAAA-MM-DD', datetime, Timestamp) -> ns UTC; sem fuso = horário da B3 """
+    datas = pd.to_datetime(pd.Series(datas))
+    if datas.dt.tz is None:
+        datas = datas.dt.tz_localize(fuso)
+    return datas.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy('datetime64[ns]').view('int64')
+
+
+class EstatisticasPrecos:
+    """
+    Candles de todos os ativos em arrays ordenados, com somas prefixadas
+
+    - fechamento, minima, maxima: float64, ordenados por (ticker, data)
+    - _inicios: posição do primeiro candle de cada ativo (n_tickers + 1 valores)
+    - _soma / _soma_quadrados / _contagem: prefixos dos retornos simples (%)
+      dentro de cada ativo; o primeiro candle de cada ativo não tem retorno
+    """
+
+    def __init__(self, df_precos):
+        """
+        Parâmetros:
+        df_precos: DataFrame com data, ticker e fechamento (minima/maxima opcionais)
+        """
+        df = df_precos[df_precos['fechamento'].notna() & df_precos['ticker'].notna()]
+        self.tickers = np.unique([_normalizar_ticker(t) for t in pd.unique(df['ticker'].astype(str))])
+        self._indice = {t: i for i, t in enumerate(self.tickers)}
+        codigos = _codigos_tickers(df['ticker'], self._indice)
+
+        datas = _instantes(df['data'])
+        ordem = np.lexsort((datas, codigos))
+        self._codigos = codigos[ordem]
+        self.datas = datas[ordem]
+        self.fechamento = df['fechamento'].to_numpy(dtype=np.float64)[ordem]
+        self.minima = (df['minima'] if 'minima' in df.columns else df['fechamento']).to_numpy(dtype=np.float64)[ordem]
+        self.maxima = (df['maxima'] if 'maxima' in df.columns else df['fechamento']).to_numpy(dtype=np.float64)[ordem]
+        self._inicios = np.searchsorted(self._codigos, np.arange(len(self.tickers) + 1))
+
+        # Chave única (ticker, data) para buscar janelas de todos os ativos num só searchsorted
+        self._datas_unicas, posicao = np.unique(self.datas, return_inverse=True)
+        self._passo = len(self._datas_unicas) + 1
+        self._chaves = self._codigos * self._passo + posicao
+
+        retornos = np.empty(len(self.fechamento))
+        retornos[1:] = (self.fechamento[1:] / self.fechamento[:-1] - 1) * 100
+        retornos[self._inicios[:-1]] = np.nan  # primeiro candle de cada ativo
+        validos = np.isfinite(retornos)
+        retornos[~validos] = 0.0
+        self._soma = np.concatenate([[0.0], np.cumsum(retornos)])
+        self._soma_quadrados = np.concatenate([[0.0], np.cumsum(retornos ** 2)])
+        self._contagem = np.concatenate([[0], np.cumsum(validos)])
+
+    def __len__(self):
+        return len(self.fechamento)
+
+    @staticmethod
+    def _media_desvio(soma, quadrados, n):
+        """ Média e desvio amostral (ddof=1) a partir das somas; NaN sem amostras suficientes """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media = np.where(n > 0, soma / n, np.nan)
+            variancia = np.where(n > 1, (quadrados - n * media ** 2) / (n - 1), np.nan)
+        return media, np.sqrt(np.maximum(variancia, 0.0))
+
+    @medido('precos.resumo')
+    def resumo(self):
+        """
+        Resumo de todos os ativos numa passada
+
+        Retorna:
+        DataFrame: ticker, preco_atual, minima, maxima, variacao_media,
+            volatilidade (desvio dos retornos diários, %), drawdown_maximo (%),
+            variacao_total (%), pregoes, inicio e fim
+        """
+        inicios, fins = self._inicios[:-1], self._inicios[1:]
+        if len(inicios) == 0:
+            return pd.DataFrame(columns=['ticker', 'preco_atual', 'minima', 'maxima', 'variacao_media',
+                                         'volatilidade', 'drawdown_maximo', 'variacao_total',
+                                         'pregoes', 'inicio', 'fim'])
+        n = self._contagem[fins] - self._contagem[inicios]
+        media, desvio = self._media_desvio(self._soma[fins] - self._soma[inicios],
+                                           self._soma_quadrados[fins] - self._soma_quadrados[inicios], n)
+
+        # Drawdown: fechamento contra o maior fechamento anterior do mesmo ativo
+        pico = pd.Series(self.fechamento).groupby(self._codigos).cummax().to_numpy()
+        drawdown = (self.fechamento / pico - 1) * 100
+
+        primeiro, ultimo = self.fechamento[inicios], self.fechamento[fins - 1]
+        return pd.DataFrame({
+            'ticker': self.tickers,
+            'preco_atual': ultimo,
+            'minima': np.minimum.reduceat(self.minima, inicios),
+            'maxima': np.maximum.reduceat(self.maxima, inicios),
+            'variacao_media': media,
+            'volatilidade': desvio,
+            'drawdown_maximo': np.minimum.reduceat(drawdown, inicios),
+            'variacao_total': (ultimo / primeiro - 1) * 100,
+            'pregoes': fins - inicios,
+            'inicio': pd.to_datetime(self.datas[inicios], utc=True).tz_convert(FUSO_PADRAO),
+            'fim': pd.to_datetime(self.datas[fins - 1], utc=True).tz_convert(FUSO_PADRAO)
+        })
+
+    @medido('precos.janelas')
+    def janelas(self, tickers, inicios, fins):
+        """
+        Variação de preço em muitas janelas (ticker, início, fim) de uma vez
+
+        Como o history(start, end) do yfinance, o início é inclusivo e o fim
+        exclusivo: usa o primeiro fechamento a partir de `inicio` e o último
+        antes de `fim`.
+
+        Parâmetros:
+        tickers (list): Ativo de cada janela ('PETR4' ou 'PETR4.SA')
+        inicios, fins (list): Datas de cada janela (sem fuso = horário da B3)
+
+        Retorna:
+        DataFrame: preco_inicial, preco_final, variacao_pct, variacao_abs,
+            variacao_media, volatilidade, pregoes e data_final (do último
+            fechamento usado), uma linha por janela (NaN/NaT quando a janela
+            tem menos de dois fechamentos)
+        """
+        codigos = _codigos_tickers(tickers, self._indice)
+        conhecidos = codigos >= 0
+        base = np.where(conhecidos, codigos, 0) * self._passo
+        i = np.searchsorted(self._chaves, base + np.searchsorted(self._datas_unicas, _instantes(inicios)))
+        j = np.searchsorted(self._chaves, base + np.searchsorted(self._datas_unicas, _instantes(fins))) - 1
+        validas = conhecidos & (j > i)
+        i = np.where(validas, i, 0)
+        j = np.where(validas, j, 0)
+
+        # Retornos do candle i+1 até j (o de i é a variação em relação ao dia anterior)
+        n = np.where(validas, self._contagem[j + 1] - self._contagem[i + 1], 0)
+        media, desvio = self._media_desvio(self._soma[j + 1] - self._soma[i + 1],
+                                           self._soma_quadrados[j + 1] - self._soma_quadrados[i + 1], n)
+        inicial = np.where(validas, self.fechamento[i], np.nan)
+        final = np.where(validas, self.fechamento[j], np.nan)
+        return pd.DataFrame({
+            'ticker': np.where(conhecidos, self.tickers[np.maximum(codigos, 0)], None),
+            'preco_inicial': inicial,
+            'preco_final': final,
+            'variacao_pct': (final / inicial - 1) * 100,
+            'variacao_abs': final - inicial,
+            'variacao_media': np.where(validas, media, np.nan),
+            'volatilidade': np.where(validas, desvio, np.nan),
+            'pregoes': np.where(validas, j - i + 1, 0),
+            'data_final': pd.to_datetime(np.where(validas, self.datas[j], np.iinfo(np.int64).min),
+                                         utc=True).tz_convert(FUSO_PADRAO)
+        })
+
+    def variacao(self, ticker, data_inicio, data_fim):
+        """
+        Variação de uma janela, no formato de PriceFetcher.calcular_variacao_periodo
+
+        O histórico precisa ter o último pregão (calendário da B3) antes de
+        `data_fim` que já abriu; um arquivo parado semanas antes daria uma
+        variação velha. O pregão de hoje só é exigido depois da abertura.
+
+        Retorna:
+        dict: ticker, preços, variação % e absoluta, datas; None sem dados suficientes
+        """
+        from scheduler import ultimo_pregao_iniciado
+
+        linha = self.janelas([ticker], [data_inicio], [data_fim]).iloc[0]
+        if linha['pregoes'] < 2:
+            return None
+        exigido = ultimo_pregao_iniciado(pd.Timestamp(data_fim).date(), pd.Timestamp.now(tz=FUSO_PADRAO))
+        if linha['data_final'].date() < exigido:
+            return None
+        return {
+            'ticker': linha['ticker'],
+            'preco_inicial': round(float(linha['preco_inicial']), 2),
+            'preco_final': round(float(linha['preco_final']), 2),
+            'variacao_pct': round(float(linha['variacao_pct']), 2),
+            'variacao_abs': round(float(linha['variacao_abs']), 2),
+            'data_inicio': data_inicio,
+            'data_fim': data_fim
+        }
+
+
+# Última estrutura montada: refeita só quando storage devolve outro DataFrame
+_estatisticas = {}
+_lock = threading.Lock()
+
+
+def estatisticas(caminho=ARQUIVO_PRECOS):
+    """ Estatísticas do arquivo de preços local, em dia com o arquivo """
+    import storage
+
+    df = storage.precos(caminho)
+    with _lock:
+        if caminho in _estatisticas and _estatisticas[caminho][0] is df:
+            return _estatisticas[caminho][1]
+    atual = EstatisticasPrecos(df)
+    with _lock:
+        _estatisticas[caminho] = (df, atual)
+    return atual
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Estatísticas do histórico de preços local")
+    parser.add_argument('--arquivo', default=ARQUIVO_PRECOS)
+    parser.add_argument('--janela', nargs=3, metavar=('TICKER', 'INICIO', 'FIM'))
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Compara com o loop por ativo em dados sintéticos")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        from schema import otimizar_precos
+        from synthetic_data import gerar_precos
+
+        df = otimizar_precos(gerar_precos(n_tickers=300, n_dias=1250))
+        inicio = time.perf_counter()
+        for ticker in df['ticker'].unique():
+            df_ticker = df[df['ticker'] == ticker]
+            df_ticker['fechamento'].iloc[-1], df_ticker['minima'].min(), df_ticker['maxima'].max()
+            df_ticker['variacao_pct'].mean()
+        loop = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        stats = EstatisticasPrecos(df)
+        montagem = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        stats.resumo()
+        agrupado = time.perf_counter() - inicio
+        print(f"⏱️ Resumo de {df['ticker'].nunique()} ativos × {len(df)} candles: loop {loop * 1000:.0f} ms | "
+              f"agrupado {agrupado * 1000:.0f} ms (+ {montagem * 1000:.0f} ms de montagem, uma vez por arquivo)")
+
+        rng = np.random.default_rng(0)
+        n = 100_000
+        datas = pd.to_datetime(stats.datas, utc=True).tz_convert(FUSO_PADRAO).tz_localize(None)
+        a, b = np.sort(rng.choice(datas, size=(n, 2)), axis=1).T
+        tickers = rng.choice(stats.tickers, size=n)
+        inicio = time.perf_counter()
+        stats.janelas(tickers, a, b)
+        print(f"⏱️ {n} janelas: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        raise SystemExit
+
+    stats = estatisticas(args.arquivo)
+    if args.janela:
+        resultado = stats.variacao(*args.janela)
+        if resultado is None:
+            print("⚠️ Menos de dois fechamentos no período")
+        else:
+            print(f"{resultado['ticker']}: {resultado['data_inicio']} → {resultado['data_fim']}")
+            print(f"  R$ {resultado['preco_inicial']} → R$ {resultado['preco_final']}")
+            print(f"  Variação: {resultado['variacao_pct']}% ({resultado['variacao_abs']:+.2f})")
+    else:
+        print(stats.resumo().round(2).to_string(index=False))
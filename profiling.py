@@ -0,0 +1,181 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+
+DIR_PERFIS = 'data/profiles'
+
+
+def novo_run_id():
+    """ Identificador da execução: data/hora + sufixo aleatório """
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+
+
+class AmostradorPilhas:
+    """
+    Profiler por amostragem: lê a pilha de todas as threads a cada
+    `intervalo` segundos e acumula pilhas no formato "collapsed"
+    (func_a;func_b;func_c N), pronto para flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.pilhas = Counter()
+        self.amostras = 0
+        self._parar = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _quadro(frame):
+        codigo = frame.f_code
+        modulo = os.path.splitext(os.path.basename(codigo.co_filename))[0]
+        return f"{modulo}:{codigo.co_name}"
+
+    def _amostrar(self):
+        proprio = threading.get_ident()
+        nomes = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == proprio:
+                continue
+            pilha = []
+            while frame is not None:
+                pilha.append(self._quadro(frame))
+                frame = frame.f_back
+            pilha.append(nomes.get(ident, f"thread-{ident}"))
+            self.pilhas[';'.join(reversed(pilha))] += 1
+        self.amostras += 1
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            self._amostrar()
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._loop, name='amostrador-pilhas', daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self):
+        return '\n'.join(f"{pilha} {n}" for pilha, n in self.pilhas.most_common()) + '\n'
+
+
+class ResultadoPerfil:
+    """ Caminhos e métricas de uma execução perfilada """
+
+    def __init__(self, etapa, run_id, pasta):
+        self.etapa = etapa
+        self.run_id = run_id
+        self.pasta = pasta
+        self.duracao_s = None
+        self.pico_memoria_mb = None
+        self.arquivos = {}
+
+    def resumo(self):
+        return {
+            'etapa': self.etapa,
+            'run_id': self.run_id,
+            'duracao_s': self.duracao_s,
+            'pico_memoria_mb': self.pico_memoria_mb,
+            'arquivos': self.arquivos
+        }
+
+
+@contextmanager
+def perfilar(etapa, run_id=None, modo='ambos', intervalo=0.005, diretorio=DIR_PERFIS):
+    """
+    Executa um trecho sob profiler e salva os resultados em data/profiles/<run_id>/
+
+    Arquivos gerados (prefixo = nome da etapa):
+    - .prof: estatísticas do cProfile (abrir com snakeviz / pstats)
+    - .txt: top funções por tempo acumulado
+    - .collapsed: pilhas amostradas, prontas para flame graph
+    - .json: duração, pico de memória (tracemalloc) e maiores alocações
+
+    Parâmetros:
+    etapa (str): Nome da etapa (ex: 'treinar_modelo')
+    run_id (str): Identificador da execução (padrão: novo_run_id())
+    modo (str): 'cprofile', 'amostragem' ou 'ambos'
+    intervalo (float): Intervalo entre amostras do profiler de amostragem (s)
+
+    Uso:
+        with perfilar('treinar_modelo') as perfil:
+            predictor.treinar_modelo(df_treino)
+        print(perfil.pasta)
+    """
+    run_id = run_id or novo_run_id()
+    pasta = os.path.join(diretorio, run_id)
+    os.makedirs(pasta, exist_ok=True)
+    resultado = ResultadoPerfil(etapa, run_id, pasta)
+
+    ja_rastreando = tracemalloc.is_tracing()
+    if not ja_rastreando:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    profiler = cProfile.Profile() if modo in ('cprofile', 'ambos') else None
+    amostrador = AmostradorPilhas(intervalo) if modo in ('amostragem', 'ambos') else None
+
+    if amostrador is not None:
+        amostrador.iniciar()
+    if profiler is not None:
+        profiler.enable()
+    inicio = time.perf_counter()
+    try:
+        yield resultado
+    finally:
+        resultado.duracao_s = round(time.perf_counter() - inicio, 4)
+        if profiler is not None:
+            profiler.disable()
+        if amostrador is not None:
+            amostrador.parar()
+
+        _, pico = tracemalloc.get_traced_memory()
+        alocacoes = tracemalloc.take_snapshot().statistics('lineno')[:15]
+        if not ja_rastreando:
+            tracemalloc.stop()
+        resultado.pico_memoria_mb = round(pico / 1024 ** 2, 2)
+
+        base = os.path.join(pasta, etapa)
+        if profiler is not None:
+            profiler.dump_stats(base + '.prof')
+            texto = io.StringIO()
+            pstats.Stats(profiler, stream=texto).sort_stats('cumulative').print_stats(40)
+            with open(base + '.txt', 'w', encoding='utf-8') as f:
+                f.write(texto.getvalue())
+            resultado.arquivos.update(prof=base + '.prof', texto=base + '.txt')
+        if amostrador is not None:
+            with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+                f.write(amostrador.collapsed())
+            resultado.arquivos['collapsed'] = base + '.collapsed'
+
+        resumo = resultado.resumo()
+        resumo['maiores_alocacoes'] = [
+            {'local': str(s.traceback), 'mb': round(s.size / 1024 ** 2, 3), 'blocos': s.count}
+            for s in alocacoes
+        ]
+        if amostrador is not None:
+            resumo['amostras'] = amostrador.amostras
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(resumo, f, indent=2, ensure_ascii=False)
+        resultado.arquivos['resumo'] = base + '.json'
+
+        print(f"🔬 Perfil de '{etapa}' salvo em {pasta} "
+              f"({resultado.duracao_s:.2f}s, pico {resultado.pico_memoria_mb} MB)")
+
+
+def perfilar_se(ativo, etapa, run_id=None, **kwargs):
+    """ perfilar(...) se `ativo`, senão um contexto vazio (que devolve None) """
+    return perfilar(etapa, run_id, **kwargs) if ativo else nullcontext()
@@ -0,0 +1,264 @@
+import os
+import threading
+import time
+
+import duckdb
+
+import storage
+from instrumentation import span
+
+
+DIR_PARQUET = 'data/parquet'
+
+# Banco só com as views, aberto em modo leitura para as consultas digitadas na página
+ARQUIVO_CATALOGO = 'consultas.duckdb'
+
+# Nome da tabela SQL -> (CSV de origem, leitor com tipos compactos, colunas de ordenação)
+TABELAS = {
+    'noticias': (storage.ARQUIVO_NOTICIAS, storage.noticias, ['ticker', 'data_utc']),
+    'sentimentos': (storage.ARQUIVO_SENTIMENTOS, storage.sentimentos, ['ticker', 'data_utc']),
+    'precos': (storage.ARQUIVO_PRECOS, storage.precos, ['ticker', 'data'])
+}
+
+# Linhas por row group: o DuckDB pula row groups cujas estatísticas (min/max)
+# não batem com o WHERE, então gravar ordenado por ticker/data ajuda o filtro
+LINHAS_POR_GRUPO = 100_000
+
+CONSULTAS_EXEMPLO = {
+    "Sentimento médio por ativo e semana": """
+SELECT ticker,
+       date_trunc('week', data_utc) AS semana,
+       count(*) AS noticias,
+       round(avg(score_positivo - score_negativo), 3) AS polaridade_media,
+       round(avg(confianca), 1) AS confianca_media
+FROM sentimentos
+WHERE data_utc IS NOT NULL
+GROUP BY ALL
+ORDER BY ticker, semana
+""",
+    "Retorno após notícias negativas (confiança > 90%)": """
+WITH negativas AS (
+    SELECT ticker, data_utc, titulo, confianca
+    FROM sentimentos
+    WHERE sentimento = 'negativo' AND confianca > 90 AND data_utc IS NOT NULL
+),
+antes AS (
+    SELECT n.*, p.data AS data_base, p.fechamento AS preco_base
+    FROM negativas n ASOF JOIN precos p
+      ON n.ticker = p.ticker AND n.data_utc >= p.data
+),
+depois AS (
+    SELECT a.*, p.fechamento AS preco_depois
+    FROM antes a ASOF JOIN precos p
+      ON a.ticker = p.ticker AND p.data >= a.data_base + INTERVAL 1 DAY
+)
+SELECT ticker,
+       count(*) AS noticias,
+       round(avg((preco_depois / preco_base - 1) * 100), 3) AS retorno_medio_pct,
+       round(avg(CASE WHEN preco_depois < preco_base THEN 1 ELSE 0 END) * 100, 1) AS pct_queda
+FROM depois
+GROUP BY ticker
+ORDER BY retorno_medio_pct
+""",
+    "Volume de notícias por fonte": """
+SELECT fonte, sentimento, count(*) AS noticias
+FROM sentimentos
+GROUP BY ALL
+ORDER BY fonte, noticias DESC
+""",
+    "Maiores variações diárias": """
+SELECT ticker, data, fechamento, variacao_pct
+FROM precos
+ORDER BY abs(variacao_pct) DESC
+LIMIT 50
+"""
+}
+
+
+def espelhar(nome, diretorio=DIR_PARQUET):
+    """
+    Atualiza a cópia em parquet de um dataset, se a origem (CSV ou dataset append-only) mudou
+
+    Parâmetros:
+    nome (str): Tabela em TABELAS ('noticias', 'sentimentos', 'precos')
+
+    Retorna:
+    str: Caminho do parquet, ou None se a origem não existir
+    """
+    origem, leitor, ordem = TABELAS[nome]
+    modificado = storage.modificado_em(origem)
+    if modificado is None:
+        return None
+
+    destino = os.path.join(diretorio, f"{nome}.parquet")
+    if os.path.exists(destino) and os.path.getmtime(destino) >= modificado:
+        return destino
+
+    with span('consultas.espelhar', tabela=nome):
+        df = leitor(origem)
+        ordem = [c for c in ordem if c in df.columns]
+        if ordem:
+            df = df.sort_values(ordem, na_position='last')
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = destino + '.tmp'
+        df.to_parquet(temporario, index=False, row_group_size=LINHAS_POR_GRUPO)
+        os.replace(temporario, destino)
+    print(f"🗂️ {nome}: {len(df)} linhas espelhadas em {destino}")
+    return destino
+
+
+class ConsultaNaoPermitida(Exception):
+    """Consulta do usuário que não é uma única instrução SELECT"""
+
+
+class MotorConsultas:
+    """
+    Consultas SQL (DuckDB) sobre notícias, sentimentos e preços
+
+    As tabelas são views sobre os espelhos em parquet, então o DuckDB lê só
+    as colunas e os row groups que a consulta usa.
+
+    Uso:
+        motor = MotorConsultas()
+        df = motor.consultar("SELECT ticker, count(*) FROM sentimentos GROUP BY ticker")
+
+    SQL vindo do usuário vai por consultar_leitura: outra conexão, só leitura
+    e sem acesso a arquivos fora dos espelhos.
+    """
+
+    def __init__(self, diretorio=DIR_PARQUET, threads=None):
+        self.diretorio = diretorio
+        self.conexao = duckdb.connect()
+        if threads:
+            self.conexao.execute(f"SET threads = {int(threads)}")
+        self._lock = threading.Lock()
+        self._versoes = {}
+        self._leitura = None
+        self._tabelas_leitura = None
+
+    def atualizar(self):
+        """ Reespelha os CSVs alterados e (re)cria as views """
+        with self._lock:
+            for nome in TABELAS:
+                caminho = espelhar(nome, self.diretorio)
+                versao = os.path.getmtime(caminho) if caminho else None
+                if versao == self._versoes.get(nome):
+                    continue
+                if caminho:
+                    literal = caminho.replace("'", "''")  # DDL não aceita parâmetros
+                    self.conexao.execute(
+                        f"CREATE OR REPLACE VIEW {nome} AS SELECT * FROM read_parquet('{literal}')")
+                else:
+                    self.conexao.execute(f"DROP VIEW IF EXISTS {nome}")
+                self._versoes[nome] = versao
+
+    def tabelas(self):
+        """ Tabelas disponíveis e suas colunas """
+        self.atualizar()
+        return {nome: self.conexao.execute(f"DESCRIBE {nome}").df()[['column_name', 'column_type']]
+                for nome, versao in self._versoes.items() if versao is not None}
+
+    def consultar(self, sql, parametros=None):
+        """
+        Executa uma consulta SQL
+
+        Parâmetros:
+        sql (str): Consulta (tabelas: noticias, sentimentos, precos)
+        parametros (list): Valores para os placeholders '?'
+
+        Retorna:
+        DataFrame: Resultado da consulta
+        """
+        self.atualizar()
+        # Um cursor por chamada: a conexão é compartilhada entre as threads do Streamlit
+        cursor = self.conexao.cursor()
+        try:
+            with span('consultas.sql'):
+                return cursor.execute(sql, parametros or []).df()
+        finally:
+            cursor.close()
+
+    def _conexao_leitura(self):
+        """ Conexão read_only ao catálogo de views; o catálogo é refeito quando muda o conjunto de tabelas """
+        with self._lock:
+            tabelas = frozenset(nome for nome, versao in self._versoes.items() if versao is not None)
+            if self._leitura is not None and tabelas == self._tabelas_leitura:
+                return self._leitura
+            if self._leitura is not None:
+                self._leitura.close()  # o DuckDB não abre o mesmo arquivo para escrita e leitura ao mesmo tempo
+                self._leitura = None
+
+            os.makedirs(self.diretorio, exist_ok=True)
+            catalogo = os.path.join(self.diretorio, ARQUIVO_CATALOGO)
+            escrita = duckdb.connect(catalogo)
+            try:
+                for nome in TABELAS:
+                    if nome in tabelas:
+                        literal = os.path.abspath(os.path.join(self.diretorio, f"{nome}.parquet")).replace("'", "''")
+                        escrita.execute(f"CREATE OR REPLACE VIEW {nome} AS SELECT * FROM read_parquet('{literal}')")
+                    else:
+                        escrita.execute(f"DROP VIEW IF EXISTS {nome}")
+            finally:
+                escrita.close()
+
+            leitura = duckdb.connect(catalogo, read_only=True)
+            pasta = os.path.join(os.path.abspath(self.diretorio), '').replace("'", "''")
+            # Só os espelhos podem ser lidos; depois de desligado o acesso externo não volta
+            leitura.execute(f"SET allowed_directories = ['{pasta}']")
+            leitura.execute("SET enable_external_access = false")
+            self._leitura, self._tabelas_leitura = leitura, tabelas
+            return leitura
+
+    def consultar_leitura(self, sql):
+        """
+        Executa SQL digitado pelo usuário (página Consultas)
+
+        Aceita uma única instrução SELECT (inclui WITH, DESCRIBE, SUMMARIZE, SHOW)
+        e a executa numa conexão read_only, sem acesso a arquivos externos.
+
+        Retorna:
+        DataFrame: Resultado da consulta
+        """
+        instrucoes = duckdb.extract_statements(sql)
+        if len(instrucoes) != 1 or instrucoes[0].type != duckdb.StatementType.SELECT:
+            raise ConsultaNaoPermitida("Apenas uma consulta de leitura por vez (SELECT / WITH / DESCRIBE...)")
+        self.atualizar()
+        cursor = self._conexao_leitura().cursor()
+        try:
+            with span('consultas.sql', origem='usuario'):
+                return cursor.execute(sql).df()
+        finally:
+            cursor.close()
+
+    def explicar(self, sql):
+        """ Plano de execução (mostra filtros e projeções empurrados para o parquet) """
+        self.atualizar()
+        return '\n'.join(linha[1] for linha in self.conexao.execute(f"EXPLAIN {sql}").fetchall())
+
+
+_motor = None
+
+
+def motor():
+    """ Motor de consultas compartilhado pelo processo """
+    global _motor
+    if _motor is None:
+        _motor = MotorConsultas()
+    return _motor
+
+
+def consultar(sql, parametros=None):
+    """ Atalho: motor().consultar(sql, parametros) """
+    return motor().consultar(sql, parametros)
+
+
+if __name__ == "__main__":
+    for titulo, sql in CONSULTAS_EXEMPLO.items():
+        inicio = time.perf_counter()
+        try:
+            resultado = consultar(sql)
+        except duckdb.Error as e:
+            print(f"\n❌ {titulo}: {e}")
+            continue
+        print(f"\n📊 {titulo} ({(time.perf_counter() - inicio) * 1000:.0f} ms, {len(resultado)} linhas)")
+        print(resultado.head(10).to_string(index=False))
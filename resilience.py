@@ -0,0 +1,123 @@
+import random
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker simples para proteger chamadas a serviços externos
+
+    Estados:
+    - fechado: chamadas passam normalmente
+    - aberto: chamadas são recusadas até passar `tempo_reset` segundos
+    - meio-aberto: uma única chamada de teste é liberada e as demais são
+      recusadas até ela terminar; sucesso fecha, falha reabre
+    """
+
+    def __init__(self, limite_falhas=5, tempo_reset=60):
+        self.limite_falhas = limite_falhas
+        self.tempo_reset = tempo_reset
+        self.falhas = 0
+        self.estado = 'fechado'
+        self.aberto_em = None
+        self._lock = threading.Lock()
+
+    def permite(self):
+        """
+        Retorna True se a chamada pode ser feita agora
+
+        No estado meio-aberto só quem recebeu True (a chamada de teste) pode
+        seguir; quem recebe True deve depois chamar registrar_sucesso ou
+        registrar_falha.
+        """
+        with self._lock:
+            if self.estado == 'aberto':
+                if time.monotonic() - self.aberto_em >= self.tempo_reset:
+                    self.estado = 'meio-aberto'
+                    return True
+                return False
+            return self.estado == 'fechado'
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self.falhas = 0
+            self.estado = 'fechado'
+
+    def registrar_falha(self):
+        with self._lock:
+            self.falhas += 1
+            if self.estado == 'meio-aberto' or self.falhas >= self.limite_falhas:
+                self.estado = 'aberto'
+                self.aberto_em = time.monotonic()
+
+    def liberar(self):
+        """
+        Resultado que não diz nada sobre o serviço (ex: ticker inexistente):
+        não conta como falha nem sucesso, só devolve a chamada de teste do
+        meio-aberto para que o próximo chamador possa sondar
+        """
+        with self._lock:
+            if self.estado == 'meio-aberto':
+                self.estado = 'aberto'
+                self.aberto_em = time.monotonic() - self.tempo_reset
+
+
+class CircuitoAbertoError(Exception):
+    """Chamada recusada porque o circuit breaker está aberto"""
+
+
+def tempo_backoff(tentativa, base=1.0, maximo=30.0):
+    """
+    Calcula a espera (em segundos) antes da próxima tentativa
+
+    Usa backoff exponencial com jitter completo: um valor aleatório entre
+    0 e base * 2^tentativa, limitado por `maximo`.
+    """
+    return random.uniform(0, min(maximo, base * (2 ** tentativa)))
+
+
+def executar_com_retry(funcao, tentativas=3, base=1.0, maximo=30.0,
+                       retentavel=lambda e: True, breaker=None, conta_no_breaker=lambda e: True):
+    """
+    Executa `funcao()` com retry e backoff exponencial
+
+    Parâmetros:
+    funcao (callable): Função sem argumentos a executar
+    tentativas (int): Número máximo de tentativas
+    base (float): Espera base do backoff em segundos
+    maximo (float): Espera máxima entre tentativas
+    retentavel (callable): Recebe a exceção e diz se vale tentar de novo
+    breaker (CircuitBreaker): Circuit breaker opcional; é consultado uma vez
+        antes da primeira tentativa e recebe um único resultado (sucesso ou
+        falha) por execução, não um por tentativa
+    conta_no_breaker (callable): Recebe a exceção final e diz se ela é falha do
+        serviço; as que não são (ex: erros permanentes do pedido) não abrem o circuito
+
+    Retorna:
+    O resultado de `funcao()`; relança a última exceção se todas falharem
+    """
+    if breaker is not None and not breaker.permite():
+        raise CircuitoAbertoError("circuit breaker aberto")
+
+    sucesso = False
+    erro = None
+    try:
+        for tentativa in range(tentativas):
+            try:
+                resultado = funcao()
+            except Exception as e:
+                erro = e
+                if tentativa == tentativas - 1 or not retentavel(e):
+                    raise
+                time.sleep(tempo_backoff(tentativa, base, maximo))
+            else:
+                sucesso = True
+                return resultado
+    finally:
+        if breaker is not None:
+            if sucesso:
+                breaker.registrar_sucesso()
+            elif erro is not None and conta_no_breaker(erro):
+                breaker.registrar_falha()
+            else:
+                breaker.liberar()
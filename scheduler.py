@@ -0,0 +1,488 @@
+"""
+Agendador das coletas durante o pregão da B3
+
+Roda como um processo local e chama o PriceFetcher e o NoticiasScraper
+sozinho, seguindo o calendário da B3 (fins de semana, feriados, Quarta-feira
+de Cinzas com abertura às 13h):
+
+- preços só com o pregão aberto, mais uma coleta depois do fechamento;
+- notícias o dia todo, mais devagar fora do pregão;
+- o intervalo de cada fonte encurta quando ela traz novidade e alonga quando
+  não traz; erros aumentam a espera (backoff com jitter);
+- execuções atrasadas viram uma só, e uma tarefa nunca roda duas vezes ao mesmo tempo;
+- o estado (próxima execução, intervalo, falhas) fica em data/agendador.json.
+
+    python scheduler.py PETR4 VALE3 ITUB4
+    python scheduler.py --status
+"""
+import json
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as hora, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from date_parser import FUSO_PADRAO
+from instrumentation import span, contar
+from resilience import tempo_backoff
+
+
+ARQUIVO_ESTADO = 'data/agendador.json'
+FUSO_B3 = ZoneInfo(FUSO_PADRAO)
+
+ABERTURA = hora(10, 0)
+ABERTURA_CINZAS = hora(13, 0)
+FECHAMENTO = hora(17, 0)
+APOS_FECHAMENTO = timedelta(minutes=15)  # coleta final, com o preço de fechamento
+
+BACKOFF_MAXIMO = 3600.0  # segundos
+
+
+# ==================
+# CALENDÁRIO DA B3
+# ==================
+
+def pascoa(ano):
+    """ Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher, calendário gregoriano) """
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = divmod(b, 4)
+    g = (b - (b + 8) // 25 + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+@lru_cache(maxsize=None)
+def feriados_b3(ano):
+    """
+    Dias sem pregão na B3 (além dos fins de semana)
+
+    Retorna:
+    dict: data -> nome do feriado
+    """
+    p = pascoa(ano)
+    feriados = {
+        date(ano, 1, 1): 'Confraternização Universal',
+        p - timedelta(days=48): 'Carnaval',
+        p - timedelta(days=47): 'Carnaval',
+        p - timedelta(days=2): 'Sexta-feira Santa',
+        date(ano, 4, 21): 'Tiradentes',
+        date(ano, 5, 1): 'Dia do Trabalho',
+        p + timedelta(days=60): 'Corpus Christi',
+        date(ano, 9, 7): 'Independência',
+        date(ano, 10, 12): 'Nossa Senhora Aparecida',
+        date(ano, 11, 2): 'Finados',
+        date(ano, 11, 15): 'Proclamação da República',
+        date(ano, 12, 24): 'Véspera de Natal',
+        date(ano, 12, 25): 'Natal',
+        date(ano, 12, 31): 'Último dia do ano'
+    }
+    if ano >= 2024:
+        feriados[date(ano, 11, 20)] = 'Consciência Negra'
+    return feriados
+
+
+def dia_de_pregao(dia):
+    return dia.weekday() < 5 and dia not in feriados_b3(dia.year)
+
+
+def ultimo_pregao_antes(dia):
+    """ Último dia de pregão anterior a `dia` (date) """
+    for _ in range(30):
+        dia -= timedelta(days=1)
+        if dia_de_pregao(dia):
+            return dia
+    raise ValueError(f"Nenhum pregão nos 30 dias antes de {dia}")
+
+
+def horario_pregao(dia):
+    """
+    Retorna:
+    tuple: (abertura, fechamento) do pregão em `dia` (datetime no fuso da B3) ou None
+    """
+    if not dia_de_pregao(dia):
+        return None
+    cinzas = pascoa(dia.year) - timedelta(days=46)
+    abertura = ABERTURA_CINZAS if dia == cinzas else ABERTURA
+    return (datetime.combine(dia, abertura, FUSO_B3), datetime.combine(dia, FECHAMENTO, FUSO_B3))
+
+
+def pregao_aberto(momento):
+    momento = momento.astimezone(FUSO_B3)
+    horario = horario_pregao(momento.date())
+    return horario is not None and horario[0] <= momento < horario[1]
+
+
+def proxima_abertura(momento):
+    """ Próxima abertura do pregão depois de `momento` """
+    momento = momento.astimezone(FUSO_B3)
+    dia = momento.date()
+    for _ in range(30):
+        horario = horario_pregao(dia)
+        if horario is not None and horario[0] > momento:
+            return horario[0]
+        dia += timedelta(days=1)
+    raise ValueError(f"Nenhum pregão nos 30 dias após {momento}")
+
+
+def ultimo_pregao_iniciado(dia, momento):
+    """ Último pregão antes de `dia` (date) que já tinha aberto em `momento` """
+    momento = momento.astimezone(FUSO_B3)
+    pregao = ultimo_pregao_antes(min(dia, momento.date() + timedelta(days=1)))
+    if horario_pregao(pregao)[0] > momento:
+        pregao = ultimo_pregao_antes(pregao)
+    return pregao
+
+
+def _na_janela_de_precos(momento):
+    """ Pregão aberto ou logo depois do fechamento (coleta final do dia) """
+    momento = momento.astimezone(FUSO_B3)
+    horario = horario_pregao(momento.date())
+    return horario is not None and horario[0] <= momento <= horario[1] + APOS_FECHAMENTO
+
+
+# ==================
+# TAREFAS
+# ==================
+
+class Tarefa:
+    """
+    Coleta periódica de uma fonte
+
+    A função da tarefa devolve quantos itens novos trouxe; esse número
+    ajusta o intervalo entre `intervalo_min` e `intervalo_max`.
+    """
+
+    def __init__(self, nome, funcao, intervalo_min=60, intervalo_max=1800, so_pregao=False,
+                 fator_fora_pregao=4.0):
+        """
+        Parâmetros:
+        nome (str): Identificador (chave no arquivo de estado)
+        funcao (callable): () -> int, itens novos coletados
+        intervalo_min, intervalo_max (float): Limites do intervalo adaptativo, em segundos
+        so_pregao (bool): Só roda com o pregão aberto (+ uma coleta após o fechamento)
+        fator_fora_pregao (float): Multiplicador do intervalo fora do pregão
+        """
+        self.nome = nome
+        self.funcao = funcao
+        self.intervalo_min = intervalo_min
+        self.intervalo_max = intervalo_max
+        self.so_pregao = so_pregao
+        self.fator_fora_pregao = fator_fora_pregao
+        # Estado persistido
+        self.intervalo = float(intervalo_min)
+        self.proxima = None
+        self.falhas = 0
+        self.execucoes = 0
+        self.coalescidas = 0
+        self.novidades_por_hora = 0.0
+        self.ultima_execucao = None
+        self.ultimo_erro = None
+
+    CAMPOS_ESTADO = ('intervalo', 'proxima', 'falhas', 'execucoes', 'coalescidas',
+                     'novidades_por_hora', 'ultima_execucao', 'ultimo_erro')
+
+    def estado(self):
+        estado = {campo: getattr(self, campo) for campo in self.CAMPOS_ESTADO}
+        for campo in ('proxima', 'ultima_execucao'):
+            if estado[campo] is not None:
+                estado[campo] = estado[campo].isoformat()
+        return estado
+
+    def restaurar(self, estado):
+        for campo in self.CAMPOS_ESTADO:
+            if campo in estado:
+                setattr(self, campo, estado[campo])
+        for campo in ('proxima', 'ultima_execucao'):
+            if getattr(self, campo):
+                setattr(self, campo, datetime.fromisoformat(getattr(self, campo)))
+        self.intervalo = min(max(self.intervalo, self.intervalo_min), self.intervalo_max)
+
+    def registrar(self, agora, novidades=None, erro=None):
+        """ Ajusta o intervalo com o resultado da execução e agenda a próxima """
+        decorrido = (agora - self.ultima_execucao).total_seconds() if self.ultima_execucao else None
+        self.execucoes += 1
+        self.ultima_execucao = agora
+
+        if erro is not None:
+            self.falhas += 1
+            self.ultimo_erro = f"{type(erro).__name__}: {erro}"
+            espera = self.intervalo + tempo_backoff(self.falhas, base=self.intervalo, maximo=BACKOFF_MAXIMO)
+        else:
+            self.falhas = 0
+            self.ultimo_erro = None
+            # Fonte com novidade: volta mais cedo; sem novidade: espera mais
+            fator = 0.5 if novidades else 1.5
+            self.intervalo = min(max(self.intervalo * fator, self.intervalo_min), self.intervalo_max)
+            if decorrido:
+                # Média móvel da taxa observada (novidades por hora)
+                taxa = novidades * 3600 / decorrido
+                self.novidades_por_hora = round(0.7 * self.novidades_por_hora + 0.3 * taxa, 3)
+            espera = self.intervalo
+        # Jitter de 10% para as fontes não sincronizarem
+        self.proxima = self._ajustar(agora, agora + timedelta(seconds=espera * random.uniform(1.0, 1.1)))
+
+    def _ajustar(self, agora, candidato):
+        """ Encaixa a próxima execução no calendário da B3 """
+        if not self.so_pregao:
+            if not pregao_aberto(candidato):
+                # Fora do pregão: mais devagar, sem passar da próxima abertura
+                espera = (candidato - agora) * self.fator_fora_pregao
+                return min(agora + espera, proxima_abertura(agora))
+            return candidato
+
+        if pregao_aberto(candidato):
+            return candidato
+        horario = horario_pregao(agora.astimezone(FUSO_B3).date())
+        if horario is not None and agora < horario[1] + APOS_FECHAMENTO:
+            return horario[1] + APOS_FECHAMENTO  # coleta final do dia
+        return proxima_abertura(agora)
+
+    def vencida(self, agora):
+        return self.proxima is None or self.proxima <= agora
+
+
+# ==================
+# AGENDADOR
+# ==================
+
+class Agendador:
+    """
+    Laço que dispara as tarefas vencidas num pool pequeno de threads
+
+    Pedidos para rodar uma tarefa que já está em execução (solicitar) viram
+    uma única execução logo depois dela; ao voltar de uma pausa longa, todas
+    as execuções perdidas viram uma só.
+    """
+
+    def __init__(self, tarefas, arquivo_estado=ARQUIVO_ESTADO, max_workers=2):
+        self.tarefas = {t.nome: t for t in tarefas}
+        self.arquivo_estado = arquivo_estado
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._rodando = {}  # nome -> Future
+        self._repetir = set()  # pedidas durante a execução: rodam de novo ao terminar
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self.carregar_estado()
+
+    def carregar_estado(self):
+        if not os.path.exists(self.arquivo_estado):
+            return
+        with open(self.arquivo_estado, encoding='utf-8') as f:
+            estado = json.load(f)
+        for nome, tarefa in self.tarefas.items():
+            if nome in estado.get('tarefas', {}):
+                tarefa.restaurar(estado['tarefas'][nome])
+
+    def salvar_estado(self):
+        with self._lock:
+            estado = {'atualizado_em': datetime.now(FUSO_B3).isoformat(),
+                      'tarefas': {nome: t.estado() for nome, t in self.tarefas.items()}}
+        os.makedirs(os.path.dirname(self.arquivo_estado) or '.', exist_ok=True)
+        temporario = f"{self.arquivo_estado}.tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.arquivo_estado)
+
+    def _executar(self, tarefa):
+        novidades = erro = None
+        try:
+            with span('agendador.tarefa', tarefa=tarefa.nome):
+                novidades = int(tarefa.funcao() or 0)
+        except Exception as e:
+            erro = e
+        agora = datetime.now(FUSO_B3)
+        with self._lock:
+            tarefa.registrar(agora, novidades, erro)
+            self._rodando.pop(tarefa.nome, None)
+            if tarefa.nome in self._repetir and erro is None:
+                self._repetir.discard(tarefa.nome)
+                tarefa.proxima = agora
+        contar('agendador.execucoes', tarefa=tarefa.nome, resultado='erro' if erro else 'ok')
+        if erro:
+            print(f"❌ [{tarefa.nome}] {tarefa.ultimo_erro} (tentativa {tarefa.falhas}, "
+                  f"próxima às {tarefa.proxima:%H:%M:%S})")
+        else:
+            print(f"✅ [{tarefa.nome}] {novidades} novos; próxima às {tarefa.proxima:%d/%m %H:%M:%S} "
+                  f"(intervalo {tarefa.intervalo:.0f}s)")
+        self.salvar_estado()
+
+    def disparar_vencidas(self, agora=None):
+        """
+        Dispara as tarefas vencidas que não estão rodando
+
+        Retorna:
+        list: Nomes das tarefas disparadas
+        """
+        agora = agora or datetime.now(FUSO_B3)
+        disparadas = []
+        with self._lock:
+            for nome, tarefa in self.tarefas.items():
+                if nome in self._rodando or not tarefa.vencida(agora):
+                    continue
+                if tarefa.so_pregao and not _na_janela_de_precos(agora):
+                    # Ex: reinício de manhã com uma execução de ontem pendente
+                    tarefa.proxima = tarefa._ajustar(agora, agora)
+                    continue
+                tarefa.proxima = None  # uma única execução, mesmo que várias tenham vencido
+                self._rodando[nome] = self._executor.submit(self._executar, tarefa)
+                disparadas.append(nome)
+        return disparadas
+
+    def solicitar(self, nome):
+        """
+        Pede uma execução fora do horário (ex: botão no app)
+
+        Se a tarefa estiver rodando, o pedido é coalescido: vários pedidos
+        durante a execução viram uma única execução logo depois dela.
+        """
+        with self._lock:
+            tarefa = self.tarefas[nome]
+            if nome in self._rodando:
+                tarefa.coalescidas += nome in self._repetir
+                self._repetir.add(nome)
+                contar('agendador.coalescidas', tarefa=nome)
+                return False
+            tarefa.proxima = datetime.now(FUSO_B3)
+        return True
+
+    def proximo_despertar(self, agora):
+        with self._lock:
+            proximas = [t.proxima for t in self.tarefas.values()
+                        if t.proxima is not None and t.nome not in self._rodando]
+        return min(proximas) if proximas else agora + timedelta(seconds=1)
+
+    def executar(self, uma_vez=False):
+        """
+        Laço principal (até parar() ou Ctrl+C)
+
+        Parâmetros:
+        uma_vez (bool): Roda cada tarefa uma vez, ignorando o calendário, e sai
+        """
+        if uma_vez:
+            for tarefa in self.tarefas.values():
+                tarefa.proxima = None
+                self._executar(tarefa)
+            return
+
+        print(f"⏰ Agendador iniciado com {len(self.tarefas)} tarefas "
+              f"(pregão {'aberto' if pregao_aberto(datetime.now(FUSO_B3)) else 'fechado'})")
+        try:
+            while not self._parar.is_set():
+                agora = datetime.now(FUSO_B3)
+                self.disparar_vencidas(agora)
+                espera = (self.proximo_despertar(agora) - datetime.now(FUSO_B3)).total_seconds()
+                # Acorda pelo menos a cada minuto (relógio ajustado, máquina suspensa)
+                self._parar.wait(min(max(espera, 0.5), 60))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.parar()
+
+    def parar(self):
+        self._parar.set()
+        self._executor.shutdown(wait=True)
+        self.salvar_estado()
+
+    def status(self):
+        """ Estado de cada tarefa (para o terminal) """
+        import pandas as pd
+        return pd.DataFrame([{'tarefa': nome, **t.estado()} for nome, t in self.tarefas.items()])
+
+
+# ==================
+# COLETAS
+# ==================
+
+def coletar_noticias(tickers, fonte, caminho='data/noticias.csv'):
+    """
+    Busca notícias de uma fonte e acrescenta as inéditas ao histórico
+
+    Retorna:
+    int: Notícias novas gravadas
+    """
+    import pandas as pd
+    import dataset_writer
+    from date_parser import normalizar_datas
+    from scraper import NoticiasScraper
+
+    scraper = NoticiasScraper(fontes=[fonte])
+    novas = scraper.buscar_multiplos_ativos(tickers)
+    breaker = scraper.breakers.get(scraper.fontes[0].nome)
+    if not novas and breaker is not None and breaker.falhas:
+        raise RuntimeError(f"{scraper.fontes[0].nome} falhou ({breaker.falhas} erros, circuito {breaker.estado})")
+    if not novas:
+        return 0
+
+    df = pd.DataFrame(novas)
+    df['data_utc'] = normalizar_datas(df['data'], referencia=df.get('coletado_em'))
+    # A trava do dataset serializa escritores (outras tarefas e outros processos)
+    # e descarta títulos que já estão gravados
+    return dataset_writer.dataset(caminho).acrescentar(df)
+
+
+def coletar_precos(tickers, caminho='data/precos.csv', periodo='5d', intervalo='1d'):
+    """
+    Atualiza os candles recentes no histórico de preços
+
+    Só candles novos ou com fechamento alterado viram segmento novo.
+
+    Retorna:
+    int: Candles novos ou com fechamento alterado
+    """
+    import dataset_writer
+    import storage
+    from price_fetcher import PriceFetcher
+
+    recentes = PriceFetcher().buscar_multiplas_acoes(tickers, periodo=periodo, intervalo=intervalo)
+    if recentes is None:
+        raise RuntimeError("Nenhum preço retornado pelo Yahoo Finance")
+
+    if storage.existe(caminho):
+        chave = ['ticker', 'data']
+        antes = storage.precos(caminho).astype({'ticker': str}).drop_duplicates(subset=chave, keep='last')
+        # O dataset guarda fechamento em float32: compara na mesma precisão
+        antes = antes.set_index(chave)['fechamento'].astype('float32')
+        depois = recentes.astype({'ticker': str}).set_index(chave)['fechamento'].astype('float32')
+        anterior = antes.reindex(depois.index)
+        recentes = recentes[(anterior.isna() | (depois != anterior)).to_numpy()]
+    if len(recentes) == 0:
+        return 0
+    return dataset_writer.dataset(caminho).acrescentar(recentes)
+
+
+def tarefas_padrao(tickers, fontes=None):
+    """ Preços (só no pregão) e uma tarefa de notícias por fonte """
+    from news_sources import FONTES_PADRAO
+
+    tarefas = [Tarefa('precos', lambda: coletar_precos(tickers), intervalo_min=300,
+                      intervalo_max=1800, so_pregao=True)]
+    for fonte in fontes or FONTES_PADRAO:
+        tarefas.append(Tarefa(f'noticias:{fonte}', lambda fonte=fonte: coletar_noticias(tickers, fonte),
+                              intervalo_min=120, intervalo_max=3600))
+    return tarefas
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Coletas automáticas durante o pregão da B3")
+    parser.add_argument('tickers', nargs='*', default=['PETR4', 'VALE3', 'ITUB4'])
+    parser.add_argument('--fontes', nargs='+', help="fontes de notícias (padrão: InfoMoney e G1)")
+    parser.add_argument('--uma-vez', action='store_true', help="roda cada coleta uma vez e sai")
+    parser.add_argument('--status', action='store_true', help="mostra o estado salvo e sai")
+    args = parser.parse_args()
+
+    agendador = Agendador(tarefas_padrao(args.tickers, args.fontes))
+    if args.status:
+        agora = datetime.now(FUSO_B3)
+        print(f"Pregão {'aberto' if pregao_aberto(agora) else 'fechado'}; "
+              f"próxima abertura {proxima_abertura(agora):%d/%m %H:%M}")
+        print(agendador.status().to_string(index=False))
+    else:
+        agendador.executar(uma_vez=args.uma_vez)
@@ -0,0 +1,148 @@
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from date_parser import FUSO_PADRAO
+
+
+# Tipos compactos de cada dataset
+COLUNAS_PRECO = ['abertura', 'fechamento', 'maxima', 'minima']
+COLUNAS_SCORE = ['confianca', 'score_positivo', 'score_negativo', 'score_neutro']
+CATEGORICAS_PRECOS = ['ticker']
+CATEGORICAS_NOTICIAS = ['ticker', 'fonte', 'sentimento']
+DATAS_NOTICIAS = ['data_utc', 'coletado_em']
+
+# Tipos passados ao read_csv (as datas são convertidas depois)
+DTYPES_CSV_PRECOS = {
+    'ticker': 'category',
+    **{c: 'float32' for c in COLUNAS_PRECO},
+    'variacao_pct': 'float32'
+}
+DTYPES_CSV_NOTICIAS = {
+    **{c: 'category' for c in CATEGORICAS_NOTICIAS},
+    **{c: 'float32' for c in COLUNAS_SCORE}
+}
+
+
+def _categorizar(df, colunas):
+    for col in colunas:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+
+def _float32(df, colunas):
+    for col in colunas:
+        if col in df.columns and df[col].dtype != 'float32':
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float32')
+
+
+def otimizar_precos(df, fuso=FUSO_PADRAO):
+    """
+    Converte um DataFrame de preços para tipos compactos
+
+    - ticker: category
+    - abertura/fechamento/maxima/minima/variacao_pct: float32
+    - volume: int64
+    - data: datetime64 com fuso (horário da B3)
+
+    Retorna:
+    DataFrame: Cópia com os tipos compactos
+    """
+    df = df.copy()
+    if 'data' in df.columns and not isinstance(df['data'].dtype, pd.DatetimeTZDtype):
+        df['data'] = pd.to_datetime(df['data'], utc=True).dt.tz_convert(fuso)
+    _categorizar(df, CATEGORICAS_PRECOS)
+    _float32(df, COLUNAS_PRECO + ['variacao_pct'])
+    if 'volume' in df.columns and df['volume'].dtype != 'int64':
+        df['volume'] = pd.to_numeric(df['volume'], errors='coerce').fillna(0).astype('int64')
+    return df
+
+
+def otimizar_noticias(df):
+    """
+    Converte um DataFrame de notícias (com ou sem sentimento) para tipos compactos
+
+    - ticker/fonte/sentimento: category
+    - confianca e scores: float32
+    - data_utc/coletado_em: datetime64 UTC
+    O texto original da data ('data') é mantido como veio do portal.
+
+    Retorna:
+    DataFrame: Cópia com os tipos compactos
+    """
+    df = df.copy()
+    _categorizar(df, CATEGORICAS_NOTICIAS)
+    _float32(df, COLUNAS_SCORE)
+    for col in DATAS_NOTICIAS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.DatetimeTZDtype):
+            df[col] = pd.to_datetime(df[col], utc=True, errors='coerce', format='ISO8601')
+    return df
+
+
+def alinhar_categorias(a, b, coluna='ticker'):
+    """
+    Dá a mesma lista de categorias à coluna nos dois DataFrames
+
+    Necessário para merges/joins entre colunas categóricas (ex: merge_asof
+    por ticker entre notícias e preços). Modifica os DataFrames no lugar.
+    """
+    categorias = union_categoricals(
+        [a[coluna].astype('category'), b[coluna].astype('category')]
+    ).categories
+    a[coluna] = pd.Categorical(a[coluna], categories=categorias)
+    b[coluna] = pd.Categorical(b[coluna], categories=categorias)
+
+
+def carregar_precos(caminho='data/precos.csv'):
+    """ Lê precos.csv (ou o dataset append-only data/precos/) já com os tipos compactos """
+    import dataset_writer
+    return otimizar_precos(dataset_writer.ler(caminho, dtype=DTYPES_CSV_PRECOS))
+
+
+def carregar_noticias(caminho='data/noticias_com_sentimento.csv'):
+    """ Lê um CSV de notícias (ou o seu dataset append-only) já com os tipos compactos """
+    import dataset_writer
+    return otimizar_noticias(dataset_writer.ler(caminho, dtype=DTYPES_CSV_NOTICIAS))
+
+
+def memoria_mb(df):
+    """ Memória ocupada pelo DataFrame (incluindo strings), em MB """
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def relatorio_memoria(n_tickers=300, n_dias=1250, n_noticias=500_000):
+    """
+    Compara a memória dos datasets antes e depois da otimização de tipos
+
+    Usa dados sintéticos no tamanho de uma base real grande (padrão:
+    5 anos de pregões para 300 ativos e 500 mil manchetes).
+
+    Retorna:
+    DataFrame: Memória (MB) antes/depois por dataset
+    """
+    from synthetic_data import gerar_precos, gerar_noticias, gerar_tickers
+
+    print(f"🧪 Gerando {n_tickers} ativos × {n_dias} pregões e {n_noticias} notícias...")
+    precos = gerar_precos(n_tickers=n_tickers, n_dias=n_dias)
+    noticias = gerar_noticias(n_noticias=n_noticias, tickers=gerar_tickers(n_tickers))
+
+    linhas = []
+    for nome, df, otimizar in [('precos', precos, otimizar_precos),
+                               ('noticias', noticias, otimizar_noticias)]:
+        antes = memoria_mb(df)
+        depois = memoria_mb(otimizar(df))
+        linhas.append({
+            'dataset': nome,
+            'linhas': len(df),
+            'antes_mb': round(antes, 1),
+            'depois_mb': round(depois, 1),
+            'reducao_pct': round((1 - depois / antes) * 100, 1)
+        })
+
+    relatorio = pd.DataFrame(linhas)
+    print("\n📊 MEMÓRIA (MB):\n")
+    print(relatorio.to_string(index=False))
+    return relatorio
+
+
+if __name__ == "__main__":
+    relatorio_memoria()
@@ -1,101 +1,234 @@
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-from datetime import datetime
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import time
 import random
 
+import dataset_writer
+from date_parser import normalizar_datas
+from instrumentation import span, contar, medido
+from schema import otimizar_noticias
+from news_sources import FonteNoticias, FonteInfoMoney, FonteG1, criar_fontes
+from resilience import CircuitBreaker, executar_com_retry
+
+
+class ErroHTTPTransitorio(Exception):
+    """Resposta HTTP que vale tentar de novo (429 ou 5xx)"""
+
+
+def _retentavel(erro):
+    return isinstance(erro, (requests.Timeout, requests.ConnectionError, ErroHTTPTransitorio))
+
+
 class NoticiasScraper:
-    def __init__(self):
+    def __init__(self, fontes=None, max_workers=8):
+        """
+        Parâmetros:
+        fontes (list): Nomes registrados ou adaptadores FonteNoticias (padrão: FONTES_PADRAO)
+        max_workers (int): Máximo de tarefas (ticker × fonte) rodando em paralelo
+        """
         # Lista de User-Agents para o site não nos bloquear
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36'
         ]
         self.noticias = []
+        self.fontes = self._resolver_fontes(fontes)
+        self.max_workers = max_workers
+        self.breakers = {}  # Um circuit breaker por fonte
+        self._vistas = set()
 
     def get_headers(self):
         return {'User-Agent': random.choice(self.user_agents)}
 
+    def _resolver_fontes(self, fontes):
+        if fontes is None:
+            return criar_fontes()
+        nomes = [f for f in fontes if not isinstance(f, FonteNoticias)]
+        instancias = iter(criar_fontes(nomes))
+        return [f if isinstance(f, FonteNoticias) else next(instancias) for f in fontes]
+
+    def _breaker(self, fonte):
+        return self.breakers.setdefault(fonte.nome, CircuitBreaker())
+
+    def _baixar(self, fonte):
+        """ Cria a função de download (com retry) usada pela fonte """
+        def requisitar(url):
+            with span('scraper.http', fonte=fonte.nome):
+                response = requests.get(url, headers=self.get_headers(), timeout=fonte.timeout)
+            contar('scraper.respostas', fonte=fonte.nome, status=response.status_code)
+            if response.status_code == 429 or response.status_code >= 500:
+                raise ErroHTTPTransitorio(f"HTTP {response.status_code} em {url}")
+            return response
+
+        def baixar(url):
+            response = executar_com_retry(lambda: requisitar(url),
+                                          tentativas=fonte.tentativas,
+                                          retentavel=_retentavel)
+            return response.content if response.status_code == 200 else None
+
+        return baixar
+
+    @staticmethod
+    def _chave(noticia):
+        # Títulos iguais (ignorando caixa e espaços) são a mesma notícia
+        return ' '.join(noticia['titulo'].split()).casefold()
+
+    def iterar_noticias(self, tickers_list, fontes=None):
+        """
+        Busca notícias de vários ativos em paralelo
+
+        Cada par (ticker, fonte) vira uma tarefa num pool limitado a
+        `max_workers` threads. Cada fonte tem um teto de tarefas simultâneas
+        (`fonte.concorrencia`, padrão: max_workers dividido entre as fontes),
+        e uma tarefa que estoura o tempo limite continua ocupando a vaga da
+        sua fonte até a thread terminar. Assim uma fonte lenta ou fora do ar
+        só atrasa as suas próprias tarefas; se todas as vagas dela estão
+        presas em tarefas abandonadas, o resto da fila dela é descartado.
+
+        O circuit breaker da fonte recebe um resultado por tarefa: sucesso ou
+        falha quando ela termina, falha quando é abandonada (o que ela devolver
+        depois é ignorado). Com o circuito aberto a fonte não recebe tarefas
+        novas; no meio-aberto, só a tarefa de teste.
+
+        Parâmetros:
+        tickers_list (list): Lista de tickers ['PETR4', 'VALE3']
+        fontes (list): Adaptadores a usar (padrão: os do scraper)
+
+        Retorna:
+        generator: Notícias sem duplicatas, na ordem em que chegam
+        """
+        fontes = self.fontes if fontes is None else fontes
+        if not fontes:
+            return
+        fatia = max(1, self.max_workers // len(fontes))
+        inicio = {}
+        filas = {fonte.nome: deque(tickers_list) for fonte in fontes}
+        futuros = {}
+        pendentes = set()
+        abandonados = set()  # Tarefas que estouraram o tempo mas seguem rodando
+        em_uso = Counter()   # Vagas ocupadas por fonte (inclusive abandonadas)
+
+        def executar(ticker, fonte):
+            inicio[(ticker, fonte.nome)] = time.monotonic()
+            with span('scraper.fonte', fonte=fonte.nome):
+                return fonte.buscar(ticker, self._baixar(fonte))
+
+        def despachar():
+            for futuro in [f for f in abandonados if f.done()]:
+                abandonados.discard(futuro)
+                em_uso[futuros[futuro][1].nome] -= 1
+
+            for fonte in fontes:
+                fila = filas[fonte.nome]
+                limite = fonte.concorrencia or fatia
+                breaker = self._breaker(fonte)
+                recusada = False
+                while fila and em_uso[fonte.nome] < limite:
+                    if not breaker.permite():
+                        recusada = True
+                        break
+                    ticker = fila.popleft()
+                    futuro = executor.submit(executar, ticker, fonte)
+                    futuros[futuro] = (ticker, fonte)
+                    pendentes.add(futuro)
+                    em_uso[fonte.nome] += 1
+
+                vivas = any(futuros[f][1] is fonte for f in pendentes)
+                if fila and not vivas:
+                    contar('scraper.descartadas', len(fila), fonte=fonte.nome)
+                    motivo = 'circuito aberto' if recusada else 'travada'
+                    print(f"  ⏱️ {fonte.nome} {motivo}: {len(fila)} tarefas descartadas")
+                    fila.clear()
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            despachar()
+
+            while pendentes:
+                prontos, _ = wait(pendentes, timeout=1, return_when=FIRST_COMPLETED)
+
+                for futuro in prontos:
+                    pendentes.discard(futuro)
+                    ticker, fonte = futuros[futuro]
+                    em_uso[fonte.nome] -= 1
+                    try:
+                        itens = futuro.result()
+                    except Exception as e:
+                        self._breaker(fonte).registrar_falha()
+                        contar('scraper.falhas', fonte=fonte.nome, erro=type(e).__name__)
+                        print(f"  Erro em {fonte.nome} ({ticker}): {e}")
+                        continue
+
+                    self._breaker(fonte).registrar_sucesso()
+                    print(f"🔍 [{fonte.nome}] {ticker}: {len(itens)} notícias")
+                    contar('scraper.noticias', len(itens), fonte=fonte.nome)
+                    for noticia in itens:
+                        chave = self._chave(noticia)
+                        if chave not in self._vistas:
+                            self._vistas.add(chave)
+                            yield noticia
+                        else:
+                            contar('scraper.duplicadas', fonte=fonte.nome)
+
+                # Abandona tarefas que estouraram o tempo limite da fonte
+                agora = time.monotonic()
+                for futuro in list(pendentes):
+                    ticker, fonte = futuros[futuro]
+                    t0 = inicio.get((ticker, fonte.nome))
+                    if t0 is not None and agora - t0 > fonte.tempo_limite:
+                        pendentes.discard(futuro)
+                        abandonados.add(futuro)
+                        self._breaker(fonte).registrar_falha()
+                        contar('scraper.tempo_esgotado', fonte=fonte.nome)
+                        print(f"  ⏱️ Tempo limite excedido em {fonte.nome} ({ticker})")
+
+                despachar()
+        finally:
+            # Consumidor parou antes do fim: tarefas sem resultado não contam no breaker
+            for futuro in pendentes:
+                self._breaker(futuros[futuro][1]).liberar()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def buscar_multiplos_ativos(self, tickers_list, fontes=None):
+        """
+        Busca notícias de vários ativos em todas as fontes configuradas
+
+        Retorna:
+        list: Todas as notícias acumuladas no scraper
+        """
+        self.noticias.extend(self.iterar_noticias(tickers_list, fontes))
+        return self.noticias
+
     def buscar_infomoney(self, ticker, num_paginas=2):
         """ Busca notícias no InfoMoney com suporte a múltiplas páginas (Histórico) """
-        print(f"🔍 [InfoMoney] Buscando histórico de {ticker}...")
-        
-        for pagina in range(1, num_paginas + 1):
-            try:
-                # A URL muda dependendo da página para pegar notícias antigas
-                url = f"https://www.infomoney.com.br/busca/?q={ticker}&page={pagina}"
-                response = requests.get(url, headers=self.get_headers(), timeout=15)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    artigos = soup.find_all('article') 
-                    
-                    if not artigos:
-                        break # Se não tem artigo na página, para de buscar
-
-                    for artigo in artigos:
-                        titulo_tag = artigo.find('h2') or artigo.find('h3')
-                        if titulo_tag:
-                            titulo = titulo_tag.get_text(strip=True)
-                            link = artigo.find('a')['href'] if artigo.find('a') else ""
-                            data_tag = artigo.find('time')
-                            data = data_tag.get_text(strip=True) if data_tag else "Data antiga"
-                            
-                            self.noticias.append({
-                                'ticker': ticker,
-                                'titulo': titulo,
-                                'link': link,
-                                'data': data,
-                                'fonte': 'InfoMoney'
-                            })
-                    print(f"  Página {pagina}: OK")
-                
-                time.sleep(random.uniform(1, 3)) # Pausa humana para não ser banido
-            except Exception as e:
-                print(f"  Erro na página {pagina}: {e}")
+        self.buscar_multiplos_ativos([ticker], [FonteInfoMoney(num_paginas)])
 
     def buscar_g1(self, ticker):
         """ Fonte extra: G1 Economia """
-        print(f"🔍 [G1] Buscando notícias de {ticker}...")
-        try:
-            url = f"https://g1.globo.com/busca/?q={ticker}"
-            response = requests.get(url, headers=self.get_headers(), timeout=15)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # No G1 as notícias ficam em classes 'content-text__title'
-            titulos = soup.find_all('div', class_='widget--info__text-container', limit=5)
-            
-            for item in titulos:
-                titulo = item.find('div', class_='widget--info__title').get_text(strip=True)
-                link = "https:" + item.find('a')['href']
-                self.noticias.append({
-                    'ticker': ticker,
-                    'titulo': titulo,
-                    'link': link,
-                    'data': datetime.now().strftime('%d/%m/%Y'),
-                    'fonte': 'G1'
-                })
-        except Exception as e:
-            print(f"  Erro no G1: {e}")
+        self.buscar_multiplos_ativos([ticker], [FonteG1()])
 
+    @medido('scraper.salvar_dados')
     def salvar_dados(self):
         if self.noticias:
             df = pd.DataFrame(self.noticias)
             # Remove notícias duplicadas (títulos iguais)
             df = df.drop_duplicates(subset=['titulo'])
-            df.to_csv('data/noticias.csv', index=False, encoding='utf-8-sig')
-            print(f"\n✅ Sucesso! {len(df)} notícias únicas salvas em data/noticias.csv")
+            # Data normalizada (UTC) para cruzar com os preços no tempo certo
+            df['data_utc'] = normalizar_datas(df['data'], referencia=df.get('coletado_em'))
+            # Append-only: só as manchetes que ainda não estão no histórico viram segmento novo
+            novas = dataset_writer.dataset('data/noticias.csv').acrescentar(df)
+            print(f"\n✅ Sucesso! {len(df)} notícias únicas coletadas, {novas} novas salvas em data/noticias")
+            return otimizar_noticias(df)
         else:
             print("\n❌ Nenhuma notícia encontrada.")
+            return None
 
 # --- EXECUÇÃO ---
 if __name__ == "__main__":
-    scraper = NoticiasScraper()
+    scraper = NoticiasScraper(fontes=[FonteInfoMoney(num_paginas=3), 'G1'])  # InfoMoney até a página 3 (volta no tempo)
     ativos = ['PETR4', 'VALE3', 'ITUB4']
-    
-    for ativo in ativos:
-        scraper.buscar_infomoney(ativo, num_paginas=3) # Busca até a página 3 (volta no tempo)
-        scraper.buscar_g1(ativo) # Tenta também no G1
-        
-    scraper.salvar_dados()
\ No newline at end of file
+
+    scraper.buscar_multiplos_ativos(ativos)
+    scraper.salvar_dados()
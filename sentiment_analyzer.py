@@ -1,42 +1,270 @@
-def analisar_texto(self, texto):
-    """Analisa o sentimento de um texto"""
-    # Tokenizar e analisar
-    inputs = self.tokenizer(texto, return_tensors="pt", truncation=True, max_length=512)
-    
-    with torch.no_grad():
-        outputs = self.model(**inputs)
-    
-    # Obter probabilidades
-    probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-    scores = {
-        'negative': probs[0][0].item(),
-        'neutral': probs[0][1].item(),
-        'positive': probs[0][2].item()
-    }
-    
-    # APLICAR BIAS: Reduzir o score neutro em 20% para forçar classificação
+import os
+
+import numpy as np
+import torch
+import pandas as pd
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+from drift_monitor import monitor
+from instrumentation import span, contar
+
+
+MODELO_PADRAO = 'ProsusAI/finbert'
+
+# Rótulos dos modelos -> classe (modelos em português usam rótulos em português)
+ROTULOS = {
+    'positive': 'positive', 'positivo': 'positive', 'pos': 'positive',
+    'negative': 'negative', 'negativo': 'negative', 'neg': 'negative',
+    'neutral': 'neutral', 'neutro': 'neutral', 'neu': 'neutral'
+}
+
+
+def resultado_sentimento(scores, penalidade_neutro=0.80):
+    """
+    Resultado final a partir dos scores de um texto
+
+    Parâmetros:
+    scores (dict): Probabilidades de 'negative', 'neutral' e 'positive'
+    penalidade_neutro (float): Multiplicador do score neutro na escolha da classe
+    """
+    # APLICAR BIAS: Reduzir o score neutro (20% no FinBERT) para forçar classificação
     scores_ajustados = {
         'negative': scores['negative'],
-        'neutral': scores['neutral'] * 0.80,  # Penaliza neutro
+        'neutral': scores['neutral'] * penalidade_neutro,  # Penaliza neutro
         'positive': scores['positive']
     }
-    
+
     # Escolher o maior score AJUSTADO
     sentimento_final = max(scores_ajustados, key=scores_ajustados.get)
-    
+
     # Mapear para português
     mapa = {
         'positive': 'positivo',
         'negative': 'negativo',
         'neutral': 'neutro'
     }
-    
+
     sentimento_pt = mapa[sentimento_final]
-    
+
     return {
         'sentimento': sentimento_pt,
         'confianca': round(scores[sentimento_final] * 100, 1),  # Usa score original
         'score_positivo': scores['positive'],
         'score_negativo': scores['negative'],
         'score_neutro': scores['neutral']
-    }
\ No newline at end of file
+    }
+
+
+class SentimentAnalyzer:
+    """
+    Analisa o sentimento de notícias financeiras com FinBERT
+    """
+
+    def __init__(self, modelo=MODELO_PADRAO, tokenizer=None, model=None, local_files_only=False,
+                 penalidade_neutro=0.80, cache_tokens=False):
+        """
+        Parâmetros:
+        modelo (str): Nome no Hugging Face ou diretório local do modelo
+        tokenizer, model: Instâncias já carregadas (ex: modelo reduzido em benchmarks)
+        local_files_only (bool): Só carrega pesos já em disco (sem acesso à rede)
+        penalidade_neutro (float): Multiplicador do score neutro na escolha da classe
+            (0.80 compensa o FinBERT lendo manchetes em português; 1.0 = sem ajuste)
+        cache_tokens (bool | str | CacheTokens): Lê os input_ids do corpus
+            pré-tokenizado (True; 'leitura' = sem gravar manchetes novas)
+        """
+        print("🤖 Carregando modelo de sentimento...")
+        self.nome = modelo
+        self.penalidade_neutro = penalidade_neutro
+        self.tokenizer = tokenizer if tokenizer is not None else AutoTokenizer.from_pretrained(
+            modelo, local_files_only=local_files_only)
+        self.model = model if model is not None else AutoModelForSequenceClassification.from_pretrained(
+            modelo, local_files_only=local_files_only)
+        self.model.eval()
+
+        # Posição de cada classe na saída do modelo (a ordem muda entre versões do FinBERT)
+        id2label = {i: ROTULOS.get(rotulo.lower()) for i, rotulo in self.model.config.id2label.items()}
+        if set(id2label.values()) >= {'positive', 'negative', 'neutral'}:
+            self.indices = {rotulo: i for i, rotulo in id2label.items()}
+        else:
+            self.indices = {'negative': 0, 'neutral': 1, 'positive': 2}
+
+        self.cache_tokens = None
+        if cache_tokens:
+            from token_cache import CacheTokens
+            self.cache_tokens = cache_tokens if isinstance(cache_tokens, CacheTokens) else \
+                CacheTokens(modelo, somente_leitura=cache_tokens == 'leitura')
+
+    def _resultado(self, probs):
+        """ Converte as probabilidades de um texto no resultado final """
+        scores = {
+            'negative': float(probs[self.indices['negative']]),
+            'neutral': float(probs[self.indices['neutral']]),
+            'positive': float(probs[self.indices['positive']])
+        }
+        return resultado_sentimento(scores, self.penalidade_neutro)
+
+    @property
+    def dimensao_embedding(self):
+        """ Tamanho dos embeddings das manchetes (hidden size do modelo) """
+        return self.model.config.hidden_size
+
+    def _forward(self, textos, batch_size, embeddings):
+        """
+        Forward pass por lote
+
+        Retorna (gerador):
+        tuple: (textos do lote, probabilidades, embeddings do lote ou None)
+        """
+        for inicio in range(0, len(textos), batch_size):
+            lote = list(textos[inicio:inicio + batch_size])
+
+            # Tokenizar e analisar
+            with span('sentimento.tokenizacao'):
+                if self.cache_tokens is not None:
+                    inputs = self.cache_tokens.lote(lote, self.tokenizer)
+                else:
+                    inputs = self.tokenizer(lote, return_tensors="pt", truncation=True,
+                                            max_length=512, padding=True)
+
+            with span('sentimento.forward'), torch.no_grad():
+                outputs = self.model(**inputs, output_hidden_states=embeddings)
+            contar('sentimento.textos', len(lote))
+
+            # Obter probabilidades
+            probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
+
+            vetores = None
+            if embeddings:
+                # Média da última camada sobre os tokens reais (sem padding)
+                mascara = inputs['attention_mask'].unsqueeze(-1).to(outputs.hidden_states[-1].dtype)
+                soma = (outputs.hidden_states[-1] * mascara).sum(dim=1)
+                vetores = (soma / mascara.sum(dim=1).clamp(min=1)).numpy()
+            yield lote, probs.numpy(), vetores
+
+    def analisar_texto(self, texto):
+        """Analisa o sentimento de um texto"""
+        return self.analisar_lote([texto])[0]
+
+    def analisar_lote(self, textos, batch_size=32, cache_embeddings=None):
+        """
+        Analisa vários textos com um forward pass por lote
+
+        Parâmetros:
+        textos (list): Textos a analisar
+        batch_size (int): Textos por forward pass
+        cache_embeddings (CacheEmbeddings): Se informado, guarda também o
+            embedding de cada texto novo, tirado do mesmo forward pass
+
+        Retorna:
+        list: Um resultado (dict) por texto, na mesma ordem
+        """
+        resultados = []
+        for lote, probs, vetores in self._forward(textos, batch_size, cache_embeddings is not None):
+            resultados.extend(self._resultado(p) for p in probs)
+            if vetores is not None:
+                cache_embeddings.adicionar(lote, vetores)
+        return resultados
+
+    def embeddings(self, textos, batch_size=32):
+        """
+        Embeddings das manchetes (média da última camada oculta)
+
+        Retorna:
+        ndarray: Matriz float32 (n x dimensao_embedding)
+        """
+        vetores = [v for _, _, v in self._forward(textos, batch_size, True)]
+        if not vetores:
+            return np.empty((0, self.dimensao_embedding), dtype=np.float32)
+        return np.concatenate(vetores).astype(np.float32)
+
+    def analisar_dataframe(self, df, coluna='titulo', batch_size=32, cache_embeddings=None):
+        """
+        Analisa o sentimento de todas as notícias de um DataFrame
+
+        Parâmetros:
+        cache_embeddings (CacheEmbeddings): Guarda os embeddings das manchetes novas
+
+        Retorna:
+        DataFrame: Cópia de df com sentimento, confianca e scores
+        """
+        print(f"🧠 Analisando {len(df)} notícias...")
+        resultados = self.analisar_lote(df[coluna].astype(str).tolist(), batch_size, cache_embeddings)
+        df_resultado = pd.concat(
+            [df.reset_index(drop=True), pd.DataFrame(resultados)], axis=1
+        )
+        monitor().observar_sentimentos(df_resultado)
+        print("✅ Análise concluída!")
+        return df_resultado
+
+
+# Backend de sentimento -> módulo e fábrica (importados só quando usados)
+BACKENDS = {
+    'finbert': ('sentiment_analyzer', 'SentimentAnalyzer'),
+    'roteador': ('sentiment_router', 'RoteadorSentimento'),
+    'aluno': ('sentiment_student', 'AlunoSentimento')
+}
+
+
+def criar_analisador(backend=None, **kwargs):
+    """
+    Analisador de sentimento do backend escolhido
+
+    Parâmetros:
+    backend (str): Chave de BACKENDS (padrão: variável SENTINEL_SENTIMENTO ou 'finbert')
+    kwargs: Repassados ao construtor do backend
+
+    Retorna:
+    Objeto com analisar_texto, analisar_lote, analisar_dataframe e embeddings
+    """
+    import importlib
+
+    backend = backend or os.environ.get('SENTINEL_SENTIMENTO', 'finbert')
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de sentimento desconhecido: {backend} (opções: {', '.join(BACKENDS)})")
+    modulo, classe = BACKENDS[backend]
+    return getattr(importlib.import_module(modulo), classe)(**kwargs)
+
+
+def analisar_pendentes(analyzer, df_noticias, caminho='data/noticias_com_sentimento.csv',
+                       reanalisar=False, **kwargs):
+    """
+    Analisa só as manchetes que ainda não estão em `caminho` e acrescenta o resultado
+
+    Parâmetros:
+    analyzer: Qualquer analisador de criar_analisador (ou AnalisadorParalelo)
+    df_noticias (DataFrame): Notícias coletadas
+    reanalisar (bool): Analisa todas de novo e substitui o conteúdo (ex: trocou o modelo)
+    kwargs: Repassados a analisar_dataframe (batch_size, cache_embeddings)
+
+    Retorna:
+    DataFrame: Notícias analisadas nesta chamada (vazio se não havia pendentes)
+    """
+    import dataset_writer
+    import storage
+
+    if not reanalisar and storage.existe(caminho):
+        feitas = dataset_writer.normalizar_chave(storage.sentimentos(caminho), ['titulo'])
+        novas = ~dataset_writer.normalizar_chave(df_noticias, ['titulo']).isin(feitas)
+        print(f"⏭️ {int((~novas).sum())} notícias já analisadas")
+        df_noticias = df_noticias[novas]
+    if len(df_noticias) == 0:
+        return df_noticias.iloc[:0]
+
+    df_resultado = analyzer.analisar_dataframe(df_noticias, **kwargs)
+    destino = dataset_writer.dataset(caminho)
+    destino.substituir(df_resultado) if reanalisar else destino.acrescentar(df_resultado)
+    print(f"💾 {len(df_resultado)} notícias salvas em {dataset_writer.pasta_dataset(caminho)}")
+    return df_resultado
+
+
+# TESTE DO ANALISADOR
+if __name__ == "__main__":
+    try:
+        from schema import carregar_noticias
+
+        df_noticias = carregar_noticias('data/noticias.csv')
+        df_resultado = analisar_pendentes(SentimentAnalyzer(), df_noticias)
+        if len(df_resultado):
+            print(df_resultado['sentimento'].value_counts())
+    except FileNotFoundError:
+        print("❌ data/noticias.csv não encontrado. Execute primeiro: python scraper.py")
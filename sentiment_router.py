@@ -0,0 +1,267 @@
+"""
+Roteamento de sentimento por idioma
+
+O FinBERT só entende inglês, mas InfoMoney e G1 publicam em português.
+O roteador detecta o idioma de cada manchete (por palavras frequentes e
+acentos, sem modelo) e manda cada grupo para o seu modelo, em lotes
+separados. Os pesos são lidos de diretórios locais (local_files_only):
+baixe uma vez com
+
+    python sentiment_router.py baixar pt lucas-leme/FinBERT-PT-BR
+    python sentiment_router.py baixar en ProsusAI/finbert
+
+e compare com o FinBERT puro numa base rotulada:
+
+    python sentiment_router.py avaliar data/sentimento_rotulado.csv
+"""
+import os
+import re
+import time
+
+import pandas as pd
+
+from drift_monitor import monitor
+from instrumentation import span, contar
+from sentiment_analyzer import SentimentAnalyzer, MODELO_PADRAO
+
+
+DIR_MODELOS_SENTIMENTO = 'data/modelos_sentimento'
+
+# Idioma -> modelo (diretório local ou nome já presente no cache do Hugging Face)
+MODELOS_PADRAO = {
+    'en': os.path.join(DIR_MODELOS_SENTIMENTO, 'en'),
+    'pt': os.path.join(DIR_MODELOS_SENTIMENTO, 'pt')
+}
+
+PALAVRAS_PT = frozenset("""
+de da do das dos em no na nos nas que com para por um uma os ao aos à às mais sobre
+após não seu sua seus suas pelo pela entre até como mas já ser tem foi são está
+lucro prejuízo ações ação alta queda bolsa receita dividendos bilhões milhões
+trimestre balanço dólar juros governo mercado empresa resultado investidores
+""".split())
+
+PALAVRAS_EN = frozenset("""
+the of and to in for on with is as by at from its after over into amid than be
+has have was were are will says said new up down this that next week year
+shares stock stocks profit loss revenue sales quarter billion million earnings
+rises falls jumps slips surge surges beats misses cuts raises steady await
+deal market company investors traders rate rates prices price output production
+guidance estimates forecast outlook growth debt bank banks oil iron ore
+""".split())
+
+ACENTOS_PT = re.compile(r'[ãõçáéíóúâêôà]')
+PALAVRA = re.compile(r"[a-zà-ÿ]+")
+
+
+def detectar_idioma(texto, padrao='pt'):
+    """
+    Idioma provável da manchete ('pt' ou 'en')
+
+    Conta palavras frequentes de cada idioma; acentos e cedilha valem como
+    evidência de português. Empates ficam com `padrao`.
+    """
+    texto = str(texto).lower()
+    palavras = PALAVRA.findall(texto)
+    pontos = sum(p in PALAVRAS_PT for p in palavras) - sum(p in PALAVRAS_EN for p in palavras)
+    pontos += 2 * bool(ACENTOS_PT.search(texto))
+    if pontos == 0:
+        return padrao
+    return 'pt' if pontos > 0 else 'en'
+
+
+class RoteadorSentimento:
+    """
+    Analisador que manda cada manchete para o modelo do seu idioma
+
+    Mesma interface do SentimentAnalyzer (analisar_texto, analisar_lote,
+    analisar_dataframe, embeddings); o resultado ganha a chave 'idioma'.
+    Embeddings vêm sempre do modelo principal ('en'), para que as features
+    do preditor fiquem num único espaço.
+    """
+
+    def __init__(self, modelos=None, local_files_only=True, padrao='pt', analisadores=None, cache_tokens=False):
+        """
+        Parâmetros:
+        modelos (dict): Idioma -> diretório local (ou nome no cache do Hugging Face)
+        local_files_only (bool): Nunca acessa a rede para carregar pesos
+        padrao (str): Idioma das manchetes sem evidência de idioma
+        analisadores (dict): Idioma -> SentimentAnalyzer já carregado (ex: benchmarks)
+        cache_tokens (bool | str): Corpus pré-tokenizado de cada modelo (ver SentimentAnalyzer)
+        """
+        self.modelos = dict(MODELOS_PADRAO if modelos is None else modelos)
+        self.local_files_only = local_files_only
+        self.padrao = padrao
+        self._analisadores = dict(analisadores or {})
+        self.cache_tokens = cache_tokens
+        self.estatisticas = {}  # idioma -> {'textos': n, 'segundos': s}
+
+    def analisador(self, idioma):
+        """ Analisador do idioma, carregado na primeira vez que é usado """
+        if idioma in self._analisadores:
+            return self._analisadores[idioma]
+
+        modelo = self.modelos.get(idioma)
+        existe = modelo is not None and (os.path.isdir(modelo) or os.path.sep not in modelo)
+        if idioma == 'en' and not existe:
+            # Sem diretório local: FinBERT do cache do Hugging Face
+            modelo, existe = MODELO_PADRAO, True
+
+        if existe:
+            # Modelo do próprio idioma: sem penalidade no score neutro
+            analisador = SentimentAnalyzer(modelo, local_files_only=self.local_files_only,
+                                           penalidade_neutro=1.0, cache_tokens=self.cache_tokens)
+        else:
+            # Sem modelo próprio: o modelo em inglês com a penalidade de neutro de antes
+            print(f"⚠️ Sem modelo para '{idioma}' em {modelo}: usando o modelo em inglês")
+            ingles = self.analisador('en')
+            analisador = SentimentAnalyzer(ingles.nome, tokenizer=ingles.tokenizer, model=ingles.model,
+                                           cache_tokens=ingles.cache_tokens)
+        self._analisadores[idioma] = analisador
+        return analisador
+
+    @property
+    def nome(self):
+        return self.analisador('en').nome
+
+    @property
+    def dimensao_embedding(self):
+        return self.analisador('en').dimensao_embedding
+
+    def idiomas(self, textos):
+        return [detectar_idioma(t, self.padrao) for t in textos]
+
+    def analisar_texto(self, texto):
+        return self.analisar_lote([texto])[0]
+
+    def analisar_lote(self, textos, batch_size=32, cache_embeddings=None):
+        """
+        Analisa vários textos, um grupo (e um modelo) por idioma
+
+        Parâmetros:
+        cache_embeddings (CacheEmbeddings): Recebe os embeddings de todos os textos,
+            sempre do modelo principal ('en'), o mesmo de embeddings() no treino
+
+        Retorna:
+        list: Um resultado (dict) por texto, na mesma ordem, com 'idioma'
+        """
+        textos = list(textos)
+        idiomas = self.idiomas(textos)
+        resultados = [None] * len(textos)
+        for idioma in sorted(set(idiomas)):
+            posicoes = [i for i, x in enumerate(idiomas) if x == idioma]
+            analisador = self.analisador(idioma)
+            # Só o modelo principal alimenta o cache: um único espaço de embeddings
+            cache = cache_embeddings if analisador.model is self.analisador('en').model else None
+
+            inicio = time.perf_counter()
+            with span('sentimento.modelo', idioma=idioma):
+                parte = analisador.analisar_lote([textos[i] for i in posicoes], batch_size, cache)
+            estatistica = self.estatisticas.setdefault(idioma, {'textos': 0, 'segundos': 0.0})
+            estatistica['textos'] += len(posicoes)
+            estatistica['segundos'] += time.perf_counter() - inicio
+            contar('sentimento.roteados', len(posicoes), idioma=idioma)
+
+            if cache_embeddings is not None and cache is None:
+                # Um único espaço de embeddings: textos de outros modelos ganham o vetor do 'en'
+                # (só adicionar: é o que o coletor do parallel_sentiment também oferece)
+                grupo = [textos[i] for i in posicoes]
+                cache_embeddings.adicionar(grupo, self.embeddings(grupo, batch_size))
+
+            for i, resultado in zip(posicoes, parte):
+                resultados[i] = {**resultado, 'idioma': idioma}
+        return resultados
+
+    def embeddings(self, textos, batch_size=32):
+        return self.analisador('en').embeddings(textos, batch_size)
+
+    def analisar_dataframe(self, df, coluna='titulo', batch_size=32, cache_embeddings=None):
+        """
+        Analisa o sentimento de todas as notícias de um DataFrame
+
+        Retorna:
+        DataFrame: Cópia de df com sentimento, confianca, scores e idioma
+        """
+        print(f"🧠 Analisando {len(df)} notícias (roteadas por idioma)...")
+        resultados = pd.DataFrame(self.analisar_lote(df[coluna].astype(str).tolist(), batch_size,
+                                                     cache_embeddings))
+        base = df.reset_index(drop=True).drop(columns=list(resultados.columns), errors='ignore')
+        df_resultado = pd.concat([base, resultados], axis=1)
+        monitor().observar_sentimentos(df_resultado)
+        for linha in self.vazao().itertuples():
+            print(f"   {linha.idioma}: {linha.textos} textos, {linha.textos_por_segundo:.1f} textos/s")
+        print("✅ Análise concluída!")
+        return df_resultado
+
+    def vazao(self):
+        """ Textos analisados e textos por segundo de cada modelo """
+        return pd.DataFrame([
+            {'idioma': idioma, 'modelo': self.modelos.get(idioma), 'textos': e['textos'],
+             'segundos': round(e['segundos'], 3),
+             'textos_por_segundo': e['textos'] / e['segundos'] if e['segundos'] else 0.0}
+            for idioma, e in sorted(self.estatisticas.items())
+        ], columns=['idioma', 'modelo', 'textos', 'segundos', 'textos_por_segundo'])
+
+
+def baixar(idioma, modelo, diretorio=DIR_MODELOS_SENTIMENTO):
+    """ Baixa um modelo do Hugging Face (única etapa com rede) e salva em <diretorio>/<idioma> """
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    destino = os.path.join(diretorio, idioma)
+    AutoTokenizer.from_pretrained(modelo).save_pretrained(destino)
+    AutoModelForSequenceClassification.from_pretrained(modelo).save_pretrained(destino)
+    print(f"💾 {modelo} salvo em {destino}")
+    return destino
+
+
+def avaliar(fixture, analisadores, batch_size=32):
+    """
+    Compara analisadores numa base rotulada
+
+    Parâmetros:
+    fixture (DataFrame): titulo, sentimento (positivo/neutro/negativo) e,
+        opcionalmente, idioma
+    analisadores (dict): Nome -> analisador (SentimentAnalyzer ou RoteadorSentimento)
+
+    Retorna:
+    DataFrame: Acurácia total e por idioma e textos por segundo de cada analisador
+    """
+    fixture = fixture.reset_index(drop=True)
+    idiomas = fixture['idioma'] if 'idioma' in fixture.columns else \
+        pd.Series([detectar_idioma(t) for t in fixture['titulo']])
+    linhas = []
+    for nome, analisador in analisadores.items():
+        inicio = time.perf_counter()
+        previstos = pd.Series([r['sentimento'] for r in analisador.analisar_lote(
+            fixture['titulo'].astype(str).tolist(), batch_size)])
+        segundos = time.perf_counter() - inicio
+        acertos = previstos == fixture['sentimento']
+        linha = {'analisador': nome, 'textos': len(fixture), 'acuracia': acertos.mean(),
+                 'textos_por_segundo': len(fixture) / segundos}
+        for idioma in sorted(idiomas.unique()):
+            linha[f'acuracia_{idioma}'] = acertos[idiomas == idioma].mean()
+        linhas.append(linha)
+    return pd.DataFrame(linhas).round(3)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sentimento roteado por idioma")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p_baixar = sub.add_parser('baixar', help="baixa pesos para data/modelos_sentimento/<idioma>")
+    p_baixar.add_argument('idioma')
+    p_baixar.add_argument('modelo')
+    p_avaliar = sub.add_parser('avaliar', help="FinBERT puro x roteador numa base rotulada")
+    p_avaliar.add_argument('fixture', nargs='?', default='data/sentimento_rotulado.csv')
+    args = parser.parse_args()
+
+    if args.comando == 'baixar':
+        baixar(args.idioma, args.modelo)
+    else:
+        roteador = RoteadorSentimento()
+        finbert = roteador.analisador('en')
+        # FinBERT puro = comportamento anterior (tudo em inglês, com penalidade de neutro)
+        finbert_puro = SentimentAnalyzer(finbert.nome, tokenizer=finbert.tokenizer, model=finbert.model)
+        fixture = pd.read_csv(args.fixture)
+        print(avaliar(fixture, {'finbert': finbert_puro, 'roteador': roteador}).to_string(index=False))
+        print(roteador.vazao().to_string(index=False))
@@ -0,0 +1,338 @@
+"""
+Modelo aluno de sentimento (destilação do FinBERT)
+
+Um classificador linear sobre n-gramas com hashing (palavras + caracteres),
+treinado para reproduzir as probabilidades que o FinBERT já gravou em
+data/noticias_com_sentimento.csv (score_negativo/neutro/positivo). Analisa
+dezenas de milhares de manchetes por segundo na CPU; as manchetes em que o
+aluno fica inseguro (confiança abaixo do limiar) sobem para o modelo completo.
+
+    python sentiment_student.py destilar          # treina e mostra a curva vazão x concordância
+    python main.py sentimento --sentimento-backend aluno
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from drift_monitor import monitor
+from instrumentation import span, contar
+from sentiment_analyzer import resultado_sentimento
+
+
+ARQUIVO_ALUNO = 'data/modelos_sentimento/aluno.npz'
+CLASSES = ('negative', 'neutral', 'positive')  # ordem das colunas de probabilidade
+COLUNAS_SCORE = ('score_negativo', 'score_neutro', 'score_positivo')
+
+
+def _vetorizadores(n_bits):
+    """ Palavras (1-2) e caracteres (3-5) em espaços de hashing separados """
+    comum = dict(n_features=2 ** (n_bits - 1), alternate_sign=False, norm=None,
+                 strip_accents='unicode', lowercase=True, dtype=np.float32)
+    return (HashingVectorizer(analyzer='word', ngram_range=(1, 2), **comum),
+            HashingVectorizer(analyzer='char_wb', ngram_range=(3, 5), **comum))
+
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class AlunoSentimento:
+    """
+    Analisador rápido destilado do FinBERT, com escalonamento para o professor
+
+    Mesma interface do SentimentAnalyzer. O resultado ganha a chave 'origem'
+    ('aluno' ou 'professor').
+    """
+
+    def __init__(self, arquivo=ARQUIVO_ALUNO, limiar=0.80, professor='finbert',
+                 n_bits=18, penalidade_neutro=0.80, cache_tokens=False):
+        """
+        Parâmetros:
+        arquivo (str): Pesos do aluno (carregados se existirem)
+        limiar (float): Confiança mínima do aluno (0-1); abaixo dela o texto
+            vai para o professor (None = nunca escalona)
+        professor (str | objeto): Backend de criar_analisador ou analisador já carregado
+        n_bits (int): Tamanho do espaço de hashing (2^n_bits features)
+        penalidade_neutro (float): Mesma regra de decisão do professor
+        cache_tokens (bool | str): Corpus pré-tokenizado do professor (ver SentimentAnalyzer)
+        """
+        self.arquivo = arquivo
+        self.limiar = limiar
+        self.n_bits = n_bits
+        self.penalidade_neutro = penalidade_neutro
+        self.pesos = None
+        self.vies = None
+        self._professor = professor
+        self.cache_tokens = cache_tokens
+        self._vetorizadores = _vetorizadores(n_bits)
+        self.estatisticas = {'aluno': 0, 'professor': 0}
+        if arquivo and os.path.exists(arquivo):
+            self.carregar(arquivo)
+
+    @property
+    def nome(self):
+        return 'aluno'
+
+    def professor(self):
+        """ Modelo completo, carregado só quando algum texto é escalonado """
+        if isinstance(self._professor, str):
+            from sentiment_analyzer import criar_analisador
+            kwargs = {'cache_tokens': self.cache_tokens} if self.cache_tokens else {}
+            self._professor = criar_analisador(self._professor, **kwargs)
+        return self._professor
+
+    # ==================
+    # FEATURES E TREINO
+    # ==================
+
+    def features(self, textos):
+        """ Matriz esparsa (n x 2^n_bits) de n-gramas, normalizada por linha """
+        palavras, caracteres = self._vetorizadores
+        textos = [str(t) for t in textos]
+        X = sparse.hstack([palavras.transform(textos), caracteres.transform(textos)], format='csr')
+        X.data = np.log1p(X.data)
+        normas = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        return sparse.diags(1 / np.maximum(normas, 1e-12)).astype(np.float32) @ X
+
+    def probabilidades(self, textos=None, X=None):
+        """ Probabilidades (n x 3, na ordem de CLASSES) previstas pelo aluno """
+        if self.pesos is None:
+            raise RuntimeError("Aluno ainda não treinado (python sentiment_student.py destilar)")
+        X = self.features(textos) if X is None else X
+        return _softmax(np.asarray(X @ self.pesos) + self.vies)
+
+    def treinar(self, textos, probs_professor, epocas=5, lote=256, taxa=0.05, l2=1e-6,
+                temperatura=1.0, seed=42, verbose=True):
+        """
+        Destila o professor: minimiza a entropia cruzada com as probabilidades dele
+
+        Parâmetros:
+        textos (list): Manchetes já analisadas pelo professor
+        probs_professor (ndarray): n x 3 (negative, neutral, positive)
+        epocas, lote, taxa, l2: Otimização (Adam em mini-lotes)
+        temperatura (float): > 1 suaviza os alvos, < 1 os deixa mais confiantes
+        """
+        X = self.features(textos)
+        alvos = np.asarray(probs_professor, dtype=np.float64) ** (1 / temperatura)
+        alvos = (alvos / alvos.sum(axis=1, keepdims=True)).astype(np.float32)
+
+        n_features = X.shape[1]
+        self.pesos = np.zeros((n_features, len(CLASSES)), dtype=np.float32)
+        # Viés inicial = distribuição média do professor
+        self.vies = np.log(alvos.mean(axis=0) + 1e-6).astype(np.float32)
+
+        m = [np.zeros_like(self.pesos), np.zeros_like(self.vies)]
+        v = [np.zeros_like(self.pesos), np.zeros_like(self.vies)]
+        b1, b2, passo = 0.9, 0.999, 0
+        rng = np.random.default_rng(seed)
+
+        for epoca in range(epocas):
+            inicio = time.perf_counter()
+            perda = 0.0
+            for idx in np.array_split(rng.permutation(X.shape[0]), max(X.shape[0] // lote, 1)):
+                Xb = X[idx]
+                p = _softmax(np.asarray(Xb @ self.pesos) + self.vies)
+                perda -= float(np.sum(alvos[idx] * np.log(p + 1e-9)))
+                erro = (p - alvos[idx]) / len(idx)
+                gradientes = [np.asarray(Xb.T @ erro) + l2 * self.pesos, erro.sum(axis=0)]
+
+                passo += 1
+                for i, (param, g) in enumerate(zip((self.pesos, self.vies), gradientes)):
+                    m[i] = b1 * m[i] + (1 - b1) * g
+                    v[i] = b2 * v[i] + (1 - b2) * g * g
+                    param -= taxa * (m[i] / (1 - b1 ** passo)) / (np.sqrt(v[i] / (1 - b2 ** passo)) + 1e-8)
+            if verbose:
+                print(f"   época {epoca + 1}/{epocas}: perda {perda / X.shape[0]:.4f} "
+                      f"({time.perf_counter() - inicio:.1f}s)")
+        return self
+
+    # ==================
+    # ANÁLISE
+    # ==================
+
+    def _resultados(self, probs):
+        return [resultado_sentimento(dict(zip(CLASSES, map(float, p))), self.penalidade_neutro)
+                for p in probs]
+
+    def analisar_texto(self, texto):
+        return self.analisar_lote([texto])[0]
+
+    def analisar_lote(self, textos, batch_size=32, cache_embeddings=None):
+        """
+        Analisa com o aluno e escalona os textos incertos para o professor
+
+        Parâmetros:
+        batch_size (int): Lote do professor (o aluno analisa tudo de uma vez)
+        cache_embeddings (CacheEmbeddings): Repassado ao professor (só os
+            textos escalonados ganham embedding)
+
+        Retorna:
+        list: Um resultado (dict) por texto, com 'origem'
+        """
+        textos = [str(t) for t in textos]
+        with span('sentimento.aluno'):
+            resultados = self._resultados(self.probabilidades(textos))
+        incertos = [] if self.limiar is None else \
+            [i for i, r in enumerate(resultados) if r['confianca'] < self.limiar * 100]
+
+        for resultado in resultados:
+            resultado['origem'] = 'aluno'
+        if incertos:
+            with span('sentimento.escalonados'):
+                revisados = self.professor().analisar_lote([textos[i] for i in incertos], batch_size,
+                                                           cache_embeddings)
+            for i, resultado in zip(incertos, revisados):
+                resultados[i] = {**resultado, 'origem': 'professor'}
+
+        self.estatisticas['aluno'] += len(textos) - len(incertos)
+        self.estatisticas['professor'] += len(incertos)
+        contar('sentimento.aluno', len(textos) - len(incertos), origem='aluno')
+        contar('sentimento.aluno', len(incertos), origem='professor')
+        return resultados
+
+    @property
+    def dimensao_embedding(self):
+        return self.professor().dimensao_embedding
+
+    def embeddings(self, textos, batch_size=32):
+        return self.professor().embeddings(textos, batch_size)
+
+    def analisar_dataframe(self, df, coluna='titulo', batch_size=32, cache_embeddings=None):
+        """
+        Analisa o sentimento de todas as notícias de um DataFrame
+
+        Retorna:
+        DataFrame: Cópia de df com sentimento, confianca, scores e origem
+        """
+        print(f"🧠 Analisando {len(df)} notícias (aluno, limiar {self.limiar})...")
+        resultados = pd.DataFrame(self.analisar_lote(df[coluna].astype(str).tolist(), batch_size,
+                                                     cache_embeddings))
+        base = df.reset_index(drop=True).drop(columns=list(resultados.columns), errors='ignore')
+        df_resultado = pd.concat([base, resultados], axis=1)
+        monitor().observar_sentimentos(df_resultado)
+        escalonados = int((resultados['origem'] == 'professor').sum()) if len(resultados) else 0
+        print(f"✅ Análise concluída! ({escalonados} escalonadas para o modelo completo)")
+        return df_resultado
+
+    # ==================
+    # DISCO
+    # ==================
+
+    def salvar(self, arquivo=None):
+        arquivo = arquivo or self.arquivo
+        os.makedirs(os.path.dirname(arquivo) or '.', exist_ok=True)
+        # Hashing: só as linhas com algum peso precisam ser gravadas
+        linhas = np.flatnonzero(np.any(self.pesos != 0, axis=1))
+        config = {'n_bits': self.n_bits, 'penalidade_neutro': self.penalidade_neutro}
+        with open(arquivo, 'wb') as f:
+            np.savez_compressed(f, linhas=linhas, pesos=self.pesos[linhas], vies=self.vies,
+                                config=json.dumps(config))
+        print(f"💾 Aluno salvo em {arquivo}")
+
+    def carregar(self, arquivo=None):
+        arquivo = arquivo or self.arquivo
+        with np.load(arquivo) as dados:
+            config = json.loads(str(dados['config']))
+            self.n_bits = config['n_bits']
+            self.penalidade_neutro = config['penalidade_neutro']
+            self._vetorizadores = _vetorizadores(self.n_bits)
+            self.pesos = np.zeros((2 ** self.n_bits, len(CLASSES)), dtype=np.float32)
+            self.pesos[dados['linhas']] = dados['pesos']
+            self.vies = dados['vies']
+        return self
+
+
+def rotulos(probs, penalidade_neutro=0.80):
+    """ Classe final de cada linha de probabilidades (mesma regra do analisador) """
+    ajustadas = np.asarray(probs, dtype=np.float64).copy()
+    ajustadas[:, CLASSES.index('neutral')] *= penalidade_neutro
+    return ajustadas.argmax(axis=1)
+
+
+def curva_limiares(aluno, textos, probs_professor, limiares=(None, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95),
+                   vazao_professor=None):
+    """
+    Vazão x concordância com o professor para cada limiar de escalonamento
+
+    Textos escalonados recebem o rótulo do professor (concordância total);
+    os demais, o do aluno. A vazão combina o tempo medido do aluno com o do
+    professor para a fração escalonada.
+
+    Parâmetros:
+    textos, probs_professor: Base de validação (não usada no treino)
+    vazao_professor (float): Textos/s do modelo completo (medido à parte)
+
+    Retorna:
+    DataFrame: limiar, pct_escalonado, concordancia e textos_por_segundo
+    """
+    inicio = time.perf_counter()
+    probs_aluno = aluno.probabilidades(textos)
+    segundos_aluno = time.perf_counter() - inicio
+
+    professor = rotulos(probs_professor, aluno.penalidade_neutro)
+    previstos = rotulos(probs_aluno, aluno.penalidade_neutro)
+    confianca = probs_aluno[np.arange(len(previstos)), previstos]
+
+    linhas = []
+    for limiar in limiares:
+        escalonados = np.zeros(len(textos), dtype=bool) if limiar is None else confianca < limiar
+        concordancia = np.mean(np.where(escalonados, True, previstos == professor))
+        segundos = segundos_aluno + (escalonados.sum() / vazao_professor if vazao_professor else 0.0)
+        linhas.append({
+            'limiar': '-' if limiar is None else limiar,
+            'pct_escalonado': round(escalonados.mean() * 100, 1),
+            'concordancia': round(float(concordancia), 4),
+            'textos_por_segundo': round(len(textos) / segundos) if segundos else None
+        })
+    if vazao_professor:
+        linhas.append({'limiar': 'professor', 'pct_escalonado': 100.0, 'concordancia': 1.0,
+                       'textos_por_segundo': round(vazao_professor)})
+    return pd.DataFrame(linhas)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Destilação do FinBERT num modelo aluno")
+    parser.add_argument('comando', choices=['destilar', 'curva'])
+    parser.add_argument('--dados', default='data/noticias_com_sentimento.csv')
+    parser.add_argument('--epocas', type=int, default=5)
+    parser.add_argument('--temperatura', type=float, default=1.0)
+    parser.add_argument('--vazao-professor', type=float,
+                        help="textos/s do FinBERT (padrão: medido em 256 manchetes)")
+    args = parser.parse_args()
+
+    from schema import carregar_noticias
+
+    df = carregar_noticias(args.dados).dropna(subset=list(COLUNAS_SCORE)).reset_index(drop=True)
+    textos = df['titulo'].astype(str).tolist()
+    probs = df[list(COLUNAS_SCORE)].to_numpy(dtype='float64')
+
+    # 90% treino / 10% validação
+    ordem = np.random.default_rng(42).permutation(len(df))
+    corte = int(len(df) * 0.9)
+    treino, validacao = ordem[:corte], ordem[corte:]
+
+    aluno = AlunoSentimento()
+    if args.comando == 'destilar':
+        print(f"🎓 Destilando em {len(treino)} manchetes...")
+        aluno.treinar([textos[i] for i in treino], probs[treino], epocas=args.epocas,
+                      temperatura=args.temperatura)
+        aluno.salvar()
+
+    vazao_professor = args.vazao_professor
+    if vazao_professor is None:
+        amostra = [textos[i] for i in validacao[:256]]
+        inicio = time.perf_counter()
+        aluno.professor().analisar_lote(amostra)
+        vazao_professor = len(amostra) / (time.perf_counter() - inicio)
+
+    print(curva_limiares(aluno, [textos[i] for i in validacao], probs[validacao],
+                         vazao_professor=vazao_professor).to_string(index=False))
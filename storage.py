@@ -0,0 +1,149 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import caminhos
+import dataset_writer
+from caminhos import ARQUIVO_NOTICIAS, ARQUIVO_SENTIMENTOS, ARQUIVO_PRECOS
+from schema import carregar_noticias, carregar_precos
+
+# caminho -> (versão, DataFrame); relido só quando o arquivo (ou o manifesto do dataset) muda
+_cache = {}
+_lock = threading.Lock()
+
+
+def carregar(caminho, leitor):
+    """
+    Lê um dataset com cache por data de modificação
+
+    O mesmo DataFrame é devolvido enquanto o arquivo não mudar, então quem
+    chama não deve modificá-lo no lugar.
+
+    Parâmetros:
+    caminho (str): Arquivo do dataset (CSV ou dataset append-only, ver dataset_writer)
+    leitor (callable): Função caminho -> DataFrame (ex: schema.carregar_precos)
+    """
+    versao = dataset_writer.versao(caminho)
+    with _lock:
+        if caminho in _cache and _cache[caminho][0] == versao:
+            return _cache[caminho][1]
+
+    df = leitor(caminho)
+    with _lock:
+        _cache[caminho] = (versao, df)
+    return df
+
+
+def existe(caminho):
+    """ True se há dados salvos (dataset append-only ou CSV) """
+    return caminhos.existe(caminho)
+
+
+def modificado_em(caminho):
+    """ Momento (epoch) da última gravação; None se ainda não há dados """
+    try:
+        return dataset_writer.versao(caminho)[0] / 1e9
+    except FileNotFoundError:
+        return None
+
+
+def noticias(caminho=ARQUIVO_NOTICIAS):
+    """ Notícias coletadas, com tipos compactos """
+    return carregar(caminho, carregar_noticias)
+
+
+def sentimentos(caminho=ARQUIVO_SENTIMENTOS):
+    """ Notícias com sentimento, com tipos compactos """
+    return carregar(caminho, carregar_noticias)
+
+
+def precos(caminho=ARQUIVO_PRECOS):
+    """ Histórico de preços, com tipos compactos """
+    return carregar(caminho, carregar_precos)
+
+
+def limpar_cache():
+    with _lock:
+        _cache.clear()
+
+
+def _limite(valor, dtype):
+    """ Converte um limite de data (str/date/Timestamp) para o fuso da coluna """
+    valor = pd.Timestamp(valor)
+    fuso = getattr(dtype, 'tz', None)
+    if fuso is None:
+        return valor.tz_localize(None) if valor.tzinfo else valor
+    return valor.tz_localize(fuso) if valor.tzinfo is None else valor.tz_convert(fuso)
+
+
+def filtrar(df, filtros=None, coluna_data=None, inicio=None, fim=None):
+    """
+    Máscara booleana dos filtros (sem copiar o DataFrame)
+
+    Parâmetros:
+    filtros (dict): coluna -> lista de valores aceitos (ex: {'ticker': ['PETR4']})
+    coluna_data (str): Coluna de data usada por inicio/fim
+    inicio, fim: Limites do intervalo de datas (fim inclusivo até o fim do dia
+                 quando vier sem horário)
+
+    Retorna:
+    ndarray: Máscara booleana com uma posição por linha
+    """
+    mascara = np.ones(len(df), dtype=bool)
+    for coluna, valores in (filtros or {}).items():
+        if valores and coluna in df.columns:
+            mascara &= df[coluna].isin(valores).to_numpy()
+
+    if coluna_data and coluna_data in df.columns:
+        datas = df[coluna_data]
+        if inicio is not None:
+            mascara &= (datas >= _limite(inicio, datas.dtype)).to_numpy()
+        if fim is not None:
+            limite = _limite(fim, datas.dtype)
+            if limite == limite.normalize():
+                limite += pd.Timedelta(days=1)
+                mascara &= (datas < limite).to_numpy()
+            else:
+                mascara &= (datas <= limite).to_numpy()
+    return mascara
+
+
+def consultar(df, filtros=None, coluna_data=None, inicio=None, fim=None,
+              ordenar_por=None, crescente=True, pagina=1, tamanho=50):
+    """
+    Filtra, ordena e pagina um dataset no servidor
+
+    Só as linhas da página pedida são copiadas; a ordenação é feita sobre
+    os índices das linhas filtradas.
+
+    Parâmetros:
+    filtros, coluna_data, inicio, fim: Ver filtrar()
+    ordenar_por (str): Coluna de ordenação (None = ordem original)
+    crescente (bool): Ordem crescente ou decrescente
+    pagina (int): Página (começa em 1)
+    tamanho (int): Linhas por página
+
+    Retorna:
+    tuple: (DataFrame da página, total de linhas após os filtros)
+    """
+    posicoes = np.flatnonzero(filtrar(df, filtros, coluna_data, inicio, fim))
+    total = len(posicoes)
+
+    if ordenar_por and ordenar_por in df.columns and total:
+        valores = df[ordenar_por].iloc[posicoes]
+        if isinstance(valores.dtype, pd.CategoricalDtype):
+            chave = valores.cat.codes.to_numpy()
+        elif isinstance(valores.dtype, pd.DatetimeTZDtype):
+            chave = valores.dt.tz_convert(None).to_numpy()
+        else:
+            chave = valores.to_numpy()
+        # Nulos sempre no fim, nos dois sentidos
+        nulos = pd.isna(valores).to_numpy()
+        ordem = np.argsort(chave[~nulos], kind='stable')
+        if not crescente:
+            ordem = ordem[::-1]
+        posicoes = np.concatenate([posicoes[~nulos][ordem], posicoes[nulos]])
+
+    inicio_pagina = (max(pagina, 1) - 1) * tamanho
+    return df.iloc[posicoes[inicio_pagina:inicio_pagina + tamanho]], total
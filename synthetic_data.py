@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+
+
+# Vocabulário das manchetes sintéticas
+_SUJEITOS = ['Petrobras', 'Vale', 'Itaú', 'Bradesco', 'Ambev', 'Magazine Luiza',
+             'Gerdau', 'WEG', 'Suzano', 'B3', 'Localiza', 'Eletrobras']
+_EVENTOS = ['registra lucro recorde', 'anuncia dividendos', 'tem queda na produção',
+            'sofre multa ambiental', 'divulga balanço trimestral', 'fecha contrato bilionário',
+            'revisa projeções para o ano', 'enfrenta investigação', 'amplia investimentos',
+            'corta custos e demite funcionários']
+_CONTEXTOS = ['no trimestre', 'após alta do petróleo', 'com dólar em queda',
+              'em meio a incertezas fiscais', 'segundo analistas', 'e ações disparam',
+              'e papéis recuam', '']
+_FONTES = ['InfoMoney', 'G1', 'GoogleNews', 'Valor', 'Exame']
+_SENTIMENTOS = ['positivo', 'negativo', 'neutro']
+
+
+def gerar_tickers(n_tickers):
+    """ Gera códigos no formato da B3 (AAAA3/AAAA4) """
+    letras = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+    rng = np.random.default_rng(0)
+    tickers = {}
+    while len(tickers) < n_tickers:
+        codigo = ''.join(rng.choice(letras, 4)) + str(rng.choice([3, 4]))
+        tickers[codigo] = None
+    return list(tickers)
+
+
+def gerar_precos(n_tickers=3, n_dias=250, intervalo='1D', seed=42, inicio='2024-01-02'):
+    """
+    Gera um histórico OHLCV sintético com o mesmo formato de precos.csv
+
+    As colunas saem com os tipos de um CSV lido sem otimização (float64,
+    texto), para servir de base em comparações de memória e benchmarks.
+
+    Parâmetros:
+    n_tickers (int): Quantidade de ativos
+    n_dias (int): Quantidade de candles por ativo
+    intervalo (str): Frequência dos candles ('1D', '5min', ...)
+    seed (int): Semente do gerador aleatório
+
+    Retorna:
+    DataFrame: data, ticker, abertura, fechamento, maxima, minima, volume, variacao_pct
+    """
+    rng = np.random.default_rng(seed)
+    freq = 'B' if intervalo == '1D' else intervalo
+    datas = pd.date_range(inicio, periods=n_dias, freq=freq, tz='America/Sao_Paulo')
+    tickers = gerar_tickers(n_tickers)
+
+    retornos = rng.normal(0, 0.02, size=(n_tickers, n_dias))
+    precos_iniciais = rng.uniform(5, 100, size=(n_tickers, 1))
+    fechamento = precos_iniciais * np.exp(np.cumsum(retornos, axis=1))
+    abertura = fechamento * (1 + rng.normal(0, 0.005, size=fechamento.shape))
+    maxima = np.maximum(abertura, fechamento) * (1 + rng.uniform(0, 0.01, size=fechamento.shape))
+    minima = np.minimum(abertura, fechamento) * (1 - rng.uniform(0, 0.01, size=fechamento.shape))
+    volume = rng.integers(100_000, 50_000_000, size=fechamento.shape)
+
+    variacao = np.full(fechamento.shape, np.nan)
+    variacao[:, 1:] = (fechamento[:, 1:] / fechamento[:, :-1] - 1) * 100
+
+    return pd.DataFrame({
+        'data': np.tile(datas.astype(str).to_numpy(dtype=object), n_tickers),
+        'ticker': np.repeat(np.array(tickers, dtype=object), n_dias),
+        'abertura': abertura.ravel(),
+        'fechamento': fechamento.ravel(),
+        'maxima': maxima.ravel(),
+        'minima': minima.ravel(),
+        'volume': volume.ravel(),
+        'variacao_pct': variacao.ravel()
+    })
+
+
+def gerar_noticias(n_noticias=1000, tickers=None, seed=42, inicio='2024-01-02', dias=250,
+                   com_sentimento=True):
+    """
+    Gera manchetes sintéticas com o formato de noticias_com_sentimento.csv
+
+    Parâmetros:
+    n_noticias (int): Quantidade de notícias
+    tickers (list): Ativos citados (padrão: gerar_tickers(3))
+    seed (int): Semente do gerador aleatório
+    inicio (str): Data da notícia mais antiga
+    dias (int): Janela de datas (em dias) a partir de `inicio`
+    com_sentimento (bool): Inclui as colunas do analisador de sentimento
+
+    Retorna:
+    DataFrame: Notícias com as colunas do scraper (e do analisador)
+    """
+    rng = np.random.default_rng(seed)
+    tickers = gerar_tickers(3) if tickers is None else tickers
+
+    titulos = (pd.Series(rng.choice(_SUJEITOS, n_noticias)) + ' '
+               + rng.choice(_EVENTOS, n_noticias) + ' '
+               + rng.choice(_CONTEXTOS, n_noticias)).str.strip()
+    # Sufixo numérico evita duplicatas exatas em bases grandes
+    titulos = titulos + ' (' + pd.Series(np.arange(n_noticias)).astype(str) + ')'
+
+    minutos = rng.integers(0, dias * 24 * 60, n_noticias)
+    datas = pd.Timestamp(inicio, tz='America/Sao_Paulo') + pd.to_timedelta(minutos, unit='min')
+
+    df = pd.DataFrame({
+        'ticker': rng.choice(np.array(tickers, dtype=object), n_noticias),
+        'titulo': titulos.to_numpy(dtype=object),
+        'link': '#',
+        'data': datas.strftime('%d/%m/%Y %H:%M').to_numpy(dtype=object),
+        'fonte': rng.choice(np.array(_FONTES, dtype=object), n_noticias),
+        'data_utc': datas.tz_convert('UTC').astype(str).to_numpy(dtype=object)
+    })
+
+    if com_sentimento:
+        scores = rng.dirichlet([1.0, 1.0, 1.5], n_noticias)
+        df['score_positivo'] = scores[:, 0]
+        df['score_negativo'] = scores[:, 1]
+        df['score_neutro'] = scores[:, 2]
+        rotulo = scores.argmax(axis=1)
+        df['sentimento'] = np.array(_SENTIMENTOS, dtype=object)[rotulo]
+        df['confianca'] = np.round(scores.max(axis=1) * 100, 1)
+
+    return df
+
+
+def gerar_html_infomoney(n_artigos=20, ticker='PETR4', seed=42):
+    """ Página de busca no formato do InfoMoney (fixture para o parser) """
+    rng = np.random.default_rng(seed)
+    artigos = []
+    for i in range(n_artigos):
+        titulo = f"{rng.choice(_SUJEITOS)} {rng.choice(_EVENTOS)} ({ticker} {i})"
+        artigos.append(
+            f'<article class="article-card"><a href="https://www.infomoney.com.br/mercados/noticia-{i}/">'
+            f'<h2 class="article-card__headline">{titulo}</h2></a>'
+            f'<p class="article-card__excerpt">Resumo da notícia {i}.</p>'
+            f'<time datetime="2026-01-07">há {rng.integers(1, 23)} horas</time></article>'
+        )
+    return ('<html><head><title>Busca</title></head><body><main>'
+            + ''.join(artigos) + '</main></body></html>')
+
+
+def gerar_html_g1(n_itens=5, ticker='PETR4', seed=42):
+    """ Página de busca no formato do G1 (fixture para o parser) """
+    rng = np.random.default_rng(seed)
+    itens = []
+    for i in range(n_itens):
+        titulo = f"{rng.choice(_SUJEITOS)} {rng.choice(_EVENTOS)} ({ticker} {i})"
+        itens.append(
+            f'<li class="widget widget--card widget--info"><div class="widget--info__text-container">'
+            f'<a href="//g1.globo.com/economia/noticia/{i}.ghtml">'
+            f'<div class="widget--info__title product-color">{titulo}</div></a>'
+            f'<div class="widget--info__description">Descrição {i}</div>'
+            f'<div class="widget--info__meta">há {rng.integers(1, 23)} horas</div></div></li>'
+        )
+    return '<html><body><ul class="results__list">' + ''.join(itens) + '</ul></body></html>'
+
+
+def criar_modelo_minimo(textos, camadas=2, dimensao=64, seed=42):
+    """
+    Cria um tokenizer + classificador BERT minúsculo, sem acesso à rede
+
+    Serve de substituto do FinBERT em benchmarks: o caminho de código
+    (tokenização, forward pass, softmax) é o mesmo, só que muito mais leve.
+
+    Parâmetros:
+    textos (list): Textos usados para montar o vocabulário
+    camadas (int): Camadas do encoder
+    dimensao (int): Tamanho do estado oculto
+
+    Retorna:
+    tuple: (tokenizer, model)
+    """
+    import os
+    import tempfile
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    palavras = sorted({p for t in textos for p in str(t).lower().split()})
+    vocab = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]'] + palavras
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, 'vocab.txt')
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(vocab))
+        tokenizer = BertTokenizerFast(vocab_file=arquivo, do_lower_case=True)
+
+    torch.manual_seed(seed)
+    config = BertConfig(
+        vocab_size=len(vocab), hidden_size=dimensao, num_hidden_layers=camadas,
+        num_attention_heads=2, intermediate_size=dimensao * 2, num_labels=3,
+        id2label={0: 'positive', 1: 'negative', 2: 'neutral'},
+        label2id={'positive': 0, 'negative': 1, 'neutral': 2}
+    )
+    return tokenizer, BertForSequenceClassification(config)
@@ -0,0 +1,270 @@
+"""
+Corpus pré-tokenizado das manchetes
+
+Cada manchete é tokenizada uma única vez; os input_ids ficam num vetor
+contínuo (ragged) em disco, com o deslocamento de cada manchete, e são lidos
+por memmap. Sem padding não há máscara a guardar: a attention_mask de cada
+manchete é o seu comprimento, e a máscara do lote é montada junto com ele.
+
+    python token_cache.py preparar                    # tokeniza o histórico de data/noticias.csv
+    python main.py sentimento --cache-tokens
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import torch
+from filelock import FileLock
+
+from instrumentation import contar
+
+
+DIR_TOKENS = 'data/tokens'
+
+
+def hash_exato(texto):
+    """ Hash (64 bits) do texto exato: tokenizers com maiúsculas veem 'Alta' e 'alta' diferentes """
+    return int.from_bytes(hashlib.blake2b(str(texto).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def hashes(textos):
+    return np.fromiter((hash_exato(t) for t in textos), dtype=np.uint64, count=len(textos))
+
+
+class CacheTokens:
+    """
+    input_ids de todas as manchetes já vistas, mapeados em memória
+
+    Arquivos em <diretorio>/<modelo>/:
+    - ids.i32: tokens de todas as manchetes em sequência (cresce dobrando)
+    - offsets.i64: início de cada manchete em ids.i32 (n + 1 valores)
+    - chaves.u64: hash de cada manchete, na ordem de inserção
+    - meta.json: manchetes válidas, tokens usados, capacidade e tokenizer (trocado atomicamente)
+
+    Vários escritores (página do app, python main.py sentimento --cache-tokens)
+    se revezam por uma trava de arquivo e releem meta.json antes de acrescentar.
+    """
+
+    def __init__(self, modelo='ProsusAI/finbert', max_length=512, diretorio=DIR_TOKENS,
+                 somente_leitura=False):
+        """
+        Parâmetros:
+        modelo (str): Nome do modelo/tokenizer (cada um tem sua pasta)
+        max_length (int): Truncamento aplicado ao tokenizar
+        somente_leitura (bool): Não grava manchetes novas (ex: vários processos lendo
+            o mesmo corpus); as ausentes são tokenizadas na hora
+        """
+        self.pasta = os.path.join(diretorio, re.sub(r'[^\w.-]+', '_', modelo))
+        self.max_length = max_length
+        self.somente_leitura = somente_leitura
+        self._lock = threading.Lock()
+        self.n = 0
+        self.total = 0
+        self.capacidade = 0
+        self.vocabulario = None
+        self._ids = np.empty(0, dtype=np.int32)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        # (chaves na ordem de inserção, ordem que as ordena): trocado de uma vez, depois
+        # de ids e offsets, e n por último; localizar/sequencia nunca passam do publicado
+        self._indice = (np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64))
+        self._abrir()
+
+    def _caminho(self, nome):
+        return os.path.join(self.pasta, nome)
+
+    def _trava(self):
+        os.makedirs(self.pasta, exist_ok=True)
+        return FileLock(self._caminho('.trava'))
+
+    def _abrir(self):
+        """ Lê meta.json e o índice gravado até agora (inclusive por outros processos) """
+        if not os.path.exists(self._caminho('meta.json')):
+            return
+        with open(self._caminho('meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['max_length'] != self.max_length:
+            raise ValueError(f"Corpus em {self.pasta} foi truncado em {meta['max_length']}, não {self.max_length}")
+        if meta['capacidade'] != self.capacidade:
+            self._ids = np.memmap(self._caminho('ids.i32'), dtype=np.int32,
+                                  mode='r' if self.somente_leitura else 'r+', shape=(meta['capacidade'],))
+            self.capacidade = meta['capacidade']
+        self.vocabulario = meta['vocabulario']
+        if meta['n'] != self.n:
+            # Linhas além de meta['n'] podem ser de uma gravação interrompida: são ignoradas
+            self._offsets = np.fromfile(self._caminho('offsets.i64'), dtype=np.int64, count=meta['n'] + 1)
+            chaves = np.fromfile(self._caminho('chaves.u64'), dtype=np.uint64, count=meta['n'])
+            self._indice = (chaves, np.argsort(chaves, kind='stable'))
+            self.total = meta['total']
+            self.n = meta['n']
+
+    def _salvar_meta(self, n, total):
+        temporario = self._caminho('meta.json.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'n': n, 'total': total, 'capacidade': self.capacidade,
+                       'max_length': self.max_length, 'vocabulario': self.vocabulario}, f)
+        os.replace(temporario, self._caminho('meta.json'))
+
+    def _garantir_capacidade(self, necessario):
+        if necessario <= self.capacidade:
+            return
+        nova = max(necessario, self.capacidade * 2, 1 << 16)
+        os.makedirs(self.pasta, exist_ok=True)
+        if isinstance(self._ids, np.memmap):
+            self._ids.flush()
+        self._ids = None
+        with open(self._caminho('ids.i32'), 'ab') as f:
+            f.truncate(nova * 4)  # int32 = 4 bytes
+        self.capacidade = nova
+        self._ids = np.memmap(self._caminho('ids.i32'), dtype=np.int32, mode='r+', shape=(nova,))
+
+    def _acrescentar(self, caminho, valores, posicao):
+        with open(caminho, 'r+b' if os.path.exists(caminho) else 'wb') as f:
+            f.seek(posicao * valores.itemsize)  # descarta o que sobrou de uma gravação interrompida
+            valores.tofile(f)
+            f.truncate()
+
+    def __len__(self):
+        return self.n
+
+    def localizar(self, chaves):
+        """
+        Linha de cada hash no corpus
+
+        Retorna:
+        ndarray: Posições (int64), -1 para hashes ausentes
+        """
+        chaves = np.asarray(chaves, dtype=np.uint64)
+        gravadas, ordem = self._indice
+        if len(ordem) == 0:
+            return np.full(len(chaves), -1, dtype=np.int64)
+        ordenadas = gravadas[ordem]
+        pos = np.searchsorted(ordenadas, chaves)
+        pos_valida = np.minimum(pos, len(ordem) - 1)
+        achou = ordenadas[pos_valida] == chaves
+        return np.where(achou, ordem[pos_valida], -1)
+
+    def sequencia(self, linha):
+        """ input_ids de uma manchete (visão do memmap, sem cópia) """
+        return self._ids[self._offsets[linha]:self._offsets[linha + 1]]
+
+    def _tokenizar(self, textos, tokenizer):
+        if self.vocabulario is None:
+            self.vocabulario = len(tokenizer)
+        elif self.vocabulario != len(tokenizer):
+            raise ValueError(f"Corpus em {self.pasta} é de um tokenizer com {self.vocabulario} tokens, "
+                             f"não {len(tokenizer)}")
+        ids = tokenizer(list(textos), truncation=True, max_length=self.max_length)['input_ids']
+        return [np.asarray(seq, dtype=np.int32) for seq in ids]
+
+    def adicionar(self, textos, tokenizer):
+        """
+        Tokeniza e grava as manchetes novas (as já conhecidas são ignoradas)
+
+        Retorna:
+        int: Quantidade de manchetes acrescentadas
+        """
+        textos = [str(t) for t in textos]
+        with self._lock, self._trava():
+            # Outro processo (ou outra instância) pode ter acrescentado manchetes desde a abertura
+            self._abrir()
+            chaves = hashes(textos)
+            _, unicas = np.unique(chaves, return_index=True)
+            unicas = np.sort(unicas)
+            novas = unicas[self.localizar(chaves[unicas]) < 0]
+            if len(novas) == 0:
+                return 0
+
+            sequencias = self._tokenizar([textos[i] for i in novas], tokenizer)
+            tamanhos = np.fromiter(map(len, sequencias), dtype=np.int64, count=len(sequencias))
+            self._garantir_capacidade(self.total + int(tamanhos.sum()))
+            self._ids[self.total:self.total + tamanhos.sum()] = np.concatenate(sequencias)
+            self._ids.flush()
+            offsets = self.total + np.cumsum(tamanhos)
+            self._acrescentar(self._caminho('offsets.i64'), np.concatenate([[0], offsets]) if self.n == 0
+                              else offsets, 0 if self.n == 0 else self.n + 1)
+            self._acrescentar(self._caminho('chaves.u64'), chaves[novas], self.n)
+
+            # meta.json por último: só então as linhas passam a valer para outros leitores
+            n, total = self.n + len(novas), int(offsets[-1])
+            self._salvar_meta(n, total)
+            self._offsets = np.concatenate([self._offsets, offsets])
+            gravadas = np.concatenate([self._indice[0], chaves[novas]])
+            self._indice = (gravadas, np.argsort(gravadas, kind='stable'))
+            self.total = total
+            self.n = n
+        return len(novas)
+
+    def tensores(self, sequencias, pad_token_id=0, token_type_ids=True):
+        """
+        Lote com padding à direita, pronto para o modelo (mesmo formato do tokenizer)
+
+        Parâmetros:
+        sequencias (list): input_ids de cada manchete (ex: sequencia(linha))
+        token_type_ids (bool): Inclui token_type_ids zerados (modelos BERT)
+
+        Retorna:
+        dict: input_ids, attention_mask (e token_type_ids) como tensores int64
+        """
+        tamanhos = np.fromiter(map(len, sequencias), dtype=np.int64, count=len(sequencias))
+        largura = int(tamanhos.max()) if len(tamanhos) else 0
+        ids = np.full((len(sequencias), largura), pad_token_id, dtype=np.int64)
+        for i, seq in enumerate(sequencias):
+            ids[i, :len(seq)] = seq
+        mascara = (np.arange(largura) < tamanhos[:, None]).astype(np.int64)
+        # torch.from_numpy compartilha a memória dos arrays do lote
+        lote = {'input_ids': torch.from_numpy(ids), 'attention_mask': torch.from_numpy(mascara)}
+        if token_type_ids:
+            lote['token_type_ids'] = torch.zeros_like(lote['input_ids'])
+        return lote
+
+    def lote(self, textos, tokenizer):
+        """
+        Tensores de um lote de manchetes, tokenizando só as que faltam no corpus
+
+        Retorna:
+        dict: Mesmo formato de tokenizer(textos, padding=True, truncation=True, return_tensors='pt')
+        """
+        textos = [str(t) for t in textos]
+        linhas = self.localizar(hashes(textos))
+        faltando = np.flatnonzero(linhas < 0)
+        contar('tokens.cache', len(textos) - len(faltando), resultado='hit')
+        contar('tokens.cache', len(faltando), resultado='miss')
+
+        avulsas = {}
+        if len(faltando) and not self.somente_leitura:
+            self.adicionar([textos[i] for i in faltando], tokenizer)
+            linhas = self.localizar(hashes(textos))
+        elif len(faltando):
+            avulsas = dict(zip(faltando, self._tokenizar([textos[i] for i in faltando], tokenizer)))
+
+        sequencias = [avulsas[i] if linha < 0 else self.sequencia(linha) for i, linha in enumerate(linhas)]
+        return self.tensores(sequencias, tokenizer.pad_token_id or 0,
+                             'token_type_ids' in tokenizer.model_input_names)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Corpus pré-tokenizado das manchetes")
+    parser.add_argument('comando', choices=['preparar'])
+    parser.add_argument('--dados', nargs='+', default=['data/noticias.csv', 'data/noticias_com_sentimento.csv'])
+    parser.add_argument('--modelo', default='ProsusAI/finbert')
+    args = parser.parse_args()
+
+    from transformers import AutoTokenizer
+    import storage
+    from schema import carregar_noticias
+
+    tokenizer = AutoTokenizer.from_pretrained(args.modelo)
+    corpus = CacheTokens(args.modelo)
+    for arquivo in args.dados:
+        if not storage.existe(arquivo):
+            continue
+        inicio = time.perf_counter()
+        novas = corpus.adicionar(carregar_noticias(arquivo)['titulo'].astype(str).tolist(), tokenizer)
+        print(f"🔤 {arquivo}: {novas} manchetes tokenizadas em {time.perf_counter() - inicio:.1f}s")
+    print(f"📦 Corpus: {len(corpus)} manchetes, {corpus.total} tokens em {corpus.pasta}")